@@ -1,17 +1,25 @@
 """
 App Module: Initialize Flask application and SocketIO
 """
-import threading
 import time
+import logging
+import threading
 from flask import Flask
-from flask_socketio import SocketIO
 
 from config import SECRET_KEY, WTF_CSRF_ENABLED, PERMANENT_SESSION_LIFETIME, SESSION_TYPE
 from utils import setup_ngrok, display_url
-from config import USE_NGROK, NGROK_AUTH_TOKEN, PORT
+from utils.metrics import MeteredJSON, SCAN_DURATION
+from utils.packed_updates import PackedUpdatesSocketIO
+from utils.json_backend import json_backend, backend_name, BackendJSONProvider
+from utils.logger import setup_logging
+from utils.profiler import install_signal_handler
+from config import USE_NGROK, NGROK_AUTH_TOKEN, PORT, RECORD_ROTATION_CHECK_INTERVAL, ROOM_REAP_INTERVAL
+from config import LOBBY_TICK_INTERVAL, SPECTATOR_UPDATE_INTERVAL, LOAD_PROBE_INTERVAL
+
+logger = logging.getLogger(__name__)
 
 # Create SocketIO instance (create here to share in routes and events)
-socketio = SocketIO(cors_allowed_origins="*")
+socketio = PackedUpdatesSocketIO(cors_allowed_origins="*", json=MeteredJSON(json_backend))
 
 def create_app():
     """
@@ -20,6 +28,8 @@ def create_app():
     Returns:
         Flask: Configured Flask application instance
     """
+    setup_logging()
+    
     app = Flask(__name__, 
                 template_folder='../templates',
                 static_folder='../static')
@@ -29,6 +39,8 @@ def create_app():
     app.config['WTF_CSRF_ENABLED'] = WTF_CSRF_ENABLED
     app.config['PERMANENT_SESSION_LIFETIME'] = PERMANENT_SESSION_LIFETIME
     app.config['SESSION_TYPE'] = SESSION_TYPE
+    app.json = BackendJSONProvider(app)
+    logger.info("JSON backend: %s", backend_name(json_backend))
     
     # Initialize SocketIO with Flask application
     socketio.init_app(app)
@@ -36,6 +48,9 @@ def create_app():
     # Setup ngrok
     setup_ngrok(app, use_ngrok=USE_NGROK, auth_token=NGROK_AUTH_TOKEN, port=PORT)
     
+    # Profile on SIGUSR2
+    install_signal_handler()
+    
     # Register blueprints
     with app.app_context():
         # Import and register routes
@@ -46,17 +61,65 @@ def create_app():
         from app.events import register_events
         register_events(socketio)
     
+    # Rooms hibernated by an earlier run stay listed in the lobby
+    from models import game_rooms, hibernated_rooms, room_store
+    stubs = room_store.load_stubs()
+    hibernated_rooms.update(stubs)
+    for room_id in stubs:
+        game_rooms.notify(room_id)
+    
+    # Push room-list changes to lobby viewers once per tick
+    from app import lobby
+    lobby.lobby_feed = lobby.LobbyFeed(socketio, game_rooms, hibernated_rooms)
+    
+    def schedule_lobby_tick():
+        try:
+            lobby.lobby_feed.tick()
+        except Exception as e:
+            logger.error("Lobby tick error: %s", e)
+        start_timer(LOBBY_TICK_INTERVAL, schedule_lobby_tick)
+    
+    start_timer(LOBBY_TICK_INTERVAL, schedule_lobby_tick)
+    
+    # Stream watched tables to their spectators at a bounded rate
+    from app import spectators
+    spectators.spectator_feed = spectators.SpectatorFeed(socketio, game_rooms, hibernated_rooms)
+    
+    def schedule_spectator_tick():
+        try:
+            spectators.spectator_feed.tick()
+        except Exception as e:
+            logger.error("Spectator tick error: %s", e)
+        start_timer(SPECTATOR_UPDATE_INTERVAL, schedule_spectator_tick)
+    
+    start_timer(SPECTATOR_UPDATE_INTERVAL, schedule_spectator_tick)
+    
+    # Measure how late a timer runs, the load signal of admission control
+    from utils.admission import admission
+    
+    def schedule_load_probe(scheduled_at):
+        admission.record_lag(max(0.0, time.monotonic() - scheduled_at - LOAD_PROBE_INTERVAL))
+        now = time.monotonic()
+        start_timer(LOAD_PROBE_INTERVAL, lambda: schedule_load_probe(now))
+    
+    now = time.monotonic()
+    start_timer(LOAD_PROBE_INTERVAL, lambda: schedule_load_probe(now))
+    
     # Add scheduled task to check AI players every 3 seconds
     def check_ai_players():
         try:
-            from models import game_rooms, ai_player_manager
+            from models import game_rooms, ai_player_manager, action_log
             from app import socketio
             
             # Current time
             current_time = time.time()
             
             # Traverse all rooms
-            for room_id, game_room in game_rooms.items():
+            for room_id, game_room in list(game_rooms.items()):
+                # AI players in rooms without connected humans wait for them to come back
+                if not game_room.has_connected_humans():
+                    continue
+                
                 # Track room state
                 if not hasattr(game_room, 'last_state_change_time'):
                     game_room.last_state_change_time = current_time
@@ -71,7 +134,7 @@ def create_app():
                                           if p.is_ai and p.state == "betting"]
                     
                     if ai_players_betting and time_since_last_change > 5:
-                        print(f"Timer detected {len(ai_players_betting)} AI players in betting state and possibly stuck ({time_since_last_change:.1f} seconds without action), forcing bet")
+                        logger.warning("Timer detected %s AI players in betting state and possibly stuck (%.1f seconds without action), forcing bet", len(ai_players_betting), time_since_last_change)
                         if ai_player_manager.force_ai_action(game_room):
                             # Update state change time
                             game_room.last_state_change_time = current_time
@@ -82,7 +145,7 @@ def create_app():
                             
                             # If consecutive failures, force reset game state
                             if game_room.stuck_timer >= 3:
-                                print(f"Game seriously stuck, forcing reset to waiting state")
+                                logger.warning("Game seriously stuck, forcing reset to waiting state")
                                 game_room.game_state = "waiting"
                                 for player in game_room.players.values():
                                     if player.state == "betting":
@@ -103,7 +166,7 @@ def create_app():
                         # If current player is AI and state is "playing", and over 5 seconds, force action
                         if (current_player and current_player.is_ai and 
                             current_player.state == "playing" and time_since_last_change > 5):
-                            print(f"Timer detected AI {current_player.name} may be stuck ({time_since_last_change:.1f} seconds without action), forcing action")
+                            logger.warning("Timer detected AI %s may be stuck (%.1f seconds without action), forcing action", current_player.name, time_since_last_change)
                             if ai_player_manager.force_ai_action(game_room):
                                 # Update state change time
                                 game_room.last_state_change_time = current_time
@@ -114,8 +177,9 @@ def create_app():
                                 
                                 # If consecutive failures, force move to next player
                                 if game_room.stuck_timer >= 3:
-                                    print(f"AI seriously stuck, forcing move to next player")
+                                    logger.warning("AI seriously stuck, forcing move to next player")
                                     current_player.state = "stand"
+                                    game_room.action_log.add(action_log.STAND, current_player_id)
                                     game_room.current_player_index = (game_room.current_player_index + 1) % len(game_room.player_order)
                                     game_room.set_current_player()
                                     game_room.last_state_change_time = current_time
@@ -125,12 +189,12 @@ def create_app():
                                     socketio.emit('game_update', game_room.to_dict(), room=room_id)
                     elif time_since_last_change > 10:
                         # If game in playing state but no player can act, possibly stuck
-                        print(f"Game in playing state but no valid player can act, possibly stuck, attempting to fix")
+                        logger.warning("Game in playing state but no valid player can act, possibly stuck, attempting to fix")
                         game_room.stuck_timer += 1
                         
                         # If stuck for 3+ checks, force enter dealer turn
                         if game_room.stuck_timer >= 3:
-                            print(f"Game stuck for a long time, forcing dealer's turn")
+                            logger.warning("Game stuck for a long time, forcing dealer's turn")
                             game_room.dealer_turn()
                             game_room.last_state_change_time = current_time
                             game_room.stuck_timer = 0
@@ -144,7 +208,7 @@ def create_app():
                                          if p.is_ai and p.state == "waiting" and p.money > 0]
                     
                     if ai_players_waiting and time_since_last_change > 5:
-                        print(f"Timer detected {len(ai_players_waiting)} AI players need to prepare")
+                        logger.debug("Timer detected %s AI players need to prepare", len(ai_players_waiting))
                         for player in ai_players_waiting:
                             player.state = "ready"
                             
@@ -169,28 +233,70 @@ def create_app():
                 # Game over phase might also get stuck
                 elif game_room.game_state == "game_over" and time_since_last_change > 30:
                     # If game over state lasts too long, automatically reset game
-                    print(f"Game over state lasting too long, automatically resetting game")
+                    logger.info("Game over state lasting too long, automatically resetting game")
                     if game_room.prepare_new_round():
                         socketio.emit('game_update', game_room.to_dict(), room=room_id)
                         socketio.emit('notification', {"message": "A new round has automatically started"}, room=room_id)
                         game_room.last_state_change_time = current_time
                         game_room.stuck_timer = 0
         except Exception as e:
-            print(f"AI check task error: {e}")
+            logger.error("AI check task error: %s", e)
     
     # Setup scheduled task
     def schedule_check():
+        start_time = time.perf_counter()
         try:
             check_ai_players()
         except Exception as e:
-            print(f"AI check task error: {e}")
-        threading.Timer(3.0, schedule_check).start()
+            logger.error("AI check task error: %s", e)
+        SCAN_DURATION.observe(time.perf_counter() - start_time, scanner="ai_timer")
+        start_timer(3.0, schedule_check)
     
     # Start scheduled task
-    threading.Timer(3.0, schedule_check).start()
+    start_timer(3.0, schedule_check)
+    
+    # Setup scheduled rotation of game record segments, so rooms that stopped
+    # playing are archived too
+    def schedule_record_rotation():
+        try:
+            from models import game_record_manager
+            rotated = game_record_manager.rotate_stale_segments()
+            if rotated:
+                logger.info("Archived %s game record segments", rotated)
+        except Exception as e:
+            logger.error("Record rotation task error: %s", e)
+        start_timer(RECORD_ROTATION_CHECK_INTERVAL, schedule_record_rotation)
+    
+    start_timer(RECORD_ROTATION_CHECK_INTERVAL, schedule_record_rotation)
+    
+    # Setup scheduled removal of players who did not reconnect and idle rooms
+    def schedule_room_reaping():
+        start_time = time.perf_counter()
+        try:
+            from models import room_reaper
+            room_reaper.reap()
+        except Exception as e:
+            logger.error("Room reaper task error: %s", e)
+        SCAN_DURATION.observe(time.perf_counter() - start_time, scanner="room_reaper")
+        start_timer(ROOM_REAP_INTERVAL, schedule_room_reaping)
+    
+    start_timer(ROOM_REAP_INTERVAL, schedule_room_reaping)
     
     return app
 
+def start_timer(interval, function):
+    """
+    Run a function once after an interval in a daemon timer thread, so
+    self-rescheduling tasks don't keep the process alive on shutdown
+    
+    Args:
+        interval (float): Seconds to wait
+        function (callable): Function to run
+    """
+    timer = threading.Timer(interval, function)
+    timer.daemon = True
+    timer.start()
+
 def start_display_url_thread(app):
     """Start thread to display URL"""
     url_thread = threading.Thread(target=lambda: display_url(app, PORT))
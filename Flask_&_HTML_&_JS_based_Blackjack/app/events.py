@@ -3,11 +3,25 @@ Events Module: Handle all Socket.IO events
 """
 import uuid
 import time
+import logging
+import inspect
+import functools
 from flask import request, after_this_request
-from flask_socketio import emit, join_room, leave_room
+from flask_socketio import emit, join_room, leave_room, ConnectionRefusedError
 
-from models import game_rooms, player_sessions, ai_player_manager
+from models import game_rooms, player_sessions, ai_player_manager, release_room, drop_player_sessions, get_room
+from models import matchmaker
+from utils.metrics import SOCKETIO_EVENTS_RECEIVED, SOCKETIO_EVENTS_REJECTED, SOCKETIO_CONNECTIONS
+from utils.event_timing import timed, start_event_timing, finish_event_timing, record_client_render
+from utils.packed_updates import PACKED_VERSION
+from utils.rate_limit import rate_limiter, request_key, EXEMPT_EVENTS
+from utils.admission import admission
+from utils.resume_tokens import issue_resume_token, load_resume_token
+from app import lobby, spectators
 
+logger = logging.getLogger(__name__)
+
+@timed("ai")
 def handle_game_update_after_emit(game_room):
     """Handle operations after game update event is sent"""
     from app import socketio
@@ -15,7 +29,7 @@ def handle_game_update_after_emit(game_room):
     # Delay a bit to let client update UI
     socketio.sleep(1)
     
-    print(f"Processing game update event - room state: {game_room.game_state}")
+    logger.debug("Processing game update event - room state: %s", game_room.game_state)
     
     # Handle AI decisions in different game states
     if game_room.game_state == "betting":
@@ -23,10 +37,10 @@ def handle_game_update_after_emit(game_room):
         ai_players_betting = [p for p_id, p in game_room.players.items() 
                              if p.is_ai and p.state == "betting"]
         
-        print(f"Betting phase - AI players that need to bet: {len(ai_players_betting)}")
+        logger.debug("Betting phase - AI players that need to bet: %s", len(ai_players_betting))
         
         for ai_player in ai_players_betting:
-            print(f"AI player {ai_player.name} starts betting...")
+            logger.debug("AI player %s starts betting...", ai_player.name)
             # Directly call betting decision and ensure broadcast update
             result = ai_player_manager.ai_betting_decision(game_room, ai_player)
             
@@ -42,7 +56,7 @@ def handle_game_update_after_emit(game_room):
             
             # Check if current player is AI that needs to act
             if current_player and current_player.is_ai and current_player.state == "playing":
-                print(f"Current acting player is AI: {current_player.name}")
+                logger.debug("Current acting player is AI: %s", current_player.name)
                 
                 # Record current time for detecting stuck
                 start_time = time.time()
@@ -55,7 +69,7 @@ def handle_game_update_after_emit(game_room):
                 
                 # Check if execution was successful, force action if failed
                 if not result and current_player.state == "playing":
-                    print(f"AI {current_player.name} action failed, forcing action")
+                    logger.warning("AI %s action failed, forcing action", current_player.name)
                     if ai_player_manager.force_ai_action(game_room):
                         socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
                 
@@ -64,7 +78,7 @@ def handle_game_update_after_emit(game_room):
                 
                 # Check if timeout, consider stuck after 3 seconds
                 if time.time() - start_time > 3:
-                    print(f"AI action taking too long, possibly stuck, forcing action")
+                    logger.warning("AI action taking too long, possibly stuck, forcing action")
                     if ai_player_manager.force_ai_action(game_room):
                         socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
                 
@@ -74,7 +88,7 @@ def handle_game_update_after_emit(game_room):
                     socketio.sleep(0.5)  # Short delay
                     handle_game_update_after_emit(game_room)
             else:
-                print(f"Current player is not AI or doesn't need to act")
+                logger.debug("Current player is not AI or doesn't need to act")
     
     # Other game state handling...
     elif game_room.game_state == "waiting":
@@ -89,10 +103,129 @@ def register_events(socketio):
         socketio (SocketIO): SocketIO instance
     """
     
-    @socketio.on('connect')
-    def handle_connect():
+    def on_event(event, dedupe_key=None):
+        """
+        Register a Socket.IO event handler that records event count, latency
+        and its breakdown, traces it, and writes slow handlers to the
+        slow-event log
+        
+        Events over the connection's rate limit, and events identical to one
+        still being handled, are dropped before the handler runs
+        
+        Args:
+            event (str): Event name
+            dedupe_key (callable, optional): Payload -> key of requests that must not run
+                concurrently (None to allow any), identical requests of the same connection
+                if not given
+        """
+        def decorator(handler):
+            # Only pass the arguments the handler accepts (e.g. disconnect reason)
+            parameters = inspect.signature(handler).parameters.values()
+            if any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in parameters):
+                max_args = None
+            else:
+                max_args = len(parameters)
+            
+            @functools.wraps(handler)
+            def wrapper(*args):
+                SOCKETIO_EVENTS_RECEIVED.inc(event=event)
+                data = args[0] if args and isinstance(args[0], dict) else {}
+                if not rate_limiter.allow(request.sid, event):
+                    SOCKETIO_EVENTS_REJECTED.inc(event=event, reason="rate_limited")
+                    logger.debug("Rate limited %s from %s", event, request.sid)
+                    return
+                key = None
+                if event not in EXEMPT_EVENTS:
+                    key = dedupe_key(data) if dedupe_key else request_key(request.sid, event, data)
+                    if key is not None and not rate_limiter.begin(key):
+                        SOCKETIO_EVENTS_REJECTED.inc(event=event, reason="duplicate")
+                        logger.debug("Dropped duplicate %s from %s", event, request.sid)
+                        return
+                # Clients may supply their own trace id to correlate actions; a render report's
+                # trace id names the update it reports on, not a trace of its own
+                trace_id = data.get('trace_id') if event != 'client_render' else None
+                if not isinstance(trace_id, str) or len(trace_id) > 64:
+                    trace_id = None
+                timing = start_event_timing(event, trace_id)
+                admission.handler_started()
+                try:
+                    return handler(*args[:max_args])
+                finally:
+                    admission.handler_finished()
+                    # Context for the slow-event log
+                    room_id = data.get('room_id')
+                    game_room = game_rooms.get(room_id) if room_id else None
+                    if game_room:
+                        game_room.last_activity = time.time()
+                    finish_event_timing(
+                        timing, room_id,
+                        game_room.game_state if game_room else None,
+                        len(game_room.players) if game_room else None)
+                    if key is not None:
+                        rate_limiter.end(key)
+            
+            return socketio.on(event)(wrapper)
+        return decorator
+    
+    def resume_player(token, state_version):
+        """
+        Seat a reconnecting client from its resume token and catch it up
+        
+        The client gets resumed with the changes since state_version, or
+        room_data when that version is no longer known, plus a new token.
+        
+        Args:
+            token (str): Resume token from the connection's auth payload
+            state_version (int): Last state version the client saw, may be None
+        
+        Returns:
+            bool: Whether the player was seated, the client joins normally otherwise
+        """
+        claims = load_resume_token(token)
+        game_room = get_room(claims["room_id"]) if claims else None
+        if game_room is None:
+            return False
+        
+        # The seat is found by the player ID in the token, or by session if the player reconnected since
+        old_player_id = claims["player_id"]
+        player = game_room.players.get(old_player_id)
+        if player is None or player.session_id != claims["session_id"]:
+            old_player_id = next((player_id for player_id, player in game_room.players.items()
+                                  if player.session_id == claims["session_id"]), None)
+            if old_player_id is None:
+                return False
+        player = game_room.rebind_player(old_player_id, request.sid)
+        player_sessions[claims["session_id"]] = request.sid
+        join_room(game_room.room_id)
+        
+        changes = game_room.changes_since(state_version) if isinstance(state_version, int) else None
+        if changes is not None:
+            emit('resumed', changes)
+        else:
+            emit('room_data', game_room.to_dict())
+        emit('resume_token', {"token": issue_resume_token(claims["session_id"], game_room.room_id, request.sid)})
+        
+        # The others know the player by the old socket ID
+        emit('game_update', game_room.to_dict(), room=game_room.room_id, include_self=False)
+        logger.info("Player %s resumed in room %s", player.name, game_room.room_id)
+        return True
+    
+    @on_event('connect')
+    def handle_connect(auth=None):
         """Handle client connection event"""
-        print(f"Client connected: {request.sid}")
+        message = admission.connect()
+        if message is not None:
+            logger.warning("Refused connection %s: %s", request.sid, message)
+            raise ConnectionRefusedError(message)
+        logger.info("Client connected: %s", request.sid)
+        SOCKETIO_CONNECTIONS.inc()
+        
+        # A client with a resume token is seated in O(1), without scanning rooms or join_room
+        if isinstance(auth, dict) and auth.get('resume'):
+            if resume_player(auth['resume'], auth.get('state_version')):
+                return
+            emit('resume_failed')
+        
         # Check if previously connected player (can use cookie or sessionID)
         session_id = request.cookies.get('session_id')
         if not session_id:
@@ -108,23 +241,21 @@ def register_events(socketio):
             # Traverse all rooms, update player ID
             for room in game_rooms.values():
                 if old_player_id in room.players:
-                    player = room.players[old_player_id]
-                    # Delete old ID
-                    room.players.pop(old_player_id)
-                    # Use new ID
-                    player.player_id = request.sid
-                    room.players[request.sid] = player
-                    
-                    # Update player order
-                    if old_player_id in room.player_order:
-                        idx = room.player_order.index(old_player_id)
-                        room.player_order[idx] = request.sid
+                    room.rebind_player(old_player_id, request.sid)
 
-    @socketio.on('disconnect')
+    @on_event('disconnect')
     def handle_disconnect():
         """Handle client disconnection event"""
         player_id = request.sid
-        print(f"Client disconnected: {player_id}")
+        logger.info("Client disconnected: %s", player_id)
+        SOCKETIO_CONNECTIONS.dec()
+        admission.disconnect()
+        rate_limiter.forget(player_id)
+        if lobby.lobby_feed is not None:
+            lobby.lobby_feed.unsubscribe(player_id)
+        if spectators.spectator_feed is not None:
+            spectators.spectator_feed.remove(player_id)
+        socketio.set_packed(player_id, False)
         
         # Get session ID
         session_id = request.cookies.get('session_id') or request.args.get('session_id')
@@ -134,8 +265,9 @@ def register_events(socketio):
             if player_id in game_room.players:
                 player = game_room.players[player_id]
                 
-                # Mark player as disconnected
+                # Mark player as disconnected, the room reaper removes them after the grace period
                 player.is_disconnected = True
+                player.disconnected_at = time.time()
                 
                 # If game is in progress and it's the player's turn, automatically stand
                 if game_room.game_state == "playing" and game_room.current_player_index < len(game_room.player_order):
@@ -153,31 +285,77 @@ def register_events(socketio):
                 # Broadcast updated game state
                 emit('game_update', game_room.to_dict(), room=room_id)
                 
-                # Handle AI players
-                socketio.sleep(1)
-                handle_game_update_after_emit(game_room)
-                
-                # If room is empty, delete room
-                # Note: We don't immediately remove disconnected human players to give them a chance to reconnect
-                remaining_players = [p for p_id, p in game_room.players.items() 
-                                   if p_id != player_id or p.is_ai]
-                
-                if not remaining_players:
-                    del game_rooms[room_id]
-                    print(f"Deleted empty room: {room_id}")
-                    # Can add additional cleanup logic here, like clearing related session data
-                    if hasattr(game_room, 'session_states'):
-                        game_room.session_states.clear()
+                # Handle AI players, unless nobody is left to watch them play
+                if game_room.has_connected_humans():
+                    socketio.sleep(1)
+                    handle_game_update_after_emit(game_room)
                 
+                # The room is kept even if this was its only player, so they can reconnect;
+                # the room reaper hibernates or deletes it later
                 break
     
-    @socketio.on('join_room')
+    @on_event('set_wire_format')
+    def handle_set_wire_format(data):
+        """Handle wire format negotiation: "msgpack" for packed game updates, or "json" """
+        packed = socketio.set_packed(request.sid, data.get('format') == "msgpack")
+        emit('wire_format', {"format": "msgpack" if packed else "json", "version": PACKED_VERSION})
+    
+    @on_event('subscribe_lobby')
+    def handle_subscribe_lobby():
+        """Handle lobby subscription: send the room list, then deltas every tick"""
+        join_room(lobby.LOBBY_ROOM)
+        emit('lobby_snapshot', lobby.lobby_feed.subscribe(request.sid))
+    
+    @on_event('unsubscribe_lobby')
+    def handle_unsubscribe_lobby():
+        """Handle lobby unsubscription"""
+        leave_room(lobby.LOBBY_ROOM)
+        lobby.lobby_feed.unsubscribe(request.sid)
+    
+    @on_event('quick_join')
+    def handle_quick_join():
+        """Handle quick join: reserve a seat, the client then joins that room"""
+        result = matchmaker.quick_join()
+        if not result["success"]:
+            emit('error', {"message": result["message"]})
+            return
+        emit('quick_join_result', result)
+    
+    @on_event('spectate_room')
+    def handle_spectate_room(data):
+        """Handle spectator joining: watch a room without taking a seat"""
+        room_id = data.get('room_id')
+        game_room = get_room(room_id)
+        if game_room is None:
+            emit('error', {"message": "Room does not exist"})
+            return
+        
+        message = admission.admit_player("spectator")
+        if message is not None:
+            emit('error', {"message": message})
+            return
+        
+        state = spectators.spectator_feed.table_state(game_room)
+        previous = spectators.spectator_feed.add(request.sid, room_id, state)
+        if previous is not None and previous != room_id:
+            leave_room(spectators.spectator_room(previous))
+        join_room(spectators.spectator_room(room_id))
+        emit('room_data', state)
+    
+    @on_event('stop_spectating')
+    def handle_stop_spectating():
+        """Handle spectator leaving"""
+        room_id = spectators.spectator_feed.remove(request.sid)
+        if room_id is not None:
+            leave_room(spectators.spectator_room(room_id))
+    
+    @on_event('join_room')
     def handle_join_room(data):
         """Handle player joining room event"""
         room_id = data.get('room_id')
         player_name = data.get('player_name', f"Player{request.sid[:4]}")
         
-        if room_id not in game_rooms:
+        if get_room(room_id) is None:
             emit('error', {"message": "Room does not exist"})
             return
         
@@ -203,35 +381,37 @@ def register_events(socketio):
         
         # Check if player already in room
         player_exists = False
-        for player_id, player in game_rooms[room_id].players.items():
+        for player_id, player in list(game_rooms[room_id].players.items()):
             if player.name == player_name:
                 player_exists = True
                 # If player exists but ID different, it's same player with different connection
                 if player_id != request.sid:
-                    # Update player ID
-                    player.player_id = request.sid
-                    game_rooms[room_id].players[request.sid] = player
-                    game_rooms[room_id].players.pop(player_id)
-                    
-                    # Update player order
-                    if player_id in game_rooms[room_id].player_order:
-                        idx = game_rooms[room_id].player_order.index(player_id)
-                        game_rooms[room_id].player_order[idx] = request.sid
+                    game_rooms[room_id].rebind_player(player_id, request.sid)
                 
                 # Reset disconnected state
                 player.is_disconnected = False
+                player.disconnected_at = None
+                player.session_id = session_id
                 break
         
         # If player doesn't exist, create new player
         if not player_exists:
+            # New players are refused while overloaded, players returning to their seat never are
+            message = admission.admit_player()
+            if message is not None:
+                emit('error', {"message": message})
+                return
+            
             # Create new player
             from models.player import Player
             player_id = request.sid
             player = Player(player_id, player_name)
+            player.session_id = session_id
             
-            # Add player to room
+            # Add player to room, seats reserved by quick join are kept for their players
             game_room = game_rooms[room_id]
-            if not game_room.add_player(player):
+            reserved = matchmaker.claim(room_id, data.get('reservation'))
+            if (not reserved and not matchmaker.has_free_seat(game_room)) or not game_room.add_player(player):
                 emit('error', {"message": "Room is full"})
                 return
         
@@ -242,15 +422,16 @@ def register_events(socketio):
         if not player_exists:
             emit('player_joined', {"player": game_rooms[room_id].players[request.sid].to_dict()}, room=room_id)
         
-        # Send complete room info to new player
+        # Send complete room info to new player, and the token to resume with after a reconnect
         emit('room_data', game_rooms[room_id].to_dict())
+        emit('resume_token', {"token": issue_resume_token(session_id, room_id, request.sid)})
         
         # Add code: Handle AI players
         # Delay a bit to let client update UI
         socketio.sleep(1)
         ai_player_manager.handle_ai_turns(game_rooms[room_id])
     
-    @socketio.on('leave_room')
+    @on_event('leave_room')
     def handle_leave_room(data):
         """Handle player leaving room event"""
         room_id = data.get('room_id')
@@ -263,16 +444,18 @@ def register_events(socketio):
         
         # Remove player from room
         if game_room.remove_player(player_id):
+            drop_player_sessions([player_id])
+            
             # Leave Socket.IO room
             leave_room(room_id)
             
             # Broadcast player left message
             emit('player_left', {"player_id": player_id}, room=room_id)
             
-            # If room is empty, delete room
-            if len(game_room.players) == 0:
-                del game_rooms[room_id]
-                print(f"Deleted empty room: {room_id}")
+            # If no human player is left, delete room (AI players would play on unattended)
+            if not any(not p.is_ai for p in game_room.players.values()):
+                release_room(room_id)
+                logger.info("Deleted empty room: %s", room_id)
                 return
             
             # Check if player leaving affects game
@@ -285,7 +468,7 @@ def register_events(socketio):
             socketio.sleep(1)
             handle_game_update_after_emit(game_room)
     
-    @socketio.on('player_ready')
+    @on_event('player_ready')
     def handle_player_ready(data):
         """Handle player ready event"""
         room_id = data.get('room_id')
@@ -338,7 +521,7 @@ def register_events(socketio):
                 # Handle AI players
                 handle_game_update_after_emit(game_room)
     
-    @socketio.on('place_bet')
+    @on_event('place_bet')
     def handle_place_bet(data):
         """Handle player bet event"""
         room_id = data.get('room_id')
@@ -354,7 +537,7 @@ def register_events(socketio):
         # Check if bet amount is all funds (All-in)
         player = game_room.players.get(player_id)
         if player and bet_amount == player.money:
-            print(f"Player {player.name} is going All-in!")
+            logger.debug("Player %s is going All-in!", player.name)
         
         # Player bets
         if game_room.place_bet(player_id, bet_amount):
@@ -376,7 +559,8 @@ def register_events(socketio):
                 # No AI players need to bet, normal processing
                 handle_game_update_after_emit(game_room)
     
-    @socketio.on('hit')
+    # Hitting again before the previous hit's handler returns is a real second hit
+    @on_event('hit', dedupe_key=lambda data: None)
     def handle_hit(data):
         """Handle player hit event"""
         room_id = data.get('room_id')
@@ -395,7 +579,7 @@ def register_events(socketio):
             # Handle AI players
             handle_game_update_after_emit(game_room)
     
-    @socketio.on('stand')
+    @on_event('stand')
     def handle_stand(data):
         """Handle player stand event"""
         room_id = data.get('room_id')
@@ -414,7 +598,7 @@ def register_events(socketio):
             # Handle AI players
             handle_game_update_after_emit(game_room)
     
-    @socketio.on('double_down')
+    @on_event('double_down')
     def handle_double_down(data):
         """Handle player double down event"""
         room_id = data.get('room_id')
@@ -433,7 +617,7 @@ def register_events(socketio):
             # Handle AI players
             handle_game_update_after_emit(game_room)
     
-    @socketio.on('next_round')
+    @on_event('next_round')
     def handle_next_round(data):
         """Handle next round event"""
         room_id = data.get('room_id')
@@ -461,11 +645,22 @@ def register_events(socketio):
             socketio.sleep(1)
             ai_player_manager.handle_ai_turns(game_room)
     
-    @socketio.on('game_update')
+    # One AI pass per room at a time, whichever client asks for it
+    @on_event('game_update', dedupe_key=lambda data: ('game_update', data.get('room_id')))
     def handle_game_update(data):
         """Receive game state update event"""
-        print("Received game state update event")
+        logger.debug("Received game state update event")
         # Handle AI players
         room_id = data.get('room_id')
         if room_id in game_rooms:
-            handle_game_update_after_emit(game_rooms[room_id])
\ No newline at end of file
+            handle_game_update_after_emit(game_rooms[room_id])
+    
+    @on_event('client_render')
+    def handle_client_render(data):
+        """Receive a client's render time for a traced game update"""
+        trace_id = data.get('trace_id')
+        render_ms = data.get('render_ms')
+        if not isinstance(trace_id, str) or not isinstance(render_ms, (int, float)):
+            return
+        if 0 <= render_ms < 60000:
+            record_client_render(trace_id, render_ms / 1000)
@@ -0,0 +1,121 @@
+"""
+Lobby Feed: Push room-list changes to lobby viewers over Socket.IO
+
+Viewers join the "lobby" Socket.IO room with subscribe_lobby and receive one
+lobby_snapshot, then lobby_delta batches. Room changes reported by the room
+registry are collected in a set and turned into deltas once per tick, so a
+room that changes many times within a tick costs one delta, and the room
+list is never rebuilt per viewer.
+
+    lobby_snapshot: {"version": 12, "rooms": [room summary, ...]}
+    lobby_delta:    {"version": 13, "changes": [
+                        {"type": "created", "room": room summary},
+                        {"type": "updated", "room_id": ..., "player_count": 2, "game_state": "playing"},
+                        {"type": "removed", "room_id": ...}]}
+
+A delta applies to the list of the previous version; a client that sees a
+gap in versions subscribes again for a new snapshot.
+"""
+import logging
+import threading
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOBBY_ROOM = "lobby"
+
+
+class LobbyFeed:
+    """Batched room-list deltas for the lobby channel"""
+    
+    def __init__(self, socketio, game_rooms, hibernated_rooms):
+        """
+        Initialize lobby feed
+        
+        Args:
+            socketio (SocketIO): SocketIO instance
+            game_rooms (RoomRegistry): Live rooms
+            hibernated_rooms (dict): Lobby stubs of hibernated rooms
+        """
+        self.socketio = socketio
+        self.game_rooms = game_rooms
+        self.hibernated_rooms = hibernated_rooms
+        self.lock = threading.Lock()
+        self.version = 0
+        self.rooms = {}  # room_id -> summary as of the current version
+        self.pending = set(game_rooms) | set(hibernated_rooms)  # changed since the last tick
+        self.subscribers = set()
+        game_rooms.add_listener(self.room_changed)
+        metrics.gauge("blackjack_lobby_subscribers", "Socket.IO clients subscribed to the lobby",
+                      callback=lambda: {(): len(self.subscribers)})
+        self.collect_changes()
+    
+    def room_changed(self, room_id):
+        """Registry listener, remembers the room until the next tick"""
+        with self.lock:
+            self.pending.add(room_id)
+    
+    def current_summary(self, room_id):
+        """Get a room's lobby summary, None if the room no longer exists"""
+        from models import room_index
+        return room_index.lookup(room_id)
+    
+    def collect_changes(self):
+        """
+        Turn the rooms changed since the last tick into a delta
+        
+        Returns:
+            dict: lobby_delta payload, None if nothing visible changed
+        """
+        with self.lock:
+            pending, self.pending = self.pending, set()
+            changes = []
+            for room_id in pending:
+                summary = self.current_summary(room_id)
+                previous = self.rooms.get(room_id)
+                if summary is None:
+                    if previous is not None:
+                        del self.rooms[room_id]
+                        changes.append({"type": "removed", "room_id": room_id})
+                elif previous is None:
+                    self.rooms[room_id] = summary
+                    changes.append({"type": "created", "room": summary})
+                elif summary != previous:
+                    self.rooms[room_id] = summary
+                    changes.append({"type": "updated", "room_id": room_id,
+                                    "player_count": summary["player_count"],
+                                    "game_state": summary["game_state"]})
+            if not changes:
+                return None
+            self.version += 1
+            return {"version": self.version, "changes": changes}
+    
+    def tick(self):
+        """Send the changes since the last tick to the lobby subscribers"""
+        delta = self.collect_changes()
+        if delta is not None and self.subscribers:
+            self.socketio.emit('lobby_delta', delta, room=LOBBY_ROOM)
+    
+    def subscribe(self, sid):
+        """
+        Add a subscriber
+        
+        Args:
+            sid (str): Socket ID, already joined to the lobby room
+        
+        Returns:
+            dict: lobby_snapshot payload
+        """
+        with self.lock:
+            self.subscribers.add(sid)
+            return {"version": self.version, "rooms": list(self.rooms.values())}
+    
+    def unsubscribe(self, sid):
+        """Remove a subscriber"""
+        with self.lock:
+            self.subscribers.discard(sid)
+
+
+# Lobby feed of the application, created by create_app
+lobby_feed = None
\ No newline at end of file
@@ -1,12 +1,58 @@
 """
 Routes Module: Define all HTTP routes
 """
+import hmac
 import uuid
-from flask import render_template, request, jsonify
+import json
+import hashlib
+from flask import render_template, request, jsonify, Response, stream_with_context
 
-from models import game_rooms, ai_player_manager, game_record_manager
+from models import game_rooms, hibernated_rooms, room_index, matchmaker, get_room, ai_player_manager
+from models import game_record_manager, provisioner
 from models.game_room import GameRoom
 from app import socketio
+from utils.metrics import metrics
+from utils.json_backend import json_backend
+from utils.admission import admission
+from config import GAME_RECORDS_DEFAULT_LIMIT, GAME_RECORDS_MAX_LIMIT, ANALYTICS_COLUMNS_PATH
+from config import ADMIN_TOKEN, PROFILE_DEFAULT_INTERVAL, PROFILE_MAX_SECONDS
+from config import ROOMS_DEFAULT_LIMIT, ROOMS_MAX_LIMIT, PROVISION_MAX_ROOMS, MAX_PLAYERS_PER_ROOM
+
+def _get_float_arg(name):
+    """
+    Read an optional float query parameter
+    
+    Args:
+        name (str): Parameter name
+        
+    Returns:
+        float: Parameter value, None if not given
+        
+    Raises:
+        ValueError: If the value is not a number
+    """
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    return float(value)
+
+def _get_int_arg(name):
+    """
+    Read an optional integer query parameter
+    
+    Args:
+        name (str): Parameter name
+        
+    Returns:
+        int: Parameter value, None if not given
+        
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    return int(value)
 
 def register_routes(app):
     """
@@ -26,7 +72,7 @@ def register_routes(app):
     @app.route('/room/<room_id>')
     def room(room_id):
         """Room page route"""
-        if room_id not in game_rooms:
+        if get_room(room_id) is None:
             return "Room does not exist", 404
         return render_template('room.html', room_id=room_id)
     
@@ -36,24 +82,75 @@ def register_routes(app):
         data = request.get_json()
         room_name = data.get('room_name', f"Room {len(game_rooms) + 1}")
         
+        message = admission.admit_room(len(game_rooms))
+        if message is not None:
+            return jsonify({"success": False, "message": message}), 503
+        
         room_id = str(uuid.uuid4())
         game_rooms[room_id] = GameRoom(room_id, room_name)
         
         return jsonify({"success": True, "room_id": room_id})
     
+    @app.route('/api/quick-join', methods=['POST'])
+    def quick_join():
+        """
+        Quick join API: reserve a seat in a joinable room
+        
+        The player then joins the returned room passing the reservation
+        token with join_room, before the reservation expires.
+        """
+        result = matchmaker.quick_join()
+        return jsonify(result), 200 if result["success"] else 503
+    
     @app.route('/api/rooms')
     def get_rooms():
-        """Get all game rooms API"""
-        rooms_list = []
-        for room_id, room in game_rooms.items():
-            rooms_list.append({
-                "room_id": room.room_id,
-                "room_name": room.room_name,
-                "player_count": len(room.players),
-                "max_players": room.max_players,
-                "game_state": room.game_state
-            })
-        return jsonify(rooms_list)
+        """
+        Get all game rooms API
+        
+        Without query parameters all rooms are returned as a list. ``state``
+        (comma-separated game states), ``min_free_seats``, ``prefix`` (room
+        name), ``limit`` and ``cursor`` return one page in room ID order
+        instead. Rooms are read from the room index, and the ETag changes only
+        when a room does, so unchanged lists are answered with 304.
+        """
+        states = request.args.get('state') or None
+        if states is not None:
+            states = states.split(',')
+        name_prefix = request.args.get('prefix') or None
+        cursor = request.args.get('cursor') or None
+        try:
+            min_free_seats = _get_int_arg('min_free_seats')
+            limit = _get_int_arg('limit')
+        except ValueError:
+            return jsonify({"success": False, "message": "Invalid parameter"}), 400
+        
+        # Checked before anything is serialized
+        if request.if_none_match.contains(room_index.etag(room_index.generation)):
+            response = Response(status=304)
+            response.set_etag(room_index.etag(room_index.generation))
+            return response
+        
+        paged = (states is not None or min_free_seats is not None or name_prefix is not None or
+                 cursor is not None or limit is not None)
+        if limit is not None:
+            limit = max(1, min(limit, ROOMS_MAX_LIMIT))
+        
+        def build():
+            if paged:
+                page = room_index.query(states, min_free_seats, name_prefix, cursor, limit or ROOMS_DEFAULT_LIMIT)
+            else:
+                page = room_index.query()
+            generation = page.pop("generation")
+            body = json_backend.dumps(page if paged else page["rooms"], ensure_ascii=False)
+            return generation, body
+        
+        key = json.dumps([paged, states, min_free_seats, name_prefix, cursor, limit])
+        generation, body = room_index.cached_response(key, build)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(room_index.etag(generation))
+        # Revalidate every time, the list changes whenever a room does
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     @app.route('/api/add-ai-player', methods=['POST'])
     def add_ai_player():
@@ -64,14 +161,18 @@ def register_routes(app):
         room_id = data.get('room_id')
         difficulty = data.get('difficulty', 'medium')
         
-        if room_id not in game_rooms:
+        if get_room(room_id) is None:
             return jsonify({"success": False, "message": "Room does not exist"})
         
-        # Check if room is full
+        # Check if room is full, seats reserved by quick join count as taken
         game_room = game_rooms[room_id]
-        if len(game_room.players) >= game_room.max_players:
+        if not matchmaker.has_free_seat(game_room):
             return jsonify({"success": False, "message": "Room is full"})
         
+        message = admission.admit_ai_player(len(ai_player_manager.ai_players))
+        if message is not None:
+            return jsonify({"success": False, "message": message}), 503
+        
         # Generate AI player ID
         ai_id = f"ai_{uuid.uuid4().hex[:8]}"
         
@@ -95,6 +196,43 @@ def register_routes(app):
         else:
             return jsonify({"success": False, "message": "Failed to add AI player"})
 
+    @app.route('/api/provision', methods=['POST'])
+    def provision():
+        """
+        Bulk provisioning API: create rooms and seat AI players in one call
+        
+        JSON body: ``rooms`` (number of rooms to create), ``room_ids``
+        (existing rooms to fill), ``ai_players`` (difficulty of each AI player
+        seated in every one of those rooms) and ``room_name`` (name prefix of
+        the created rooms). Answers 202 with the room and AI player IDs as soon
+        as they exist; the AI players get ready in the background.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"success": False, "message": "Expected a JSON object"}), 400
+        room_count = data.get('rooms', 0)
+        room_ids = data.get('room_ids', [])
+        difficulties = data.get('ai_players', [])
+        room_name = data.get('room_name', "Room")
+        
+        if (not isinstance(room_count, int) or isinstance(room_count, bool) or room_count < 0 or
+                not isinstance(room_ids, list) or not all(isinstance(room_id, str) for room_id in room_ids) or
+                not isinstance(difficulties, list) or not isinstance(room_name, str)):
+            return jsonify({"success": False, "message": "Invalid parameter"}), 400
+        if room_count + len(room_ids) > PROVISION_MAX_ROOMS or len(difficulties) > MAX_PLAYERS_PER_ROOM:
+            return jsonify({"success": False, "message": f"At most {PROVISION_MAX_ROOMS} rooms and "
+                                                         f"{MAX_PLAYERS_PER_ROOM} AI players per room"}), 400
+        if any(difficulty not in ai_player_manager.DIFFICULTY_LEVELS for difficulty in difficulties):
+            return jsonify({"success": False, "message": "Unknown AI difficulty"}), 400
+        if not room_count and not (room_ids and difficulties):
+            return jsonify({"success": False, "message": "Nothing to provision"}), 400
+        
+        result = provisioner.provision(room_count, difficulties, room_ids, room_name)
+        if not result["success"]:
+            status = {"not_found": 404, "full": 409, "refused": 503}[result.pop("reason")]
+            return jsonify(result), status
+        return jsonify(result), 202
+    
     @app.route('/api/remove-ai-player', methods=['POST'])
     def remove_ai_player():
         """Remove AI player from room"""
@@ -104,7 +242,7 @@ def register_routes(app):
         room_id = data.get('room_id')
         player_id = data.get('player_id')
         
-        if room_id not in game_rooms:
+        if get_room(room_id) is None:
             return jsonify({"success": False, "message": "Room does not exist"})
         
         game_room = game_rooms[room_id]
@@ -127,9 +265,58 @@ def register_routes(app):
     
     @app.route('/api/game-records/<room_id>')
     def get_game_records(room_id):
-        """Get room game records API"""
-        records = game_record_manager.load_room_records(room_id)
-        return jsonify(records)
+        """
+        Get room game records API
+        
+        Without query parameters the full record list is returned. ``limit``,
+        ``before``, ``after`` (timestamps) and ``player`` return one page with
+        cursors instead, and ``stream=1`` writes the matching records as a JSON
+        array incrementally. Responses carry an ETag so unchanged pages can be
+        answered with 304.
+        """
+        try:
+            before = _get_float_arg('before')
+            after = _get_float_arg('after')
+            limit = request.args.get('limit', type=int)
+        except ValueError:
+            return jsonify({"success": False, "message": "Invalid cursor"}), 400
+        player_name = request.args.get('player') or None
+        stream = request.args.get('stream') in ('1', 'true')
+        
+        # Records are append-only, so version + query identify the response
+        version = game_record_manager.get_room_records_version(room_id)
+        etag_source = f"{room_id}|{version}|{request.query_string.decode('utf-8', 'replace')}"
+        etag = hashlib.sha1(etag_source.encode('utf-8')).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        paged = limit is not None or before is not None or after is not None or player_name is not None
+        if limit is not None:
+            limit = max(1, min(limit, GAME_RECORDS_MAX_LIMIT))
+        
+        if stream:
+            def generate():
+                yield '['
+                written = 0
+                for record in game_record_manager.iter_room_records(room_id, before, after, player_name):
+                    if limit is not None and written >= limit:
+                        break
+                    yield (',' if written else '') + json_backend.dumps(record, ensure_ascii=False)
+                    written += 1
+                yield ']'
+            
+            response = Response(stream_with_context(generate()), mimetype='application/json')
+        elif paged:
+            page = game_record_manager.query_room_records(
+                room_id, limit or GAME_RECORDS_DEFAULT_LIMIT, before, after, player_name)
+            response = jsonify(page)
+        else:
+            response = jsonify(game_record_manager.load_room_records(room_id))
+        
+        response.set_etag(etag)
+        return response
 
     @app.route('/api/player-stats/<player_name>')
     def get_player_stats(player_name):
@@ -137,6 +324,96 @@ def register_routes(app):
         stats = game_record_manager.get_player_stats(player_name)
         return jsonify(stats)
     
+    @app.route('/api/analytics')
+    def get_analytics():
+        """
+        Get game record analytics API
+        
+        Optional ``room_id`` restricts the statistics to one room and
+        ``points`` sets how many points each bankroll trajectory keeps.
+        """
+        from models import record_analytics
+        
+        try:
+            columns, strings = record_analytics.load_columns(
+                game_record_manager.data_dir, ANALYTICS_COLUMNS_PATH)
+        except ImportError as e:
+            return jsonify({"success": False, "message": str(e)}), 501
+        
+        room_id = request.args.get('room_id')
+        if room_id:
+            columns = record_analytics.filter_room(columns, strings, room_id)
+        points = max(1, min(request.args.get('points', 50, type=int), 1000))
+        
+        return jsonify(record_analytics.summarize(columns, strings, points))
+    
+    def collect_room_states():
+        """Count rooms by game state"""
+        counts = {}
+        for room in list(game_rooms.values()):
+            counts[(room.game_state,)] = counts.get((room.game_state,), 0) + 1
+        return counts
+    
+    def collect_players():
+        """Count human players by connection status"""
+        counts = {("connected",): 0, ("disconnected",): 0}
+        for room in list(game_rooms.values()):
+            for player in list(room.players.values()):
+                if not player.is_ai:
+                    status = "disconnected" if player.is_disconnected else "connected"
+                    counts[(status,)] += 1
+        return counts
+    
+    def collect_ai_players():
+        """Count seated AI players by difficulty"""
+        counts = {}
+        for room in list(game_rooms.values()):
+            for player in list(room.players.values()):
+                if player.is_ai:
+                    key = (player.ai_difficulty,)
+                    counts[key] = counts.get(key, 0) + 1
+        return counts
+    
+    metrics.gauge("blackjack_rooms", "Active rooms by game state", ("game_state",), collect_room_states)
+    metrics.gauge("blackjack_players", "Human players in rooms by connection status", ("status",), collect_players)
+    metrics.gauge("blackjack_ai_players", "AI players in rooms by difficulty", ("difficulty",), collect_ai_players)
+    metrics.gauge("blackjack_hibernated_rooms", "Rooms hibernated to disk",
+                  callback=lambda: {(): len(hibernated_rooms)})
+    
+    @app.route('/metrics')
+    def get_metrics():
+        """Metrics in the Prometheus text exposition format"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    @app.route('/admin/profile')
+    def get_profile():
+        """
+        Sample the running server and return a profile
+        
+        Requires ADMIN_TOKEN in the ``X-Admin-Token`` header or ``token``
+        parameter. ``seconds`` sets the duration, ``interval`` the seconds
+        between samples and ``format`` is ``flat`` (JSON, default) or
+        ``collapsed`` (text for flame graph tools).
+        """
+        from utils import profiler
+        
+        token = request.headers.get('X-Admin-Token') or request.args.get('token')
+        if not ADMIN_TOKEN or not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+            return jsonify({"success": False, "message": "Not found"}), 404
+        
+        seconds = request.args.get('seconds', 5, type=float)
+        seconds = max(0.1, min(seconds, PROFILE_MAX_SECONDS))
+        interval = request.args.get('interval', PROFILE_DEFAULT_INTERVAL, type=float)
+        interval = max(0.001, min(interval, 1.0))
+        
+        sampler = profiler.profile(seconds, interval)
+        if sampler is None:
+            return jsonify({"success": False, "message": "Another profile is running"}), 409
+        
+        if request.args.get('format') == 'collapsed':
+            return Response(sampler.collapsed_report(), mimetype='text/plain')
+        return jsonify(sampler.flat_report(request.args.get('limit', 50, type=int)))
+    
     @app.errorhandler(404)
     def page_not_found(e):
         """Handle 404 error"""
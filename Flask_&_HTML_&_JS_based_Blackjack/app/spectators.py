@@ -0,0 +1,141 @@
+"""
+Spectator Feed: Stream tables to watchers at a bounded rate
+
+Spectators join the "<room_id>:spectators" Socket.IO room with
+spectate_room. They are not players: the GameRoom never sees them, so they
+take no seat and play no part in getting ready, betting or the AI timer.
+
+Once per SPECTATOR_UPDATE_INTERVAL, each watched table whose state changed
+since its last update is sent to its spectators as one game_update
+broadcast. The packet is encoded once for all of them however many there
+are, and spectators get at most one update per interval however often the
+table changes.
+"""
+import logging
+import threading
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SPECTATORS_SUFFIX = ":spectators"
+
+
+def spectator_room(room_id):
+    """Get the Socket.IO room of a table's spectators"""
+    return f"{room_id}{SPECTATORS_SUFFIX}"
+
+
+class SpectatorFeed:
+    """Throttled game updates for spectators"""
+    
+    def __init__(self, socketio, game_rooms, hibernated_rooms):
+        """
+        Initialize spectator feed
+        
+        Args:
+            socketio (SocketIO): SocketIO instance
+            game_rooms (RoomRegistry): Live rooms
+            hibernated_rooms (dict): Lobby stubs of hibernated rooms
+        """
+        self.socketio = socketio
+        self.game_rooms = game_rooms
+        self.hibernated_rooms = hibernated_rooms
+        self.lock = threading.Lock()
+        self.spectators = {}  # room_id -> socket IDs
+        self.watching = {}  # socket ID -> room_id
+        self.last_sent = {}  # room_id -> last state sent
+        metrics.gauge("blackjack_spectators", "Socket.IO clients watching a table",
+                      callback=lambda: {(): len(self.watching)})
+    
+    def table_state(self, game_room):
+        """
+        Get the state of a table as spectators see it
+        
+        Args:
+            game_room (GameRoom): Watched room
+        
+        Returns:
+            dict: game_update payload, dealer's hidden card hidden
+        """
+        state = game_room.to_dict()
+        # The player order list is the room's own, copy it so the state can be compared later
+        state["player_order"] = list(state["player_order"])
+        return state
+    
+    def add(self, sid, room_id, state):
+        """
+        Add a spectator, who stops watching any other table
+        
+        Args:
+            sid (str): Socket ID, already joined to the spectator room
+            room_id (str): Watched room
+            state (dict): State sent to the spectator when joining
+        
+        Returns:
+            str: Room the spectator watched before, None if none
+        """
+        with self.lock:
+            previous = self._remove(sid)
+            self.watching[sid] = room_id
+            self.spectators.setdefault(room_id, set()).add(sid)
+            self.last_sent.setdefault(room_id, state)
+            return previous
+    
+    def remove(self, sid):
+        """
+        Remove a spectator
+        
+        Args:
+            sid (str): Socket ID
+        
+        Returns:
+            str: Room the spectator watched, None if none
+        """
+        with self.lock:
+            return self._remove(sid)
+    
+    def _remove(self, sid):
+        room_id = self.watching.pop(sid, None)
+        if room_id is not None:
+            sids = self.spectators.get(room_id)
+            sids.discard(sid)
+            if not sids:
+                del self.spectators[room_id]
+                self.last_sent.pop(room_id, None)
+        return room_id
+    
+    def tick(self):
+        """Send the watched tables that changed since their last update"""
+        with self.lock:
+            room_ids = list(self.spectators)
+        
+        for room_id in room_ids:
+            game_room = self.game_rooms.get(room_id)
+            if game_room is None:
+                # Hibernated tables stay frozen until revived
+                if room_id not in self.hibernated_rooms:
+                    self.close(room_id)
+                continue
+            
+            state = self.table_state(game_room)
+            with self.lock:
+                if room_id not in self.spectators or self.last_sent.get(room_id) == state:
+                    continue
+                self.last_sent[room_id] = state
+            self.socketio.emit('game_update', state, to=spectator_room(room_id))
+    
+    def close(self, room_id):
+        """Tell the spectators of a deleted table and drop them"""
+        with self.lock:
+            sids = self.spectators.pop(room_id, set())
+            self.last_sent.pop(room_id, None)
+            for sid in sids:
+                self.watching.pop(sid, None)
+        self.socketio.emit('room_closed', {"room_id": room_id}, to=spectator_room(room_id))
+        self.socketio.close_room(spectator_room(room_id))
+        logger.info("Closed spectator room of deleted room %s (%s spectators)", room_id, len(sids))
+
+
+# Spectator feed of the application, created by create_app
+spectator_feed = None
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Benchmarks: Reproducible, headless benchmark suites
+"""
@@ -0,0 +1,208 @@
+"""
+Engine Benchmarks: Hot paths of the game engine
+
+Runs headless without network or a running server. Game rooms run inside a
+Flask test request context and every record written goes to a temporary
+directory that is removed afterwards.
+
+    python -m benchmarks.engine --output results.json
+    python -m benchmarks.engine --baseline results.json   # exit status 1 on regression
+"""
+import os
+import sys
+import shutil
+import atexit
+import tempfile
+from flask import Flask
+
+from models.card import Card
+from models.player import Player
+from models.game_room import GameRoom
+from models.game_record import GameRecord
+from benchmarks.runner import Benchmark, main
+
+# Request context for GameRoom methods that read the session cookie
+_app = Flask(__name__)
+
+# Records written by the benchmarks
+_work_dir = tempfile.mkdtemp(prefix="blackjack_bench_")
+atexit.register(shutil.rmtree, _work_dir, ignore_errors=True)
+
+# Record manager of the benchmark rooms, the application's own is left alone
+_record_manager = GameRecord(os.path.join(_work_dir, "live"))
+
+HANDS = {
+    "2 cards": [Card("Hearts", "K"), Card("Spades", "7")],
+    "3 cards, ace": [Card("Hearts", "A"), Card("Clubs", "6"), Card("Spades", "9")],
+    "5 cards, 2 aces": [Card("Hearts", "A"), Card("Clubs", "A"), Card("Spades", "2"),
+                        Card("Diamonds", "3"), Card("Hearts", "4")],
+}
+
+
+def make_room(player_count, room_id="bench-room"):
+    """
+    Create a room with human players
+    
+    Args:
+        player_count (int): Number of players
+        room_id (str, optional): Room ID
+    
+    Returns:
+        GameRoom: Room in waiting state, writing its records to the work directory
+    """
+    room = GameRoom(room_id, "Benchmark Room")
+    room.record_manager = _record_manager
+    for i in range(player_count):
+        room.add_player(Player(f"player-{i}", f"Player {i}"))
+    return room
+
+
+def play_round(room, bet=10):
+    """
+    Play one round: betting, every player stands, dealer turn and settlement
+    
+    Args:
+        room (GameRoom): Room with players
+        bet (int, optional): Bet of every player
+    
+    Returns:
+        GameRoom: Room in game_over state
+    """
+    for player in room.players.values():
+        player.money = 1000
+        player.state = "ready"
+    room.start_betting()
+    for player_id in list(room.player_order):
+        room.place_bet(player_id, bet)
+    for _ in range(len(room.player_order)):
+        if room.game_state != "playing":
+            break
+        room.player_stand(room.player_order[room.current_player_index])
+    if room.game_state != "game_over":
+        raise RuntimeError(f"Round did not finish, game state: {room.game_state}")
+    return room
+
+
+def make_records(template, count, room_id, start_time=1700000000.0):
+    """
+    Create synthetic records from a real one
+    
+    Args:
+        template (dict): Record written by add_game_record
+        count (int): Number of records
+        room_id (str): Room ID of the records
+        start_time (float, optional): Timestamp of the first record
+    
+    Returns:
+        list: Records one minute apart, sharing the template's nested data
+    """
+    records = []
+    for i in range(count):
+        timestamp = start_time + i * 60
+        records.append(dict(template, id=f"{room_id}_{timestamp}", room_id=room_id, timestamp=timestamp))
+    return records
+
+
+def _record_template():
+    """Play a round with three players and return its record"""
+    play_round(make_room(3, "template"))
+    return _record_manager.load_room_records("template")[-1]
+
+
+def _build_records_dir(template, total, rooms=100):
+    """
+    Write a records directory with live files and archived segments
+    
+    Args:
+        template (dict): Record written by add_game_record
+        total (int): Total number of records
+        rooms (int, optional): Number of rooms, every other one archived
+    
+    Returns:
+        str: Records directory
+    """
+    data_dir = os.path.join(_work_dir, f"stats_{total}")
+    manager = GameRecord(data_dir)
+    for i in range(rooms):
+        room_id = f"room-{i}"
+        manager.save_room_records(room_id, make_records(template, total // rooms, room_id))
+        if i % 2:
+            manager.rotate_room_segment(room_id)
+    return data_dir
+
+
+def build_benchmarks(args):
+    """
+    Build the engine benchmarks
+    
+    Args:
+        args (argparse.Namespace): Runner arguments
+    
+    Returns:
+        list: Benchmarks
+    """
+    context = _app.test_request_context()
+    context.push()
+    
+    benchmarks = []
+    
+    scorer = GameRoom("score", "Score")
+    for label, hand in HANDS.items():
+        benchmarks.append(Benchmark(f"calculate_score[{label}]",
+                                    lambda state, hand=hand: scorer.calculate_score(hand)))
+    
+    deck_room = GameRoom("deck", "Deck")
+    benchmarks.append(Benchmark("initialize_deck", lambda state: deck_room.initialize_deck()))
+    
+    # Mid-round state: cards dealt, first player to act
+    for player_count in range(1, 6):
+        def setup(player_count=player_count):
+            room = make_room(player_count)
+            for player in room.players.values():
+                player.state = "ready"
+            room.start_betting()
+            for player_id in list(room.player_order):
+                room.place_bet(player_id, 10)
+            return room
+        benchmarks.append(Benchmark(f"to_dict[{player_count} players]",
+                                    lambda room: room.to_dict(), setup=setup))
+    
+    # Keep the live record list at one round so every round costs the same
+    def round_func(room):
+        _record_manager.room_records[room.room_id] = []
+        play_round(room)
+    for player_count in (1, 3, 5):
+        benchmarks.append(Benchmark(f"full_round[{player_count} players]", round_func,
+                                    setup=lambda player_count=player_count: make_room(player_count)))
+    
+    template = _record_template()
+    sizes = (10, 1000) if args.quick else (10, 1000, 100000)
+    
+    # One write on top of a live segment of the given size, rotation included
+    for size in sizes:
+        records = make_records(template, size, "bench-room")
+        def setup(records=records, size=size):
+            manager = GameRecord(tempfile.mkdtemp(prefix=f"add_{size}_", dir=_work_dir))
+            manager.save_room_records("bench-room", list(records))
+            return manager, play_round(make_room(3))
+        benchmarks.append(Benchmark(f"add_game_record[{size} existing]",
+                                    lambda state: state[0].add_game_record("bench-room", state[1]),
+                                    setup=setup, number=1, repeat=3 if size >= 100000 else 5))
+    
+    for total in (10000,) if args.quick else (10000, 100000):
+        data_dir = _build_records_dir(template, total)
+        benchmarks.append(Benchmark(f"get_player_stats[{total} records, cold]",
+                                    lambda manager: manager.get_player_stats("Player 1"),
+                                    setup=lambda data_dir=data_dir: GameRecord(data_dir),
+                                    number=1, repeat=3))
+        warm = GameRecord(data_dir)
+        warm.get_player_stats("Player 1")
+        benchmarks.append(Benchmark(f"get_player_stats[{total} records, warm]",
+                                    lambda state, warm=warm: warm.get_player_stats("Player 1"),
+                                    number=1, repeat=3))
+    
+    return benchmarks
+
+
+if __name__ == "__main__":
+    sys.exit(main("engine", build_benchmarks, "Benchmark the game engine hot paths"))
\ No newline at end of file
@@ -0,0 +1,464 @@
+"""
+Load Test: Drive many concurrent tables through Socket.IO
+
+Starts the server in a subprocess (or targets --url), creates rooms through
+the HTTP API, optionally seats AI players, and attaches scripted human
+clients that get ready, bet, hit and stand with random think times. Every
+action carries a trace id; its round trip ends when the first update echoing
+the trace id arrives back at the client.
+
+    python -m benchmarks.load --rooms 20 --clients 3 --ai 1 --duration 60 --output load.json
+
+Requires python-socketio's client (pip install "python-socketio[client]").
+Server CPU and memory come from psutil when installed, /proc otherwise.
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+
+import socketio
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import psutil
+except ImportError:  # /proc is read instead
+    psutil = None
+
+
+def serve(port):
+    """
+    Run the game server without ngrok (subprocess entry point)
+    
+    Args:
+        port (int): Port to listen on
+    """
+    import config
+    config.USE_NGROK = False
+    
+    from app import create_app, socketio as server_socketio
+    app = create_app()
+    server_socketio.run(app, host="127.0.0.1", port=port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def start_server(port):
+    """
+    Start the server in a subprocess with its own working directory
+    
+    Args:
+        port (int): Port to listen on
+    
+    Returns:
+        subprocess.Popen: Server process
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.load", "--serve", str(port)],
+        cwd=tempfile.mkdtemp(prefix="blackjack_load_"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _free_port():
+    """Get a free local port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http(url, payload=None, timeout=10):
+    """
+    Call the HTTP API
+    
+    Args:
+        url (str): Endpoint URL
+        payload (dict, optional): JSON body, sends a POST when given
+        timeout (float, optional): Timeout in seconds
+    
+    Returns:
+        dict: Decoded JSON response
+    """
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def wait_for_server(url, timeout=30):
+    """Wait until the server answers /api/rooms"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _http(f"{url}/api/rooms", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout} seconds")
+
+
+class ProcessSampler:
+    """Periodically sample CPU and memory of a process"""
+    
+    def __init__(self, pid, interval=1.0):
+        """
+        Initialize sampler
+        
+        Args:
+            pid (int): Process ID
+            interval (float, optional): Seconds between samples
+        """
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (wall time, CPU seconds, RSS bytes)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+    
+    def _read(self):
+        """Read cumulative CPU seconds and RSS bytes of the process"""
+        if psutil is not None:
+            process = psutil.Process(self.pid)
+            cpu = process.cpu_times()
+            return cpu.user + cpu.system, process.memory_info().rss
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        return cpu_seconds, rss
+    
+    def _run(self):
+        """Sampling loop"""
+        while not self._stop_event.is_set():
+            try:
+                cpu_seconds, rss = self._read()
+            except (OSError, IndexError, ValueError):
+                return
+            self.samples.append((time.time(), cpu_seconds, rss))
+            self._stop_event.wait(self.interval)
+    
+    def start(self):
+        """Start sampling"""
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+        self._thread.join()
+    
+    def summary(self):
+        """
+        Summarize the samples
+        
+        Returns:
+            dict: Average CPU percent of one core and peak/final RSS in MB
+        """
+        if len(self.samples) < 2:
+            return {}
+        (start_time, start_cpu, _), (end_time, end_cpu, end_rss) = self.samples[0], self.samples[-1]
+        return {
+            "cpu_percent": round(100.0 * (end_cpu - start_cpu) / (end_time - start_time), 1),
+            "rss_peak_mb": round(max(rss for _, _, rss in self.samples) / 2 ** 20, 1),
+            "rss_final_mb": round(end_rss / 2 ** 20, 1)
+        }
+
+
+class ActionScheduler:
+    """Single thread running delayed client actions"""
+    
+    def __init__(self):
+        """Initialize an empty schedule"""
+        self._queue = []  # (due time, sequence, callable)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="action-scheduler", daemon=True)
+        self._thread.start()
+    
+    def call_later(self, delay, func):
+        """Run func after delay seconds"""
+        with self._condition:
+            self._sequence += 1
+            heapq.heappush(self._queue, (time.time() + delay, self._sequence, func))
+            self._condition.notify()
+    
+    def _run(self):
+        """Scheduling loop"""
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._queue or self._queue[0][0] > time.time()):
+                    timeout = self._queue[0][0] - time.time() if self._queue else None
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, func = heapq.heappop(self._queue)
+            try:
+                func()
+            except Exception:
+                pass  # Disconnected clients drop their actions
+    
+    def stop(self):
+        """Stop running actions"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+
+class SimulatedPlayer:
+    """Scripted human client"""
+    
+    def __init__(self, index, url, room_id, scheduler, think_time, leader, stats):
+        """
+        Initialize client
+        
+        Args:
+            index (int): Client number
+            url (str): Server URL
+            room_id (str): Room to join
+            scheduler (ActionScheduler): Runs delayed actions
+            think_time (float): Mean think time in seconds
+            leader (bool): Whether this client starts the next round of its room
+            stats (LoadStats): Shared results
+        """
+        self.index = index
+        self.url = url
+        self.room_id = room_id
+        self.scheduler = scheduler
+        self.think_time = think_time
+        self.leader = leader
+        self.stats = stats
+        self.client = socketio.Client(reconnection=False)
+        self.sid = None
+        self.room = None
+        self.last_key = None
+        self.sequence = 0
+        self.in_flight = {}  # trace id -> (event, send time)
+        self.lock = threading.Lock()
+        
+        self.client.on("room_data", self.on_update)
+        self.client.on("game_update", self.on_update)
+        self.client.on("player_status_update", self.on_status_update)
+        self.client.on("error", lambda data: self.stats.count("server_errors"))
+    
+    def connect(self):
+        """Connect and join the room"""
+        self.client.connect(self.url, transports=["websocket"])
+        self.sid = self.client.get_sid()
+        self.send("join_room", {"player_name": f"Load {self.index}"})
+    
+    def disconnect(self):
+        """Disconnect from the server"""
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+    
+    def send(self, event, data=None):
+        """Emit a traced event"""
+        with self.lock:
+            self.sequence += 1
+            trace_id = f"load-{self.index}-{self.sequence}"
+            self.in_flight[trace_id] = (event, time.perf_counter())
+        payload = dict(data or {}, room_id=self.room_id, trace_id=trace_id)
+        self.client.emit(event, payload)
+        self.stats.count("events_sent")
+    
+    def _complete_trace(self, data):
+        """Record the round trip of an action echoed by an update"""
+        trace_id = data.get("trace_id")
+        with self.lock:
+            sent = self.in_flight.pop(trace_id, None)
+        if sent is not None:
+            event, send_time = sent
+            self.stats.add_round_trip(event, time.perf_counter() - send_time)
+    
+    def on_update(self, data):
+        """Handle room_data / game_update"""
+        self._complete_trace(data)
+        self.room = data
+        self.decide()
+    
+    def on_status_update(self, data):
+        """Handle player_status_update"""
+        self._complete_trace(data)
+        if self.room and data.get("player_id") in self.room.get("players", {}):
+            self.room["players"][data["player_id"]]["state"] = data.get("player_state")
+            self.decide()
+    
+    def decide(self):
+        """Schedule the next action for the latest room state"""
+        room = self.room
+        me = room.get("players", {}).get(self.sid)
+        if me is None:
+            return
+        game_state = room.get("game_state")
+        order = room.get("player_order", [])
+        index = room.get("current_player_index", 0)
+        my_turn = game_state == "playing" and index < len(order) and order[index] == self.sid
+        
+        # Act once per distinct situation
+        key = (game_state, me.get("state"), my_turn, len(me.get("hand", [])))
+        if key == self.last_key:
+            return
+        self.last_key = key
+        
+        if game_state == "game_over" and self.leader:
+            self.stats.count("rounds")
+            self.later("next_round")
+        elif game_state == "waiting" and me.get("state") == "waiting":
+            self.later("player_ready")
+        elif game_state == "betting" and me.get("state") == "betting":
+            money = me.get("money", 0)
+            if money <= 0:
+                return
+            self.later("place_bet", {"bet_amount": min(money, random.choice((10, 20, 50, 100)))})
+        elif my_turn and me.get("state") == "playing":
+            self.later("hit" if me.get("score", 0) < 16 else "stand")
+    
+    def later(self, event, data=None):
+        """Send an event after a random think time"""
+        delay = random.expovariate(1.0 / self.think_time) if self.think_time > 0 else 0
+        self.scheduler.call_later(delay, lambda: self.send(event, data))
+
+
+class LoadStats:
+    """Results shared by all clients"""
+    
+    def __init__(self):
+        """Initialize empty results"""
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.round_trips = {}  # event -> seconds
+    
+    def count(self, name, amount=1):
+        """Increase a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def add_round_trip(self, event, seconds):
+        """Record an action round trip"""
+        with self.lock:
+            self.round_trips.setdefault(event, []).append(seconds)
+    
+    def percentiles(self, values):
+        """Compute p50/p95/p99 in milliseconds"""
+        if not values:
+            return {"count": 0}
+        values = sorted(values)
+        def pick(p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 1)
+        return {"count": len(values), "p50_ms": pick(0.50), "p95_ms": pick(0.95),
+                "p99_ms": pick(0.99), "max_ms": round(values[-1] * 1000, 1)}
+
+
+def run(args):
+    """
+    Run a load test
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+    
+    Returns:
+        dict: Report
+    """
+    server = None
+    url = args.url
+    if not url:
+        port = _free_port()
+        server = start_server(port)
+        url = f"http://127.0.0.1:{port}"
+    server_pid = server.pid if server else args.server_pid
+    
+    stats = LoadStats()
+    scheduler = ActionScheduler()
+    players = []
+    sampler = None
+    try:
+        wait_for_server(url)
+        
+        room_ids = [_http(f"{url}/api/create-room", {"room_name": f"Load {i}"})["room_id"]
+                    for i in range(args.rooms)]
+        for room_id in room_ids:
+            for _ in range(args.ai):
+                _http(f"{url}/api/add-ai-player", {"room_id": room_id, "difficulty": args.ai_difficulty})
+        
+        if server_pid:
+            sampler = ProcessSampler(server_pid)
+            sampler.start()
+        
+        start_time = time.time()
+        for room_id in room_ids:
+            for seat in range(args.clients):
+                player = SimulatedPlayer(len(players), url, room_id, scheduler,
+                                         args.think, seat == 0, stats)
+                try:
+                    player.connect()
+                    players.append(player)
+                except socketio.exceptions.ConnectionError:
+                    stats.count("connect_errors")
+        
+        time.sleep(max(0.0, args.duration - (time.time() - start_time)))
+        elapsed = time.time() - start_time
+    finally:
+        scheduler.stop()
+        if sampler is not None:
+            sampler.stop()
+        for player in players:
+            player.disconnect()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+    
+    all_round_trips = [value for values in stats.round_trips.values() for value in values]
+    return {
+        "url": url,
+        "rooms": args.rooms,
+        "clients_per_room": args.clients,
+        "ai_per_room": args.ai,
+        "think_time": args.think,
+        "duration": round(elapsed, 1),
+        "connected_clients": len(players),
+        "counters": stats.counters,
+        "rounds_per_second": round(stats.counters.get("rounds", 0) / elapsed, 3),
+        "unanswered_events": sum(len(player.in_flight) for player in players),
+        "round_trip": stats.percentiles(all_round_trips),
+        "round_trip_by_event": {event: stats.percentiles(values)
+                                for event, values in sorted(stats.round_trips.items())},
+        "server": sampler.summary() if sampler is not None else {}
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated tables through Socket.IO")
+    parser.add_argument("--rooms", type=int, default=10, help="Number of rooms")
+    parser.add_argument("--clients", type=int, default=2, help="Scripted human clients per room")
+    parser.add_argument("--ai", type=int, default=0, help="AI seats per room")
+    parser.add_argument("--ai-difficulty", default="medium", help="AI difficulty")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean think time in seconds (exponential)")
+    parser.add_argument("--duration", type=float, default=60, help="Test duration in seconds")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server for CPU/memory sampling")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--seed", type=int, help="Random seed")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.serve)
+        sys.exit(0)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Benchmark Runner: Timing, JSON output and baseline comparison shared by the
+benchmark suites
+"""
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+
+
+class Benchmark:
+    """One named benchmark"""
+    
+    def __init__(self, name, func, setup=None, number=None, repeat=5, info=None):
+        """
+        Initialize benchmark
+        
+        Args:
+            name (str): Benchmark name
+            func (callable): Timed code, called with the value returned by setup
+            setup (callable, optional): Untimed preparation run before every repeat
+            number (int, optional): Calls per repeat, calibrated when None
+            repeat (int, optional): Number of repeats
+            info (dict, optional): Figures stored with the result, e.g. payload sizes
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.number = number
+        self.repeat = repeat
+        self.info = info
+
+
+def _time_calls(func, state, number):
+    """Time a number of calls with the garbage collector disabled"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start_time = time.perf_counter()
+        for _ in range(number):
+            func(state)
+        return time.perf_counter() - start_time
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _calibrate(func, setup, min_time):
+    """Find a call count whose run takes at least min_time"""
+    number = 1
+    while True:
+        state = setup() if setup else None
+        if _time_calls(func, state, number) >= min_time or number >= 1000000:
+            return number
+        number *= 10
+
+
+def run_benchmark(benchmark, min_time=0.1):
+    """
+    Run a benchmark
+    
+    Args:
+        benchmark (Benchmark): Benchmark to run
+        min_time (float, optional): Minimum duration of a calibrated repeat
+    
+    Returns:
+        dict: Per-call times in seconds (median, min, max, stdev) and run sizes
+    """
+    number = benchmark.number or _calibrate(benchmark.func, benchmark.setup, min_time)
+    times = []
+    for _ in range(benchmark.repeat):
+        state = benchmark.setup() if benchmark.setup else None
+        times.append(_time_calls(benchmark.func, state, number) / number)
+    result = {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "number": number,
+        "repeat": benchmark.repeat
+    }
+    if benchmark.info:
+        result["info"] = benchmark.info
+    return result
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline
+    
+    The fastest repeat is compared: it is the least disturbed by other
+    activity on the machine, so it is the most stable between runs.
+    
+    Args:
+        results (dict): Benchmark name -> result
+        baseline (dict): Benchmark name -> result of an earlier run
+        threshold (float): Relative slowdown counted as regression
+    
+    Returns:
+        list: (name, baseline time, time, ratio, regressed) for shared benchmarks
+    """
+    rows = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]["min"] > 0:
+            ratio = result["min"] / baseline[name]["min"]
+            rows.append((name, baseline[name]["min"], result["min"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_time(seconds):
+    """Format a duration with a readable unit"""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(suite_name, benchmarks, description=None):
+    """
+    Command line entry point of a suite
+    
+    Args:
+        suite_name (str): Suite name stored in the output
+        benchmarks (callable): Called with the parsed arguments, returns a list of Benchmark
+        description (str, optional): Help text
+    
+    Returns:
+        int: Exit status, 1 if a benchmark regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(description=description or f"Run the {suite_name} benchmarks")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown reported as regression (default 0.25)")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest sizes and use fewer repeats")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    results = {}
+    for benchmark in benchmarks(args):
+        if args.filter and args.filter not in benchmark.name:
+            continue
+        if args.quick:
+            benchmark.repeat = min(benchmark.repeat, 3)
+        result = run_benchmark(benchmark, min_time=0.02 if args.quick else 0.1)
+        results[benchmark.name] = result
+        info = "".join(f"  {key}={value}" for key, value in (benchmark.info or {}).items())
+        print(f"{benchmark.name:<45} {_format_time(result['median']):>12}  "
+              f"(min {_format_time(result['min'])}, {result['number']}x{result['repeat']}){info}")
+    
+    output = {
+        "suite": suite_name,
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        print(f"\nComparison with {args.baseline} (regression above +{args.threshold:.0%}):")
+        for name, base, current, ratio, regressed in compare(results, baseline, args.threshold):
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:<45} {_format_time(base):>12} -> {_format_time(current):>12}  {ratio:6.2f}x  {flag}")
+            if regressed:
+                status = 1
+    return status
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+Soak Test: Churn rooms, players and AI seats and check for retained memory
+
+Runs the app in process with Flask-SocketIO test clients. Each cycle creates
+a room, seats AI players, joins human clients, plays a round and closes the
+room again. Time is compressed: the handlers' socketio.sleep calls, the AI
+players' thinking pauses among them, return immediately, and the room reaper
+runs after every cycle as if the reconnection grace period and the lifetime
+of hibernated rooms had passed, so hours of play run in minutes.
+
+tracemalloc snapshots are taken after a warm-up and then periodically.
+Memory retained per closed room is the growth between the first and the last
+checkpoint divided by the rooms closed in between, so bounded caches that
+fill up early (recent traces, metric label sets) are not counted as leaks.
+The run fails if it exceeds the threshold, and the report lists the
+allocation sites that grew the most.
+
+    python -m benchmarks.soak --cycles 2000 --max-bytes-per-room 1024 --output soak.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+# Records and logs of the run go to a temporary working directory
+os.chdir(tempfile.mkdtemp(prefix="blackjack_soak_"))
+
+import config
+config.USE_NGROK = False
+
+import models
+from flask_socketio import SocketIOTestClient
+from app import create_app, socketio
+from utils.rate_limit import rate_limiter
+
+# Compressed time, the AI players' thinking pauses are socketio.sleep calls too
+socketio.sleep = lambda seconds=0: None
+
+
+def structure_sizes():
+    """
+    Get the sizes of the long-lived structures that must shrink with rooms
+    
+    Returns:
+        dict: Structure name -> number of entries
+    """
+    return {
+        "game_rooms": len(models.game_rooms),
+        "hibernated_rooms": len(models.hibernated_rooms),
+        "player_sessions": len(models.player_sessions),
+        "ai_players": len(models.ai_player_manager.ai_players),
+        "cached_room_records": len(models.game_record_manager.room_records),
+        "observer_room_states": len(models.game_observer.room_states) if models.game_observer else 0,
+        "rate_limit_buckets": len(rate_limiter.buckets)
+    }
+
+
+class SoakDriver:
+    """Plays room lifecycles through the HTTP API and Socket.IO test clients"""
+    
+    def __init__(self, app, close_mode):
+        """
+        Initialize driver
+        
+        Args:
+            app (Flask): Application under test
+            close_mode (str): How humans close rooms: "leave", "disconnect" or "mixed"
+        """
+        self.app = app
+        self.close_mode = close_mode
+        self.http = app.test_client()
+        self.cycles = 0
+    
+    def cycle(self):
+        """Create a room, play a round and close the room"""
+        room_id = self.http.post('/api/create-room', json={"room_name": "Soak"}).get_json()["room_id"]
+        for _ in range(random.randint(0, 2)):
+            self.http.post('/api/add-ai-player', json={
+                "room_id": room_id, "difficulty": random.choice(["easy", "medium", "hard", "expert"])})
+        
+        clients = []
+        for i in range(random.randint(1, 3)):
+            client = socketio.test_client(self.app, flask_test_client=self.app.test_client())
+            client.emit('join_room', {"room_id": room_id, "player_name": f"Soak {self.cycles}-{i}"})
+            clients.append(client)
+        
+        self.play_round(room_id, clients)
+        
+        mode = self.close_mode if self.close_mode != "mixed" else random.choice(["leave", "disconnect"])
+        for client in clients:
+            if mode == "leave":
+                client.emit('leave_room', {"room_id": room_id})
+            self.close_client(client)
+        reaper = models.room_reaper
+        reaper.reap(time.time() + max(reaper.reconnect_grace, reaper.snapshot_ttl) + 1)
+        self.cycles += 1
+    
+    def close_client(self, client):
+        """
+        Disconnect a test client and drop what the test harness keeps of it
+        
+        Test clients are registered in a class-level dict and their Engine.IO
+        environ is only removed by a transport-level disconnect, which test
+        clients never send. Without this both would show up as leaks.
+        """
+        client.disconnect()
+        SocketIOTestClient.clients.pop(client.eio_sid, None)
+        socketio.server.environ.pop(client.eio_sid, None)
+    
+    def play_round(self, room_id, clients):
+        """Get ready, bet and stand until the round is over"""
+        by_sid = {client.eio_sid: client for client in clients}
+        sids = {socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/'): client for client in clients}
+        
+        for client in clients:
+            client.emit('player_ready', {"room_id": room_id})
+        for client in clients:
+            client.emit('place_bet', {"room_id": room_id, "bet_amount": random.choice((10, 50, 100))})
+        
+        for _ in range(20):
+            game_room = models.game_rooms.get(room_id)
+            if game_room is None or game_room.game_state != "playing":
+                break
+            current = game_room.player_order[game_room.current_player_index]
+            client = sids.get(current)
+            if client is None:
+                break
+            client.emit('hit' if random.random() < 0.3 else 'stand', {"room_id": room_id})
+        
+        # Test clients queue every packet they receive
+        for client in by_sid.values():
+            client.get_received()
+
+
+def top_growth(snapshot, baseline, limit):
+    """
+    List the allocation sites that grew the most
+    
+    Args:
+        snapshot (tracemalloc.Snapshot): Current snapshot
+        baseline (tracemalloc.Snapshot): Snapshot after warm-up
+        limit (int): Number of sites
+    
+    Returns:
+        list: Sites with size and count differences
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+    stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+    return [{
+        "site": str(stat.traceback),
+        "size_diff": stat.size_diff,
+        "count_diff": stat.count_diff
+    } for stat in stats[:limit]]
+
+
+def run(args):
+    """
+    Run the soak test
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+    
+    Returns:
+        dict: Report, with "passed" False when retained memory per room exceeds the threshold
+    """
+    random.seed(args.seed)
+    app = create_app()
+    app.testing = True
+    logging.getLogger().setLevel(logging.WARNING)
+    driver = SoakDriver(app, args.close)
+    
+    for _ in range(args.warmup):
+        driver.cycle()
+    gc.collect()
+    tracemalloc.start(args.frames)
+    baseline = tracemalloc.take_snapshot()
+    baseline_size = tracemalloc.get_traced_memory()[0]
+    
+    checkpoints = []
+    start_time = time.time()
+    for cycle in range(1, args.cycles + 1):
+        driver.cycle()
+        if cycle % args.snapshot_every == 0 or cycle == args.cycles:
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0] - baseline_size
+            checkpoints.append({
+                "cycle": cycle,
+                "retained_bytes": retained,
+                "bytes_per_room": round(retained / cycle, 1),
+                "structures": structure_sizes()
+            })
+            print(f"cycle {cycle}: retained {retained} bytes {structure_sizes()}", file=sys.stderr)
+    
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    first, last = checkpoints[0], checkpoints[-1]
+    if last["cycle"] > first["cycle"]:
+        bytes_per_room = round((last["retained_bytes"] - first["retained_bytes"]) /
+                               (last["cycle"] - first["cycle"]), 1)
+    else:
+        bytes_per_room = last["bytes_per_room"]
+    return {
+        "cycles": args.cycles,
+        "warmup": args.warmup,
+        "close_mode": args.close,
+        "duration": round(time.time() - start_time, 1),
+        "max_bytes_per_room": args.max_bytes_per_room,
+        "bytes_per_room": bytes_per_room,
+        "passed": bytes_per_room <= args.max_bytes_per_room,
+        "checkpoints": checkpoints,
+        "top_growth": top_growth(snapshot, baseline, args.top)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn rooms and check retained memory per closed room")
+    parser.add_argument("--cycles", type=int, default=2000, help="Room lifecycles to run")
+    parser.add_argument("--warmup", type=int, default=100, help="Lifecycles before the baseline snapshot")
+    parser.add_argument("--snapshot-every", type=int, default=250,
+                        help="Lifecycles between checkpoints, the first one is the reference")
+    parser.add_argument("--close", choices=["leave", "disconnect", "mixed"], default="leave",
+                        help="How human clients close rooms")
+    parser.add_argument("--max-bytes-per-room", type=float, default=1024,
+                        help="Retained bytes per closed room above which the run fails")
+    parser.add_argument("--frames", type=int, default=10, help="Traceback depth of allocation sites")
+    parser.add_argument("--top", type=int, default=15, help="Growing allocation sites reported")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
\ No newline at end of file
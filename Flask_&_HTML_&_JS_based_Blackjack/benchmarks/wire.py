@@ -0,0 +1,110 @@
+"""
+Wire Format Benchmarks: game_update as JSON against packed MessagePack
+
+Times encoding one mid-round game_update in both wire formats and records
+the encoded sizes. JSON is measured as python-socketio sends it, the event
+packet ["game_update", payload] with compact separators; packed updates are
+sent as a binary attachment, so their size is the attachment plus the short
+JSON placeholder packet.
+
+The to_dict+encode benchmarks build and encode the update of a full table
+with each available JSON backend, as every JSON game_update emit does.
+
+    python -m benchmarks.wire --output wire.json
+"""
+import sys
+import json
+import uuid
+
+from config import MAX_PLAYERS_PER_ROOM
+from utils.packed_updates import pack_game_update, packing_available
+from utils.json_backend import load_backend, backend_name
+from benchmarks.engine import make_room, _app
+from benchmarks.runner import Benchmark, main
+
+# python-socketio's packet for an event with one binary argument, sent ahead of the attachment
+PLACEHOLDER_PACKET = '51-["game_update",{"_placeholder":true,"num":0}]'
+
+
+def make_room_mid_round(player_count):
+    """
+    Build a room in the middle of a round
+    
+    Args:
+        player_count (int): Number of players
+    
+    Returns:
+        GameRoom: Room in playing state, with socket IDs as player IDs
+    """
+    room = make_room(player_count, room_id=str(uuid.uuid4()))
+    for player in list(room.players.values()):
+        # Socket IDs as the server assigns them
+        room.players.pop(player.player_id)
+        player.player_id = uuid.uuid4().hex[:20]
+        room.players[player.player_id] = player
+        player.state = "ready"
+    room.player_order = list(room.players)
+    room.start_betting()
+    for player_id in list(room.player_order):
+        room.place_bet(player_id, 10)
+    return room
+
+
+def make_update(player_count):
+    """
+    Build a game_update payload of a room in the middle of a round
+    
+    Args:
+        player_count (int): Number of players
+    
+    Returns:
+        dict: Payload as emitted, with socket IDs and a trace id
+    """
+    room = make_room_mid_round(player_count)
+    return dict(room.to_dict(), trace_id=uuid.uuid4().hex[:16])
+
+
+def encode_json(state, backend=json):
+    """Encode an update as the JSON event packet"""
+    return backend.dumps(["game_update", state], separators=(",", ":"))
+
+
+def build_benchmarks(args):
+    """
+    Build the wire format benchmarks
+    
+    Args:
+        args (argparse.Namespace): Runner arguments
+    
+    Returns:
+        list: Benchmarks
+    """
+    if not packing_available():
+        raise SystemExit("msgpack is required for the wire format benchmarks")
+    
+    context = _app.test_request_context()
+    context.push()
+    
+    benchmarks = []
+    for player_count in (1, 3, 5):
+        state = make_update(player_count)
+        json_bytes = len(encode_json(state).encode("utf-8"))
+        packed_bytes = len(pack_game_update(state)) + len(PLACEHOLDER_PACKET)
+        benchmarks.append(Benchmark(f"encode_json[{player_count} players]",
+                                    lambda _, state=state: encode_json(state),
+                                    info={"bytes": json_bytes}))
+        benchmarks.append(Benchmark(f"encode_packed[{player_count} players]",
+                                    lambda _, state=state: pack_game_update(state),
+                                    info={"bytes": packed_bytes,
+                                          "saving": f"{1 - packed_bytes / json_bytes:.0%}"}))
+    
+    room = make_room_mid_round(MAX_PLAYERS_PER_ROOM)
+    for backend in {backend_name(backend): backend for backend in (load_backend("json"), load_backend())}.values():
+        benchmarks.append(Benchmark(f"to_dict+encode[full table, {backend_name(backend)}]",
+                                    lambda _, backend=backend: encode_json(room.to_dict(), backend),
+                                    info={"bytes": len(encode_json(room.to_dict(), backend).encode("utf-8"))}))
+    return benchmarks
+
+
+if __name__ == "__main__":
+    sys.exit(main("wire", build_benchmarks, "Benchmark the game_update wire formats"))
\ No newline at end of file
@@ -15,4 +15,84 @@ NGROK_AUTH_TOKEN = "2wMtLtJ7pnsTamBplMoATDyUOPA_6W4Qhim6RBMow9hyZGLSr"
 PORT = 5001  # Use port 5001 to avoid conflict with AirPlay
 
 # Game configuration
-MAX_PLAYERS_PER_ROOM = 5
\ No newline at end of file
+MAX_PLAYERS_PER_ROOM = 5
+STATE_HISTORY_SIZE = 8  # Recent room states kept to send reconnecting players only what changed
+
+# JSON configuration
+JSON_BACKEND = "auto"  # "auto" (orjson when installed), "orjson" or "json"
+
+# Logging configuration
+LOG_LEVEL = "INFO"  # Per-action game and AI messages are logged at DEBUG
+LOG_LEVELS = {  # Per-module overrides, e.g. "models.ai_player": "DEBUG"
+    "werkzeug": "WARNING"
+}
+LOG_FORMAT = "json"  # "json" or "text"
+LOG_FILE = None  # Log file path, None writes to stderr
+
+# Profiler configuration
+ADMIN_TOKEN = None  # Token required by /admin/* endpoints, None disables them
+PROFILE_DEFAULT_INTERVAL = 0.005  # Seconds between stack samples
+PROFILE_MAX_SECONDS = 60  # Longest profile the endpoint accepts
+PROFILE_SIGNAL_SECONDS = 10  # Profile length started by SIGUSR2
+PROFILE_OUTPUT_DIR = "profiles"  # Collapsed-stack files written for SIGUSR2
+
+# Slow-event log configuration
+SLOW_EVENT_THRESHOLD = 2.0  # Socket.IO handlers slower than this (seconds) are logged
+SLOW_EVENT_LOG_FILE = "logs/slow_events.log"
+TRACE_HISTORY_SIZE = 1024  # Recent trace ids kept to match client render reports
+
+# Socket.IO event rate limiting: event -> (tokens per second, burst) per connection, "default" for other events
+EVENT_RATE_LIMITS = {
+    "default": (10, 20),
+    "player_ready": (2, 4),
+    "place_bet": (2, 4),
+    "hit": (2, 4),
+    "stand": (2, 4),
+    "double_down": (2, 4),
+    "next_round": (1, 2),
+    "game_update": (1, 2),
+    "join_room": (1, 3),
+    "spectate_room": (1, 3),
+    "quick_join": (1, 3),
+    "client_render": (20, 40),
+}
+
+# Idle-room reaper configuration
+ROOM_RECONNECT_GRACE = 120  # Seconds a disconnected player keeps their seat
+RESUME_TOKEN_TTL = 24 * 60 * 60  # Seconds a resume token is accepted (the seat must still exist)
+ROOM_IDLE_TTL = 10 * 60  # Seconds a room without human players is kept after its last activity
+ROOM_REAP_INTERVAL = 30  # Seconds between reaper passes
+ROOM_HIBERNATE_AFTER = 60  # Seconds after its humans all disconnected before a room is hibernated, None disables
+ROOM_SNAPSHOT_DIR = "room_snapshots"  # Directory of hibernated room snapshots
+ROOM_SNAPSHOT_TTL = 7 * 24 * 60 * 60  # Seconds a hibernated room is kept before it is deleted
+
+# Admission control configuration, None disables a limit
+MAX_ROOMS = 1000  # Live rooms, creating more is refused
+MAX_CONNECTIONS = 2000  # Socket.IO connections, further connections are refused
+MAX_AI_PLAYERS = 500  # AI seats in all rooms together
+OVERLOAD_MAX_LAG = 0.25  # Load probe timer lag (seconds) above which new rooms, joins and AI seats are refused
+OVERLOAD_MAX_IN_FLIGHT = 200  # Socket.IO handlers running at once above which the same is refused
+LOAD_PROBE_INTERVAL = 0.5  # Seconds between timer lag measurements
+
+# Lobby configuration
+LOBBY_TICK_INTERVAL = 1.0  # Seconds between batched lobby room-list deltas
+SPECTATOR_UPDATE_INTERVAL = 0.25  # Shortest time between two updates of a watched table (seconds)
+ROOMS_DEFAULT_LIMIT = 50  # /api/rooms page size when only filters or a cursor are given
+ROOMS_MAX_LIMIT = 200  # Largest /api/rooms page a client may request
+QUICK_JOIN_STATES = ["waiting", "game_over", "betting"]  # Room states quick join seats players in, most preferred first
+QUICK_JOIN_RESERVATION_TTL = 30  # Seconds a quick-join seat is held until its player joins
+PROVISION_MAX_ROOMS = 50  # Rooms one bulk provisioning call may create or fill
+
+# Game record API configuration
+GAME_RECORDS_DEFAULT_LIMIT = 50  # Page size when only filters are given
+GAME_RECORDS_MAX_LIMIT = 500  # Largest page a client may request
+
+# Game record storage configuration
+RECORD_SEGMENT_MAX_BYTES = 1024 * 1024  # Rotate a room's active record file above this size
+RECORD_SEGMENT_MAX_AGE = 24 * 60 * 60  # Rotate a room's active record file after this many seconds
+RECORD_ARCHIVE_MAX_BYTES = 512 * 1024 * 1024  # Delete the oldest archived segments above this total
+RECORD_COMPRESSION = "gzip"  # Codec for archived segments: gzip, bz2 or lzma
+RECORD_ROTATION_CHECK_INTERVAL = 10 * 60  # Seconds between checks for stale segments
+
+# Analytics configuration
+ANALYTICS_COLUMNS_PATH = None  # Columnar record export to analyze instead of the JSON records
\ No newline at end of file
@@ -1,17 +1,168 @@
 """
 Models Module: Contains game data models
 """
+import time
+import logging
+import threading
+
 from models.card import Card
 from models.player import Player
 from models.game_room import GameRoom
 from models.game_record import game_record_manager
 from models.ai_player import ai_player_manager
 from models.game_observer import GameObserver
+from models.room_reaper import room_reaper
+from models.room_store import room_store, make_stub
+from models.room_registry import RoomRegistry
+from models.room_index import RoomIndex
+from models.matchmaker import Matchmaker
+from models.provisioner import Provisioner
+from utils.metrics import ROOMS_HIBERNATED, ROOMS_REVIVED
+
+logger = logging.getLogger(__name__)
+
+# Store all game rooms, listeners are told about rooms that changed
+game_rooms = RoomRegistry()
+GameRoom.registry = game_rooms
+GameRoom.record_manager = game_record_manager
+
+# Lobby stubs of rooms hibernated to disk, room_id -> stub
+hibernated_rooms = {}
+
+# Lobby summaries of live and hibernated rooms, indexed for /api/rooms
+room_index = RoomIndex(game_rooms, hibernated_rooms)
 
-# Store all game rooms
-game_rooms = {}
+# Quick-join seat finder
+matchmaker = Matchmaker(game_rooms, room_index)
+
+# Bulk room creation and AI seating
+provisioner = Provisioner(game_rooms, matchmaker, ai_player_manager)
+
+# Serializes hibernation and revival, so a room is never both live and on disk
+_hibernation_lock = threading.Lock()
 
 # Player session management, store sid to player_id mapping
 player_sessions = {}
 
-game_observer = None
\ No newline at end of file
+game_observer = None
+
+
+def drop_player_sessions(player_ids):
+    """
+    Forget the session mappings of players
+    
+    Args:
+        player_ids (iterable): Player IDs (socket IDs)
+    """
+    player_ids = set(player_ids)
+    for session_id, player_id in list(player_sessions.items()):
+        if player_id in player_ids:
+            player_sessions.pop(session_id, None)
+
+
+def release_room(room_id):
+    """
+    Delete a room and everything kept for it outside the room object:
+    AI player entries, player sessions, observer state and cached records
+    
+    Args:
+        room_id (str): Room ID
+        
+    Returns:
+        GameRoom: The deleted room, None if it did not exist
+    """
+    game_room = game_rooms.pop(room_id, None)
+    if game_observer is not None:
+        game_observer.room_states.pop(room_id, None)
+    game_record_manager.release_room(room_id)
+    if game_room is None:
+        return None
+    
+    for player_id in game_room.players:
+        ai_player_manager.remove_ai_player(player_id)
+    drop_player_sessions(game_room.players)
+    game_room.session_states.clear()
+    return game_room
+
+
+def hibernate_room(room_id):
+    """
+    Write a room to a snapshot on disk and drop it from memory, leaving a
+    lobby stub
+    
+    Args:
+        room_id (str): Room ID
+        
+    Returns:
+        bool: Whether the room was hibernated
+    """
+    with _hibernation_lock:
+        game_room = game_rooms.get(room_id)
+        if game_room is None:
+            return False
+        snapshot = game_room.to_snapshot()
+        if not room_store.save(snapshot):
+            return False
+        # Stub first, so listeners never see the room missing from both
+        hibernated_rooms[room_id] = make_stub(snapshot, time.time())
+        release_room(room_id)
+    ROOMS_HIBERNATED.inc()
+    logger.info("Hibernated room %s", room_id)
+    return True
+
+
+def revive_room(room_id):
+    """
+    Restore a hibernated room from its snapshot
+    
+    Human players come back disconnected, with a new reconnection grace
+    period, until they join the room again.
+    
+    Args:
+        room_id (str): Room ID
+        
+    Returns:
+        GameRoom: Revived room, None if the room is not hibernated
+    """
+    with _hibernation_lock:
+        if room_id in game_rooms:
+            return game_rooms[room_id]
+        if room_id not in hibernated_rooms:
+            return None
+        snapshot = room_store.load(room_id)
+        if snapshot is None:
+            hibernated_rooms.pop(room_id, None)
+            game_rooms.notify(room_id)
+            return None
+        
+        game_room = GameRoom.from_snapshot(snapshot)
+        now = time.time()
+        for player in game_room.players.values():
+            if player.is_ai:
+                ai_player_manager.ai_players[player.player_id] = player
+            else:
+                player.is_disconnected = True
+                player.disconnected_at = now
+        game_room.last_activity = now
+        game_rooms[room_id] = game_room
+        hibernated_rooms.pop(room_id, None)
+        room_store.delete(room_id)
+    ROOMS_REVIVED.inc()
+    logger.info("Revived room %s", room_id)
+    return game_room
+
+
+def get_room(room_id):
+    """
+    Get a room, reviving it if it is hibernated
+    
+    Args:
+        room_id (str): Room ID
+        
+    Returns:
+        GameRoom: The room, None if it does not exist
+    """
+    game_room = game_rooms.get(room_id)
+    if game_room is None and room_id in hibernated_rooms:
+        game_room = revive_room(room_id)
+    return game_room
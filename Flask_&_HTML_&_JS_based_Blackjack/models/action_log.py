@@ -0,0 +1,118 @@
+"""
+Action Log: Compact card-by-card event log of a round
+
+Every event takes two bytes. The first holds the action code in its high
+3 bits and the seat in its low 5 bits, the second holds the card code
+(see Card.code) or NO_CARD. Seats index the round's seat list, the dealer
+uses DEALER_SEAT. A typical round with a few players fits in a few dozen
+bytes, stored base64 encoded in the game record.
+"""
+import base64
+
+from models.card import Card
+
+# Action codes
+DEAL = 0  # Initial deal, card dealt to the seat
+HIT = 1  # Player hit, card drawn
+STAND = 2  # Player stood (also forced stands)
+DOUBLE = 3  # Player doubled down, card drawn
+DEALER_DRAW = 4  # Dealer drew a card
+DEALER_PEEK = 5  # Dealer peeked at the next card while trying for Five Dragon
+
+ACTION_NAMES = ["deal", "hit", "stand", "double", "dealer_draw", "dealer_peek"]
+
+DEALER_SEAT = 31
+NO_CARD = 255
+
+
+class ActionLog:
+    """Event log of the current round"""
+    
+    def __init__(self):
+        """Initialize an empty log"""
+        self.seats = []  # seat index -> player ID
+        self.data = bytearray()
+    
+    def reset(self, seats):
+        """
+        Start the log of a new round
+        
+        Args:
+            seats (list): Player IDs taking part, in seat order
+        """
+        self.seats = list(seats)
+        self.data = bytearray()
+    
+    def add(self, action, player_id=None, card=None):
+        """
+        Append an event
+        
+        Args:
+            action (int): Action code
+            player_id (str, optional): Acting player, None for the dealer
+            card (Card, optional): Card involved in the action
+        """
+        if player_id is None:
+            seat = DEALER_SEAT
+        elif player_id in self.seats:
+            seat = self.seats.index(player_id)
+        else:
+            return
+        self.data.append((action << 5) | seat)
+        self.data.append(card.code if card is not None else NO_CARD)
+    
+    def encode(self):
+        """
+        Encode the log for storage
+        
+        Returns:
+            str: Base64 encoded events
+        """
+        return base64.b64encode(bytes(self.data)).decode("ascii")
+
+
+def decode_action_log(encoded):
+    """
+    Decode a stored action log
+    
+    Args:
+        encoded (str): Base64 encoded events
+    
+    Returns:
+        list: (action code, seat, card code or None) tuples
+    """
+    data = base64.b64decode(encoded)
+    events = []
+    for i in range(0, len(data) - 1, 2):
+        card = data[i + 1]
+        events.append((data[i] >> 5, data[i] & 0x1F, None if card == NO_CARD else card))
+    return events
+
+
+def replay_record(record):
+    """
+    Turn the action log of a game record into readable events
+    
+    Args:
+        record (dict): Game record with "seats" and "action_log"
+    
+    Returns:
+        list: Events with action name, player name and card
+    """
+    seats = record.get("seats", [])
+    players = record.get("players", {})
+    
+    events = []
+    for action, seat, card in decode_action_log(record.get("action_log", "")):
+        if seat == DEALER_SEAT:
+            name = "Dealer"
+        elif seat < len(seats):
+            name = players.get(seats[seat], {}).get("name", seats[seat])
+        else:
+            name = f"Seat {seat}"
+        events.append({
+            "action": ACTION_NAMES[action] if action < len(ACTION_NAMES) else action,
+            "player": name,
+            "card": str(Card.from_code(card)) if card is not None else None
+        })
+    return events
\ No newline at end of file
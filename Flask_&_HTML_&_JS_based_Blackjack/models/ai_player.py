@@ -2,9 +2,13 @@
 AI Player Module: Provides different difficulty levels of AI players
 """
 import random
-import time
+import logging
 from app import socketio
 from models.player import Player
+from models import action_log
+from utils.event_timing import timed
+
+logger = logging.getLogger(__name__)
 
 class AIPlayer:
     """AI Player Management Class"""
@@ -83,6 +87,7 @@ class AIPlayer:
         if player_id in self.ai_players:
             del self.ai_players[player_id]
     
+    @timed("ai")
     def ai_waiting_decision(self, game_room, player):
         """
         AI player decision in waiting state
@@ -95,7 +100,7 @@ class AIPlayer:
             return
             
         # Add random delay to simulate thinking
-        time.sleep(random.uniform(1.0, 3.0))
+        socketio.sleep(random.uniform(1.0, 3.0))
         
         # AI players always get ready
         player.state = "ready"
@@ -114,6 +119,7 @@ class AIPlayer:
             if game_room.start_betting():  # Only broadcast game update if start_betting is successful
                 socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
     
+    @timed("ai")
     def ai_betting_decision(self, game_room, player):
         """
         AI player betting decision
@@ -123,13 +129,13 @@ class AIPlayer:
             player (Player): AI player object
         """
         if player.state != "betting":
-            print(f"AI player {player.name} state is not 'betting', current state: {player.state}")
+            logger.debug("AI player %s state is not 'betting', current state: %s", player.name, player.state)
             return False
         
-        print(f"AI player {player.name} starts betting...")
+        logger.debug("AI player %s starts betting...", player.name)
             
         # Add random delay to simulate thinking
-        time.sleep(random.uniform(0.5, 2.0))
+        socketio.sleep(random.uniform(0.5, 2.0))
         
         # Determine bet amount based on difficulty
         bet_amount = 0
@@ -152,12 +158,12 @@ class AIPlayer:
         bet_amount = min(bet_amount, player.money)
         bet_amount = max(bet_amount, 100)  # Minimum bet is 100
         
-        print(f"AI player {player.name} bet amount: {bet_amount}")
+        logger.debug("AI player %s bet amount: %s", player.name, bet_amount)
         
         # Execute bet
         if bet_amount > 0:
             result = game_room.place_bet(player.player_id, bet_amount)
-            print(f"AI bet result: {result}")
+            logger.debug("AI bet result: %s", result)
             
             # Directly broadcast update
             socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
@@ -190,6 +196,7 @@ class AIPlayer:
             # Game decision (hit/stand)
             self.ai_playing_decision(game_room, player)
     
+    @timed("ai")
     def ai_playing_decision(self, game_room, player):
         """
         AI player game decision
@@ -199,27 +206,27 @@ class AIPlayer:
             player (Player): AI player object
         """
         # Enhanced state checking and logging
-        print(f"AI decision function - AI: {player.name}, state: {player.state}, game state: {game_room.game_state}")
+        logger.debug("AI decision function - AI: %s, state: %s, game state: %s", player.name, player.state, game_room.game_state)
         
         # Only keep state check, ensure player state is playing
         if player.state != "playing":
-            print(f"AI player {player.name} state is not 'playing', current state: {player.state}")
+            logger.debug("AI player %s state is not 'playing', current state: %s", player.name, player.state)
             return False
             
         # Check if it's the current player's turn
         if game_room.current_player_index >= len(game_room.player_order):
-            print(f"Index out of bounds: {game_room.current_player_index} / {len(game_room.player_order)}")
+            logger.warning("Index out of bounds: %s / %s", game_room.current_player_index, len(game_room.player_order))
             return False
             
         current_player_id = game_room.player_order[game_room.current_player_index]
         if player.player_id != current_player_id:
-            print(f"Not AI player {player.name}'s turn, current should be: {current_player_id}")
+            logger.debug("Not AI player %s's turn, current should be: %s", player.name, current_player_id)
             return False
         
-        print(f"===== AI player {player.name} starts acting, difficulty: {player.ai_difficulty} =====")
+        logger.debug("===== AI player %s starts acting, difficulty: %s =====", player.name, player.ai_difficulty)
                 
         # Add random delay to simulate thinking
-        time.sleep(random.uniform(1.0, 3.0))
+        socketio.sleep(random.uniform(1.0, 3.0))
         
         # Get current hand score
         score = player.score
@@ -228,7 +235,7 @@ class AIPlayer:
         dealer_visible_card = game_room.dealer.hand[0]
         dealer_visible_value = self.get_card_value(dealer_visible_card)
         
-        print(f"AI {player.name} current points: {score}, dealer's visible card points: {dealer_visible_value}")
+        logger.debug("AI %s current points: %s, dealer's visible card points: %s", player.name, score, dealer_visible_value)
         
         # Make decision based on difficulty
         decision = "stand"  # Default is stand
@@ -288,27 +295,27 @@ class AIPlayer:
                 if random.random() < double_down_chance:
                     decision = "double"
         
-        print(f"AI {player.name} decides: {decision}")
+        logger.debug("AI %s decides: %s", player.name, decision)
         
         # Execute decision and return result
         result = False
         if decision == "hit":
-            print(f"AI {player.name} hits")
+            logger.debug("AI %s hits", player.name)
             result = game_room.player_hit(player.player_id)
             if result:
                 socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
         elif decision == "stand":
-            print(f"AI {player.name} stands")
+            logger.debug("AI %s stands", player.name)
             result = game_room.player_stand(player.player_id)
             if result:
                 socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
         elif decision == "double" and len(player.hand) == 2:
-            print(f"AI {player.name} doubles down")
+            logger.debug("AI %s doubles down", player.name)
             result = game_room.player_double_down(player.player_id)
             if result:
                 socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
         
-        print(f"AI {player.name} action result: {result}")
+        logger.debug("AI %s action result: %s", player.name, result)
         return result
     
     def get_card_value(self, card):
@@ -328,6 +335,7 @@ class AIPlayer:
         else:
             return int(card.value)
     
+    @timed("ai")
     def handle_ai_turns(self, game_room):
         """
         Handle AI player turns
@@ -335,57 +343,58 @@ class AIPlayer:
         Args:
             game_room (GameRoom): Game room object
         """
-        print(f"========== Processing AI player turns ==========")
-        print(f"Room: {game_room.room_id}, state: {game_room.game_state}")
+        logger.debug("========== Processing AI player turns ==========")
+        logger.debug("Room: %s, state: %s", game_room.room_id, game_room.game_state)
         
         # Find all AI players
         ai_players = [player_id for player_id, player in game_room.players.items() if player.is_ai]
-        print(f"Number of AI players in the room: {len(ai_players)}")
+        logger.debug("Number of AI players in the room: %s", len(ai_players))
         
         # Handle waiting state - let AI automatically get ready
         if game_room.game_state == "waiting":
-            print("Game is in waiting state, letting AI automatically get ready")
+            logger.debug("Game is in waiting state, letting AI automatically get ready")
             for player_id in ai_players:
                 player = game_room.players[player_id]
-                print(f"AI player {player.name} state: {player.state}")
+                logger.debug("AI player %s state: %s", player.name, player.state)
                 if player.state == "waiting" and player.money > 0:
                     self.ai_waiting_decision(game_room, player)
         
         # Handle betting phase
         elif game_room.game_state == "betting":
-            print("Game is in betting phase, letting AI automatically bet")
+            logger.debug("Game is in betting phase, letting AI automatically bet")
             for player_id in ai_players:
                 player = game_room.players[player_id]
-                print(f"AI player {player.name} state: {player.state}")
+                logger.debug("AI player %s state: %s", player.name, player.state)
                 if player.state == "betting":
                     self.ai_betting_decision(game_room, player)
         
         # Handle playing phase
         elif game_room.game_state == "playing":
-            print("Game is in playing state")
+            logger.debug("Game is in playing state")
             # Check current player
             if game_room.current_player_index < len(game_room.player_order):
                 current_player_id = game_room.player_order[game_room.current_player_index]
-                print(f"Current player ID: {current_player_id}")
+                logger.debug("Current player ID: %s", current_player_id)
                 
                 # Check if current player is AI
                 if current_player_id in ai_players:
                     current_player = game_room.players[current_player_id]
-                    print(f"Current player is AI: {current_player.name}, state: {current_player.state}")
+                    logger.debug("Current player is AI: %s, state: %s", current_player.name, current_player.state)
                     
                     # Directly call AI decision method
                     if current_player.state == "playing":
-                        print(f"AI player {current_player.name} is about to act...")
+                        logger.debug("AI player %s is about to act...", current_player.name)
                         self.ai_playing_decision(game_room, current_player)
                     else:
-                        print(f"AI player {current_player.name} state is not 'playing', cannot act")
+                        logger.debug("AI player %s state is not 'playing', cannot act", current_player.name)
                 else:
-                    print(f"Current player is not AI")
+                    logger.debug("Current player is not AI")
             else:
-                print(f"current_player_index out of range: {game_room.current_player_index}, player_order length: {len(game_room.player_order)}")
+                logger.warning("current_player_index out of range: %s, player_order length: %s", game_room.current_player_index, len(game_room.player_order))
         
-        print(f"========== AI player turn processing complete ==========")
+        logger.debug("========== AI player turn processing complete ==========")
 
+    @timed("ai")
     def force_ai_action(self, game_room):
         """
         Force AI player action (for handling stuck situations)
@@ -396,7 +405,7 @@ class AIPlayer:
         Returns:
             bool: Whether action was successfully executed
         """
-        print("====== Starting forced AI action ======")
+        logger.debug("====== Starting forced AI action ======")
         
         # Check if there are AI players who need to bet
         if game_room.game_state == "betting":
@@ -404,9 +413,9 @@ class AIPlayer:
                                 if p.is_ai and p.state == "betting"]
             
             if ai_players_betting:
-                print(f"Forcing: {len(ai_players_betting)} AI players need to bet")
+                logger.warning("Forcing: %s AI players need to bet", len(ai_players_betting))
                 for player in ai_players_betting:
-                    print(f"Forcing AI {player.name} to bet")
+                    logger.warning("Forcing AI %s to bet", player.name)
                     
                     # Simple betting logic - bet minimum
                     bet_amount = min(100, player.money)
@@ -417,14 +426,14 @@ class AIPlayer:
                     player.original_bet = bet_amount
                     player.state = "ready"
                     
-                    print(f"Forced AI {player.name} betting complete: {bet_amount}")
+                    logger.warning("Forced AI %s betting complete: %s", player.name, bet_amount)
                 
                 # Check if all players have bet
                 active_players = [p for p in game_room.players.values() if p.money > 0 and p.state != "spectating"]
                 betting_players = [p for p in active_players if p.state == "betting"]
                 
                 if not betting_players and active_players:
-                    print("All AI players have been forced to bet, trying to start the game")
+                    logger.warning("All AI players have been forced to bet, trying to start the game")
                     game_room.start_game()
                 
                 socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
@@ -437,10 +446,11 @@ class AIPlayer:
                 current_player = game_room.players.get(current_player_id)
                 
                 if current_player and current_player.is_ai and current_player.state == "playing":
-                    print(f"Forcing: AI {current_player.name} needs to act")
+                    logger.warning("Forcing: AI %s needs to act", current_player.name)
                     
                     # Simple action - just stand
                     current_player.state = "stand"
+                    game_room.action_log.add(action_log.STAND, current_player_id)
                     
                     # Move to next player
                     game_room.current_player_index = (game_room.current_player_index + 1) % len(game_room.player_order)
@@ -452,12 +462,12 @@ class AIPlayer:
                     else:
                         game_room.set_current_player()
                     
-                    print(f"Forced AI {current_player.name} stand complete")
+                    logger.warning("Forced AI %s stand complete", current_player.name)
                     
                     socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
                     return True
         
-        print("====== No AI actions need to be forced ======")
+        logger.debug("====== No AI actions need to be forced ======")
         return False
 
 # Create global AI player manager instance
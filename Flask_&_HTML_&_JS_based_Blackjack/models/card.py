@@ -5,6 +5,10 @@ Card Class: Define playing cards in blackjack game
 class Card:
     """Card class, representing a playing card"""
     
+    # Suits and values in deck order, a card's code is suit index * 13 + value index
+    SUITS = ['♥', '♦', '♣', '♠']
+    VALUES = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+    
     def __init__(self, suit, value):
         """
         Initialize a card
@@ -25,6 +29,37 @@ class Card:
         """
         return {"suit": self.suit, "value": self.value}
     
+    @property
+    def code(self):
+        """
+        Compact integer code of the card
+        
+        Returns:
+            int: Code between 0 and 51
+        """
+        return CARD_CODES[(self.suit, self.value)]
+    
+    @classmethod
+    def from_code(cls, code):
+        """
+        Create a card from its integer code
+        
+        Args:
+            code (int): Code between 0 and 51
+            
+        Returns:
+            Card: The card
+        """
+        return cls(cls.SUITS[code // 13], cls.VALUES[code % 13])
+    
     def __str__(self):
         """String representation of card"""
-        return f"{self.suit}{self.value}"
\ No newline at end of file
+        return f"{self.suit}{self.value}"
+
+
+# (suit, value) -> card code lookup
+CARD_CODES = {
+    (suit, value): suit_index * 13 + value_index
+    for suit_index, suit in enumerate(Card.SUITS)
+    for value_index, value in enumerate(Card.VALUES)
+}
\ No newline at end of file
@@ -4,8 +4,13 @@ Game State Observer: Monitor game state changes, ensure AI players don't get stu
 This file should be saved as models/game_observer.py
 """
 import time
+import logging
 import threading
 from app import socketio
+from utils.metrics import SCAN_DURATION
+from models import action_log
+
+logger = logging.getLogger(__name__)
 
 class GameObserver:
     """Game state observer, monitor game state and force resolve stuck AI"""
@@ -35,12 +40,14 @@ class GameObserver:
         self.running = True
         
         def observer_loop():
-            print("Game observer started")
+            logger.info("Game observer started")
             while self.running:
+                start_time = time.perf_counter()
                 try:
                     self.check_all_rooms()
                 except Exception as e:
-                    print(f"Game observer error: {e}")
+                    logger.error("Game observer error: %s", e)
+                SCAN_DURATION.observe(time.perf_counter() - start_time, scanner="observer")
                 time.sleep(check_interval)
                 
         self.observer_thread = threading.Thread(target=observer_loop)
@@ -60,7 +67,12 @@ class GameObserver:
         
         current_time = time.time()
         
-        for room_id, game_room in game_rooms.items():
+        # Forget rooms that no longer exist
+        for room_id in list(self.room_states):
+            if room_id not in game_rooms:
+                self.room_states.pop(room_id, None)
+        
+        for room_id, game_room in list(game_rooms.items()):
             # Initialize room state record
             if room_id not in self.room_states:
                 self.room_states[room_id] = {
@@ -71,6 +83,10 @@ class GameObserver:
                 }
                 continue
             
+            # Don't force AI actions in rooms without connected humans
+            if not game_room.has_connected_humans():
+                continue
+            
             room_state = self.room_states[room_id]
             
             # Detect if state has changed
@@ -105,7 +121,7 @@ class GameObserver:
         from models import ai_player_manager
         
         stuck_count = room_state['stuck_count']
-        print(f"Room {room_id} stuck detection: state={game_room.game_state}, stuck count={stuck_count}")
+        logger.warning("Room %s stuck detection: state=%s, stuck count=%s", room_id, game_room.game_state, stuck_count)
         
         # Handle based on game state
         if game_room.game_state == "betting":
@@ -114,7 +130,7 @@ class GameObserver:
                                  if p.is_ai and p.state == "betting"]
             
             if ai_players_betting:
-                print(f"Forced handling: {len(ai_players_betting)} AI players stuck in betting phase")
+                logger.warning("Forced handling: %s AI players stuck in betting phase", len(ai_players_betting))
                 for player in ai_players_betting:
                     # Force bet
                     bet_amount = min(100, player.money)
@@ -122,7 +138,7 @@ class GameObserver:
                     player.current_bet = bet_amount
                     player.original_bet = bet_amount
                     player.state = "ready"
-                    print(f"Force AI {player.name} to bet: {bet_amount}")
+                    logger.warning("Force AI %s to bet: %s", player.name, bet_amount)
                 
                 # Check if can start game
                 active_players = [p for p in game_room.players.values() 
@@ -130,7 +146,7 @@ class GameObserver:
                 betting_players = [p for p in active_players if p.state == "betting"]
                 
                 if not betting_players and active_players:
-                    print("All AI players have been forced to bet, starting game")
+                    logger.warning("All AI players have been forced to bet, starting game")
                     game_room.start_game()
                 
                 socketio.emit('game_update', game_room.to_dict(), room=room_id)
@@ -142,15 +158,16 @@ class GameObserver:
                 current_player = game_room.players.get(current_player_id)
                 
                 if current_player and current_player.is_ai and current_player.state == "playing":
-                    print(f"Forced handling: AI {current_player.name} stuck in action phase")
+                    logger.warning("Forced handling: AI %s stuck in action phase", current_player.name)
                     
                     # Force stand
                     if game_room.player_stand(current_player_id):
-                        print(f"Force AI {current_player.name} stand successful")
+                        logger.warning("Force AI %s stand successful", current_player.name)
                     else:
                         # If normal method fails, directly modify state
-                        print(f"Normal stand failed, directly modify AI state")
+                        logger.warning("Normal stand failed, directly modify AI state")
                         current_player.state = "stand"
+                        game_room.action_log.add(action_log.STAND, current_player_id)
                         game_room.current_player_index = (game_room.current_player_index + 1) % len(game_room.player_order)
                         game_room.set_current_player()
                     
@@ -2,10 +2,31 @@
 Game Record Class: For saving and managing game records
 """
 import os
+import bz2
+import gzip
 import json
+import lzma
 import time
+import logging
+import threading
 from datetime import datetime
 
+from utils.metrics import RECORD_WRITES
+from config import (RECORD_SEGMENT_MAX_BYTES, RECORD_SEGMENT_MAX_AGE,
+                    RECORD_ARCHIVE_MAX_BYTES, RECORD_COMPRESSION)
+
+logger = logging.getLogger(__name__)
+
+# Columnar copy of a closed segment written next to it for analytics, see models/record_columns.py
+SEGMENT_COLUMNS_SUFFIX = ".bjrc"
+
+# Stdlib codecs for closed segments: name -> (module, file extension)
+SEGMENT_CODECS = {
+    "gzip": (gzip, ".gz"),
+    "bz2": (bz2, ".bz2"),
+    "lzma": (lzma, ".xz")
+}
+
 class GameRecord:
     """Game Record Management Class"""
     
@@ -17,20 +38,303 @@ class GameRecord:
             data_dir (str): Directory to save records
         """
         self.data_dir = data_dir
+        self.archive_dir = os.path.join(data_dir, "archive")
+        self.index_file = os.path.join(data_dir, "segments_index.json")
         self.ensure_data_dir()
         
-        # Cache all room records
+        # Cache active segment records of each room
         self.room_records = {}
+        
+        # Serializes appends and rotations, so a record is never appended to a segment being closed
+        self.lock = threading.RLock()
+        
+        # Closed segments: file, room_id, room_name, start, end, count, bytes
+        self.segments = self.load_segment_index()
     
     def ensure_data_dir(self):
         """Ensure data directory exists"""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
+        if not os.path.exists(self.archive_dir):
+            os.makedirs(self.archive_dir)
     
     def get_room_record_file(self, room_id):
         """Get room record file path"""
         return os.path.join(self.data_dir, f"room_{room_id}.json")
     
+    def load_segment_index(self):
+        """
+        Load the index of closed segments
+        
+        Returns:
+            list: Segment entries
+        """
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error("Error loading segment index: %s", e)
+        return []
+    
+    def save_segment_index(self):
+        """Save the index of closed segments atomically"""
+        temp_file = self.index_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.segments, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            logger.error("Error saving segment index: %s", e)
+    
+    def read_segment(self, segment):
+        """
+        Read the records of a closed segment
+        
+        Args:
+            segment (dict): Segment index entry
+            
+        Returns:
+            list: Segment records
+        """
+        codec = SEGMENT_CODECS[segment.get("codec", "gzip")][0]
+        try:
+            with codec.open(os.path.join(self.archive_dir, segment["file"]), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error("Error reading record segment %s: %s", segment['file'], e)
+            return []
+    
+    def rotate_room_segment(self, room_id):
+        """
+        Close the active segment of a room: compress it into the archive and
+        start an empty one
+        
+        Args:
+            room_id (str): Room ID
+            
+        Returns:
+            dict: New segment index entry, None if there was nothing to rotate
+        """
+        with self.lock:
+            # Records of rooms that are not cached are read without caching them
+            records = self.room_records.get(room_id)
+            if records is None:
+                records = self.read_room_records_file(room_id)
+            if not records:
+                return None
+            
+            codec, extension = SEGMENT_CODECS.get(RECORD_COMPRESSION, SEGMENT_CODECS["gzip"])
+            start = records[0].get("timestamp", 0)
+            end = records[-1].get("timestamp", 0)
+            file_name = f"room_{room_id}_{int(start * 1000)}.json{extension}"
+            segment_path = os.path.join(self.archive_dir, file_name)
+            
+            try:
+                with codec.open(segment_path, 'wt', encoding='utf-8') as f:
+                    json.dump(records, f, ensure_ascii=False, separators=(',', ':'))
+            except Exception as e:
+                logger.error("Error writing record segment: %s", e)
+                return None
+            
+            segment = {
+                "file": file_name,
+                "codec": RECORD_COMPRESSION if RECORD_COMPRESSION in SEGMENT_CODECS else "gzip",
+                "room_id": room_id,
+                "room_name": records[-1].get("room_name", ""),
+                "start": start,
+                "end": end,
+                "count": len(records),
+                "bytes": os.path.getsize(segment_path)
+            }
+            self.segments.append(segment)
+            self.save_segment_index()
+            
+            # Start a new active segment
+            if room_id in self.room_records:
+                self.room_records[room_id] = []
+            record_file = self.get_room_record_file(room_id)
+            if os.path.exists(record_file):
+                os.remove(record_file)
+            
+            self.enforce_retention()
+            return segment
+    
+    def should_rotate(self, room_id, now=None):
+        """
+        Check whether the active segment of a room is too large or too old
+        
+        Decided from the file size and the first record's timestamp, without
+        loading the records of rooms that are not cached.
+        
+        Args:
+            room_id (str): Room ID
+            now (float, optional): Current time
+            
+        Returns:
+            bool: Whether the segment should be rotated
+        """
+        try:
+            size = os.path.getsize(self.get_room_record_file(room_id))
+        except OSError:
+            return False
+        if size > RECORD_SEGMENT_MAX_BYTES:
+            return True
+        start = self.first_record_timestamp(room_id)
+        now = now or time.time()
+        return start is not None and now - start > RECORD_SEGMENT_MAX_AGE
+    
+    def first_record_timestamp(self, room_id):
+        """
+        Get the timestamp of the oldest record of a room's active segment
+        
+        Uncached segments are parsed only up to the end of their first record.
+        
+        Args:
+            room_id (str): Room ID
+            
+        Returns:
+            float: Timestamp, None if the segment is empty or missing
+        """
+        records = self.room_records.get(room_id)
+        if records is not None:
+            return records[0].get("timestamp") if records else None
+        
+        decoder = json.JSONDecoder()
+        text = ""
+        try:
+            with open(self.get_room_record_file(room_id), 'r', encoding='utf-8') as f:
+                while True:
+                    chunk = f.read(16384)
+                    if not chunk:
+                        return None
+                    text += chunk
+                    start = text.find("{")
+                    if start < 0:
+                        continue
+                    try:
+                        record, _ = decoder.raw_decode(text, start)
+                    except ValueError:
+                        continue  # First record not read completely yet
+                    return record.get("timestamp")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.error("Error reading room records: %s", e)
+            return None
+    
+    def rotate_stale_segments(self):
+        """
+        Rotate every active segment that exceeded its size or age, including
+        rooms that no longer produce records
+        
+        Returns:
+            int: Number of rotated segments
+        """
+        now = time.time()
+        rotated = 0
+        for file_name in os.listdir(self.data_dir):
+            if file_name.startswith("room_") and file_name.endswith(".json"):
+                room_id = file_name[len("room_"):-len(".json")]
+                if self.should_rotate(room_id, now) and self.rotate_room_segment(room_id):
+                    rotated += 1
+        return rotated
+    
+    def enforce_retention(self):
+        """
+        Delete the oldest closed segments until the archive fits in
+        RECORD_ARCHIVE_MAX_BYTES
+        
+        Returns:
+            int: Number of deleted segments
+        """
+        total = sum(segment.get("bytes", 0) for segment in self.segments)
+        if total <= RECORD_ARCHIVE_MAX_BYTES:
+            return 0
+        
+        deleted = 0
+        for segment in sorted(self.segments, key=lambda entry: entry.get("end", 0)):
+            if total <= RECORD_ARCHIVE_MAX_BYTES:
+                break
+            segment_path = os.path.join(self.archive_dir, segment["file"])
+            for path in (segment_path, segment_path + SEGMENT_COLUMNS_SUFFIX,
+                         segment_path + SEGMENT_COLUMNS_SUFFIX + ".strings.json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.segments.remove(segment)
+            total -= segment.get("bytes", 0)
+            deleted += 1
+        
+        self.save_segment_index()
+        return deleted
+    
+    def iter_records(self, start=None, end=None, room_ids=None):
+        """
+        Iterate records in a time range, only opening the segments that
+        overlap it
+        
+        Args:
+            start (float, optional): Only records at or after this timestamp
+            end (float, optional): Only records at or before this timestamp
+            room_ids (iterable, optional): Only records of these rooms
+            
+        Yields:
+            dict: Game record, in time order within each segment
+        """
+        room_ids = set(room_ids) if room_ids is not None else None
+        
+        for segment in sorted(self.segments, key=lambda entry: entry.get("start", 0)):
+            if room_ids is not None and segment["room_id"] not in room_ids:
+                continue
+            if (start is not None and segment["end"] < start) or (end is not None and segment["start"] > end):
+                continue
+            for record in self.read_segment(segment):
+                timestamp = record.get("timestamp", 0)
+                if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                    yield record
+        
+        for file_name in sorted(os.listdir(self.data_dir)):
+            if not (file_name.startswith("room_") and file_name.endswith(".json")):
+                continue
+            room_id = file_name[len("room_"):-len(".json")]
+            if room_ids is not None and room_id not in room_ids:
+                continue
+            for record in self.load_room_records(room_id):
+                timestamp = record.get("timestamp", 0)
+                if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                    yield record
+    
+    def _iter_room_record_lists(self, room_id, before=None, after=None, newest_first=False):
+        """
+        Yield the record lists of a room (closed segments and the active one)
+        that overlap a time window, reading segments only when reached
+        
+        Args:
+            room_id (str): Room ID
+            before (float, optional): Window end (exclusive)
+            after (float, optional): Window start (exclusive)
+            newest_first (bool, optional): Yield the newest list first
+            
+        Yields:
+            list: Records sorted by timestamp
+        """
+        segments = [segment for segment in self.segments
+                    if segment["room_id"] == room_id
+                    and (after is None or segment["end"] > after)
+                    and (before is None or segment["start"] < before)]
+        segments.sort(key=lambda entry: entry.get("start", 0))
+        
+        if newest_first:
+            yield self.load_room_records(room_id)
+            for segment in reversed(segments):
+                yield self.read_segment(segment)
+        else:
+            for segment in segments:
+                yield self.read_segment(segment)
+            yield self.load_room_records(room_id)
+    
     def load_room_records(self, room_id):
         """
         Load room records
@@ -44,18 +348,150 @@ class GameRecord:
         if room_id in self.room_records:
             return self.room_records[room_id]
             
+        records = self.read_room_records_file(room_id)
+        if records:
+            self.room_records[room_id] = records
+        return records
+    
+    def read_room_records_file(self, room_id):
+        """
+        Read a room's active segment from disk, without caching it
+        
+        Args:
+            room_id (str): Room ID
+            
+        Returns:
+            list: Room records list
+        """
         record_file = self.get_room_record_file(room_id)
         if os.path.exists(record_file):
             try:
                 with open(record_file, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
-                self.room_records[room_id] = records
-                return records
+                    return json.load(f)
             except Exception as e:
-                print(f"Error loading room records: {e}")
-                return []
+                logger.error("Error loading room records: %s", e)
         return []
     
+    def get_room_records_version(self, room_id):
+        """
+        Get a cheap version marker for room records
+        
+        Records are only ever appended, so the closed segment count, the
+        active record count and the id of the newest record identify the
+        current contents.
+        
+        Args:
+            room_id (str): Room ID
+            
+        Returns:
+            str: Version marker
+        """
+        records = self.load_room_records(room_id)
+        last_id = records[-1].get("id", "") if records else ""
+        segment_count = sum(1 for segment in self.segments if segment["room_id"] == room_id)
+        return f"{segment_count}:{len(records)}:{last_id}"
+    
+    def _find_timestamp_index(self, records, timestamp, inclusive=False):
+        """
+        Binary search the first record at or after a timestamp
+        
+        Args:
+            records (list): Records sorted by timestamp
+            timestamp (float): Timestamp to search for
+            inclusive (bool, optional): If False, skip records with exactly this timestamp
+            
+        Returns:
+            int: Index of the first matching record
+        """
+        low, high = 0, len(records)
+        while low < high:
+            mid = (low + high) // 2
+            record_time = records[mid].get("timestamp", 0)
+            if record_time < timestamp or (not inclusive and record_time == timestamp):
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def _record_has_player(self, record, player_name):
+        """Check whether a player took part in a record"""
+        return any(info.get("name") == player_name for info in record.get("players", {}).values())
+    
+    def iter_room_records(self, room_id, before=None, after=None, player_name=None):
+        """
+        Iterate room records in time order without copying the record list
+        
+        Args:
+            room_id (str): Room ID
+            before (float, optional): Only records older than this timestamp
+            after (float, optional): Only records newer than this timestamp
+            player_name (str, optional): Only records the player took part in
+            
+        Yields:
+            dict: Game record
+        """
+        for records in self._iter_room_record_lists(room_id, before, after):
+            start = self._find_timestamp_index(records, after) if after is not None else 0
+            end = self._find_timestamp_index(records, before, inclusive=True) if before is not None else len(records)
+            
+            for index in range(start, end):
+                record = records[index]
+                if player_name is None or self._record_has_player(record, player_name):
+                    yield record
+    
+    def query_room_records(self, room_id, limit, before=None, after=None, player_name=None):
+        """
+        Get one page of room records
+        
+        With ``after`` the page walks forward from that timestamp, otherwise it
+        walks back from ``before`` (or from the newest record). Records inside
+        the page are always in time order.
+        
+        Args:
+            room_id (str): Room ID
+            limit (int): Maximum number of records in the page
+            before (float, optional): Only records older than this timestamp
+            after (float, optional): Only records newer than this timestamp
+            player_name (str, optional): Only records the player took part in
+            
+        Returns:
+            dict: Page with records, cursors and whether more records exist
+        """
+        page = []
+        has_more = False
+        for records in self._iter_room_record_lists(room_id, before, after, newest_first=after is None):
+            start = self._find_timestamp_index(records, after) if after is not None else 0
+            end = self._find_timestamp_index(records, before, inclusive=True) if before is not None else len(records)
+            
+            if after is not None:
+                indexes = range(start, end)
+            else:
+                indexes = range(end - 1, start - 1, -1)
+            
+            for index in indexes:
+                record = records[index]
+                if player_name is not None and not self._record_has_player(record, player_name):
+                    continue
+                if len(page) >= limit:
+                    has_more = True
+                    break
+                page.append(record)
+            
+            if has_more:
+                break
+        
+        if after is None:
+            page.reverse()
+        
+        return {
+            "records": page,
+            "count": len(page),
+            "has_more": has_more,
+            # Pass as before= to page back in time, or as after= to page forward
+            "before_cursor": page[0].get("timestamp") if page else before,
+            "after_cursor": page[-1].get("timestamp") if page else after
+        }
+    
     def save_room_records(self, room_id, records):
         """
         Save room records
@@ -70,7 +506,18 @@ class GameRecord:
             with open(record_file, 'w', encoding='utf-8') as f:
                 json.dump(records, f, ensure_ascii=False, indent=2)
         except Exception as e:
-            print(f"Error saving room records: {e}")
+            logger.error("Error saving room records: %s", e)
+    
+    def release_room(self, room_id):
+        """
+        Drop the cached records of a room that no longer exists
+        
+        The records stay on disk and are loaded again when requested.
+        
+        Args:
+            room_id (str): Room ID
+        """
+        self.room_records.pop(room_id, None)
     
     def add_game_record(self, room_id, game_room):
         """
@@ -80,86 +527,99 @@ class GameRecord:
             room_id (str): Room ID
             game_room (GameRoom): Game room object
         """
-        # Load existing records
-        records = self.load_room_records(room_id)
-        
-        # Create new record
-        timestamp = time.time()
-        date_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Check if dealer busted
-        dealer_busted = game_room.dealer.score > 21
-        dealer_blackjack = len(game_room.dealer.hand) == 2 and game_room.dealer.score == 21
+        with self.lock:
+            # Load existing records
+            records = self.load_room_records(room_id)
+            
+            # Create new record
+            timestamp = time.time()
+            date_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Check if dealer busted
+            dealer_busted = game_room.dealer.score > 21
+            dealer_blackjack = len(game_room.dealer.hand) == 2 and game_room.dealer.score == 21
 
-        # Get player information
-        players_info = {}
-        for player_id, player in game_room.players.items():
-            if player.state != "spectating":  # Only record participating players
-                # Calculate win/loss correctly
-                initial_money = player.money + player.current_bet  # Money before betting
-                
-                # Calculate win/loss based on player state
-                if player.state == "busted":
-                    # Busted, lose bet amount
-                    win_loss = -player.current_bet
-                elif player.state == "blackjack" and len(player.hand) == 2:
-                    if dealer_blackjack:
-                        # Dealer and player both have Blackjack, tie
+            # Get player information
+            players_info = {}
+            for player_id, player in game_room.players.items():
+                if player.state != "spectating":  # Only record participating players
+                    # Calculate win/loss correctly
+                    initial_money = player.money + player.current_bet  # Money before betting
+                    
+                    # Calculate win/loss based on player state
+                    if player.state == "busted":
+                        # Busted, lose bet amount
+                        win_loss = -player.current_bet
+                    elif player.state == "blackjack" and len(player.hand) == 2:
+                        if dealer_blackjack:
+                            # Dealer and player both have Blackjack, tie
+                            win_loss = 0
+                        else:
+                            # Player has Blackjack and dealer doesn't, win 1.5x bet
+                            win_loss = int(player.current_bet * 1.5)
+                    elif dealer_blackjack:
+                        # Dealer has Blackjack but player doesn't, player loses
+                        win_loss = -player.current_bet
+                    elif player.state == "blackjack" and game_room.dealer.state != "blackjack":
+                        # Player has Blackjack and dealer doesn't, win 1.5x bet
+                        win_loss = int(player.current_bet * 1.5)
+                    elif player.state == "five_dragon":
+                        # Five Dragon, win 2x bet
+                        win_loss = player.current_bet * 2
+                    elif game_room.dealer.state == "busted" and player.state != "busted":
+                        # Dealer busted and player didn't, player wins
+                        win_loss = player.current_bet
+                    elif player.score > game_room.dealer.score and player.state != "busted":
+                        # Player score higher than dealer and player didn't bust, win
+                        win_loss = player.current_bet
+                    elif player.score < game_room.dealer.score and game_room.dealer.state != "busted":
+                        # Player score lower than dealer and dealer didn't bust, player wins
+                        win_loss = player.current_bet
+                    else:
+                        # Tie, return original bet
                         win_loss = 0
-                elif dealer_blackjack:
-                    # Dealer has Blackjack but player doesn't, player loses
-                    win_loss = -player.current_bet
-                elif player.state == "blackjack" and game_room.dealer.state != "blackjack":
-                    # Player has Blackjack and dealer doesn't, win 1.5x bet
-                    win_loss = int(player.current_bet * 1.5)
-                elif player.state == "five_dragon":
-                    # Five Dragon, win 2x bet
-                    win_loss = player.current_bet * 2
-                elif game_room.dealer.state == "busted" and player.state != "busted":
-                    # Dealer busted and player didn't, player wins
-                    win_loss = player.current_bet
-                elif player.score > game_room.dealer.score and player.state != "busted":
-                    # Player score higher than dealer and player didn't bust, win
-                    win_loss = player.current_bet
-                elif player.score < game_room.dealer.score and game_room.dealer.state != "busted":
-                    # Player score lower than dealer and dealer didn't bust, player wins
-                    win_loss = player.current_bet
-                else:
-                    # Tie, return original bet
-                    win_loss = 0
-                
-                players_info[player_id] = {
-                    "name": player.name,
-                    "initial_money": initial_money,
-                    "final_money": player.money,
-                    "bet": player.current_bet,
-                    "win_loss": win_loss,
-                    "state": player.state,
-                    "score": player.score,
-                    "is_ai": player.is_ai,
-                    "ai_difficulty": player.ai_difficulty
-                }
-        
-        # Create record object
-        record = {
-            "id": f"{room_id}_{timestamp}",
-            "room_id": room_id,
-            "room_name": game_room.room_name,
-            "timestamp": timestamp,
-            "date_time": date_time,
-            "players": players_info,
-            "dealer_score": game_room.dealer.score,
-            "dealer_cards": [{"suit": card.suit, "value": card.value} for card in game_room.dealer.hand],
-            "game_result": game_room.message
-        }
-        
-        # Add to records list
-        records.append(record)
-        
-        # Save records
-        self.save_room_records(room_id, records)
-        
-        return record
+                    
+                    players_info[player_id] = {
+                        "name": player.name,
+                        "initial_money": initial_money,
+                        "final_money": player.money,
+                        "bet": player.current_bet,
+                        "win_loss": win_loss,
+                        "state": player.state,
+                        "score": player.score,
+                        "is_ai": player.is_ai,
+                        "ai_difficulty": player.ai_difficulty,
+                        "result": game_room.round_results.get(player_id)
+                    }
+            
+            # Create record object
+            record = {
+                "id": f"{room_id}_{timestamp}",
+                "room_id": room_id,
+                "room_name": game_room.room_name,
+                "timestamp": timestamp,
+                "date_time": date_time,
+                "players": players_info,
+                "dealer_score": game_room.dealer.score,
+                "dealer_cards": [{"suit": card.suit, "value": card.value} for card in game_room.dealer.hand],
+                "game_result": game_room.message,
+                # Card-by-card events, decode with models.action_log.replay_record
+                "seats": game_room.action_log.seats,
+                "action_log": game_room.action_log.encode()
+            }
+            
+            # Add to records list
+            records.append(record)
+            
+            # Save records
+            self.save_room_records(room_id, records)
+            RECORD_WRITES.inc()
+            
+            # Close the active segment once it grows too large or too old
+            if self.should_rotate(room_id, timestamp):
+                self.rotate_room_segment(room_id)
+            
+            return record
     
     def get_player_stats(self, player_name):
         """
@@ -182,31 +642,26 @@ class GameRecord:
             "win_rate": 0
         }
         
-        # Traverse all room records
-        for room_id in os.listdir(self.data_dir):
-            if room_id.startswith("room_") and room_id.endswith(".json"):
-                room_records = self.load_room_records(room_id.replace("room_", "").replace(".json", ""))
-                
-                # Traverse all records in room
-                for record in room_records:
-                    # Find player in record
-                    for player_id, player_info in record.get("players", {}).items():
-                        if player_info.get("name") == player_name:
-                            stats["games_played"] += 1
-                            
-                            win_loss = player_info.get("win_loss", 0)
-                            if win_loss > 0:
-                                stats["wins"] += 1
-                            elif win_loss < 0:
-                                stats["losses"] += 1
-                                
-                            stats["total_profit"] += win_loss
-                            
-                            if player_info.get("state") == "blackjack":
-                                stats["blackjacks"] += 1
-                            
-                            if player_info.get("state") == "busted":
-                                stats["busts"] += 1
+        # Traverse all records, archived segments included
+        for record in self.iter_records():
+            # Find player in record
+            for player_id, player_info in record.get("players", {}).items():
+                if player_info.get("name") == player_name:
+                    stats["games_played"] += 1
+                    
+                    win_loss = player_info.get("win_loss", 0)
+                    if win_loss > 0:
+                        stats["wins"] += 1
+                    elif win_loss < 0:
+                        stats["losses"] += 1
+                        
+                    stats["total_profit"] += win_loss
+                    
+                    if player_info.get("state") == "blackjack":
+                        stats["blackjacks"] += 1
+                    
+                    if player_info.get("state") == "busted":
+                        stats["busts"] += 1
         
         # Calculate win rate
         if stats["games_played"] > 0:
@@ -1,17 +1,32 @@
 """
 Game Room Class: Defines the room for blackjack games
 """
+import time
+import base64
 import random
+import logging
+import threading
+from collections import deque
 from flask import request
 from flask_socketio import emit
 
 from models.card import Card
 from models.player import Player
-from config import MAX_PLAYERS_PER_ROOM
+from models import action_log
+from utils.event_timing import timed
+from config import MAX_PLAYERS_PER_ROOM, STATE_HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
 
 class GameRoom:
     """Game room class, manages a round of blackjack game"""
     
+    # RoomRegistry of the live rooms, told about lobby summary changes (set by models)
+    registry = None
+    
+    # GameRecord finished rounds are written to (set by models), None to keep no records
+    record_manager = None
+    
     def __init__(self, room_id, room_name, max_players=MAX_PLAYERS_PER_ROOM):
         """
         Initialize game room
@@ -33,15 +48,21 @@ class GameRoom:
         self.player_order = []  # Player action order
         self.message = "Waiting for players to join..."
         self.session_states = {}  # Store player session states
+        self.action_log = action_log.ActionLog()  # Card-by-card log of the current round
+        self.round_results = {}  # player_id -> settlement message of the last round
+        self.last_activity = time.time()  # Time of the last player event, for the idle-room reaper
+        # Version of the state last returned by to_dict; a room restored from a snapshot starts
+        # above every version of its earlier life, so old versions are never mistaken for its own
+        self.state_version = time.time_ns() // 1000
+        self.state_history = deque(maxlen=STATE_HISTORY_SIZE)  # (version, state), oldest first
+        self.state_lock = threading.Lock()
         self.initialize_deck()
     
     def initialize_deck(self):
         """Initialize card deck and shuffle"""
-        suits = ['♥', '♦', '♣', '♠']
-        values = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
         self.deck = []
-        for suit in suits:
-            for value in values:
+        for suit in Card.SUITS:
+            for value in Card.VALUES:
                 self.deck.append(Card(suit, value))
         random.shuffle(self.deck)
     
@@ -84,6 +105,7 @@ class GameRoom:
             
         return score
     
+    @timed("mutate")
     def add_player(self, player):
         """
         Add a player to the room
@@ -99,6 +121,8 @@ class GameRoom:
         
         self.players[player.player_id] = player
         self.player_order.append(player.player_id)
+        self.last_activity = time.time()
+        self.notify_changed()
         
         # Check if this player previously existed in the session
         session_id = request.cookies.get('session_id') or request.args.get('session_id')
@@ -109,6 +133,7 @@ class GameRoom:
                 
         return True
     
+    @timed("mutate")
     def remove_player(self, player_id):
         """
         Remove a player from the room
@@ -136,9 +161,52 @@ class GameRoom:
                 if self.player_order and self.current_player_index >= len(self.player_order):
                     self.current_player_index = 0
             
+            self.notify_changed()
             return True
         return False
     
+    @property
+    def game_state(self):
+        """Game state: waiting, betting, playing, dealer_turn or game_over"""
+        return self._game_state
+    
+    @game_state.setter
+    def game_state(self, state):
+        """Set the game state, telling the registry when it changes"""
+        changed = getattr(self, "_game_state", None) != state
+        self._game_state = state
+        if changed:
+            self.notify_changed()
+    
+    def notify_changed(self):
+        """Tell the room registry that the lobby summary may have changed"""
+        if self.registry is not None:
+            self.registry.room_changed(self)
+    
+    def summary(self):
+        """
+        Get the room fields shown in the lobby
+        
+        Returns:
+            dict: Room ID, name, player count, maximum players and game state
+        """
+        return {
+            "room_id": self.room_id,
+            "room_name": self.room_name,
+            "player_count": len(self.players),
+            "max_players": self.max_players,
+            "game_state": self.game_state
+        }
+    
+    def has_connected_humans(self):
+        """
+        Check whether a human player is connected to the room
+        
+        Returns:
+            bool: False if the room only holds AI and disconnected players
+        """
+        return any(not p.is_ai and not p.is_disconnected for p in self.players.values())
+    
     def get_player_state_from_session(self, session_id):
         """
         Get player state from session
@@ -166,6 +234,7 @@ class GameRoom:
         """
         self.session_states[session_id] = state
     
+    @timed("mutate")
     def start_betting(self):
         """
         Start betting phase
@@ -199,7 +268,7 @@ class GameRoom:
             else:
                 # Players without money enter spectator state
                 player.state = "spectating"
-                print(f"Player {player.name} has zero funds, entering spectator mode")
+                logger.info("Player %s has zero funds, entering spectator mode", player.name)
             
             # Save player current state to session
             from flask import request
@@ -212,20 +281,21 @@ class GameRoom:
         
         return True
     
+    @timed("mutate")
     def place_bet(self, player_id, bet_amount):
         """Player places a bet"""
         if self.game_state != "betting":
-            print(f"Bet failed - game state is not 'betting': {self.game_state}")
+            logger.debug("Bet failed - game state is not 'betting': %s", self.game_state)
             return False
         
         if player_id not in self.players:
-            print(f"Bet failed - player ID does not exist: {player_id}")
+            logger.debug("Bet failed - player ID does not exist: %s", player_id)
             return False
         
         player = self.players[player_id]
         
         if player.state != "betting" or bet_amount > player.money:
-            print(f"Bet failed - player state is not 'betting' or bet amount is too large: {player.state}, {bet_amount}, {player.money}")
+            logger.debug("Bet failed - player state is not 'betting' or bet amount is too large: %s, %s, %s", player.state, bet_amount, player.money)
             return False
         
         player.money -= bet_amount
@@ -233,21 +303,22 @@ class GameRoom:
         player.original_bet = bet_amount
         player.state = "ready"
         
-        print(f"Player {player.name} bet successfully: {bet_amount}, remaining funds: {player.money}, new state: {player.state}")
+        logger.debug("Player %s bet successfully: %s, remaining funds: %s, new state: %s", player.name, bet_amount, player.money, player.state)
         
         # Check if all non-spectating players with funds have placed bets
         active_players = [p for p in self.players.values() if (p.money > 0 or p.current_bet > 0) and p.state != "spectating"]
         betting_players = [p for p in active_players if p.state == "betting"]
         
-        print(f"Bet check - active players: {len(active_players)}, betting players: {len(betting_players)}")
+        logger.debug("Bet check - active players: %s, betting players: %s", len(active_players), len(betting_players))
         
         # If no players are betting, all active players are ready
         if not betting_players and active_players:
-            print("All players have placed bets, starting game")
+            logger.debug("All players have placed bets, starting game")
             self.start_game()
         
         return True
     
+    @timed("mutate")
     def start_game(self):
         """
         Start game after all players have bet
@@ -257,12 +328,18 @@ class GameRoom:
         """
         self.game_state = "playing"
         
+        # Seats of this round are the players that get dealt in
+        self.action_log.reset([player_id for player_id in self.player_order
+                               if self.players[player_id].state == "ready"])
+        
         # Deal cards to all players and dealer
         for player_id in self.player_order:
             player = self.players[player_id]
             if player.state == "ready":  # Only deal cards to ready players
                 player.hand = [self.deal_card(), self.deal_card()]
                 player.score = self.calculate_score(player.hand)
+                for card in player.hand:
+                    self.action_log.add(action_log.DEAL, player_id, card)
                 
                 # Check for natural blackjack
                 if player.score == 21:
@@ -273,6 +350,8 @@ class GameRoom:
         # Deal cards to dealer
         self.dealer.hand = [self.deal_card(), self.deal_card()]
         self.dealer.score = self.calculate_score([self.dealer.hand[0]])  # Only calculate first card
+        for card in self.dealer.hand:
+            self.action_log.add(action_log.DEAL, None, card)
         
         # Set current player
         self.current_player_index = 0
@@ -306,6 +385,7 @@ class GameRoom:
         self.dealer_turn()
         return True
     
+    @timed("mutate")
     def player_hit(self, player_id):
         """
         Player hits
@@ -331,6 +411,7 @@ class GameRoom:
         # Player hits
         player.hand.append(self.deal_card())
         player.score = self.calculate_score(player.hand)
+        self.action_log.add(action_log.HIT, player_id, player.hand[-1])
         
         # Check if busted, reached 21, or achieved five dragon
         if player.score > 21:
@@ -352,6 +433,7 @@ class GameRoom:
         
         return True
     
+    @timed("mutate")
     def player_stand(self, player_id):
         """
         Player stands
@@ -376,6 +458,7 @@ class GameRoom:
         
         player.state = "stand"
         self.message = f"{player.name} stands"
+        self.action_log.add(action_log.STAND, player_id)
         
         # Move to next player
         self.current_player_index = (self.current_player_index + 1) % len(self.player_order)
@@ -383,6 +466,7 @@ class GameRoom:
         
         return True
     
+    @timed("mutate")
     def player_double_down(self, player_id):
         """
         Player doubles down
@@ -416,6 +500,7 @@ class GameRoom:
         # Take just one more card
         player.hand.append(self.deal_card())
         player.score = self.calculate_score(player.hand)
+        self.action_log.add(action_log.DOUBLE, player_id, player.hand[-1])
         
         if player.score > 21:
             player.state = "busted"
@@ -430,6 +515,7 @@ class GameRoom:
         
         return True
     
+    @timed("mutate")
     def dealer_turn(self):
         """
         Dealer's turn
@@ -449,6 +535,7 @@ class GameRoom:
             if len(self.dealer.hand) == 4 and self.dealer.score <= 21:
                 # Try to achieve five dragon
                 next_card = self.deck[-1]  # Peek at next card
+                self.action_log.add(action_log.DEALER_PEEK, None, next_card)
                 test_score = self.dealer.score
                 if next_card.value == 'A':
                     test_score += 1  # A most conservatively worth 1 point
@@ -463,12 +550,14 @@ class GameRoom:
             
             self.dealer.hand.append(self.deal_card())
             self.dealer.score = self.calculate_score(self.dealer.hand)
+            self.action_log.add(action_log.DEALER_DRAW, None, self.dealer.hand[-1])
         
         # Settle the game
         self.determine_winners()
         
         return True
     
+    @timed("mutate")
     def determine_winners(self):
         """
         Settle the game, determine each player's win/loss
@@ -483,6 +572,9 @@ class GameRoom:
         dealer_five_dragon = len(self.dealer.hand) == 5 and dealer_score <= 21
         dealer_blackjack = dealer_score == 21 and len(self.dealer.hand) == 2
         
+        # self.message ends up describing the last player only, keep each player's result
+        self.round_results = {}
+        
         for player_id, player in self.players.items():
             # If player didn't participate in this round or is spectating
             if player.state == "waiting" or player.state == "spectating":
@@ -491,6 +583,7 @@ class GameRoom:
             # If player has already busted, no further calculation needed
             if player.state == "busted":
                 player.money += 0  # Already deducted when betting
+                self.round_results[player_id] = f"{player.name} busted"
                 continue
             
             player_score = player.score
@@ -539,14 +632,17 @@ class GameRoom:
                 player.money += player.current_bet  # Tie returns original bet
                 self.message = f"{player.name} ties with the dealer"
             
+            self.round_results[player_id] = self.message
+            
             # Do not automatically set players with zero funds to spectating
             # Allow them to continue in the current round
         
-        from models import game_record_manager
-        game_record_manager.add_game_record(self.room_id, self)
+        if self.record_manager is not None:
+            self.record_manager.add_game_record(self.room_id, self)
 
         return True
     
+    @timed("mutate")
     def prepare_new_round(self):
         """
         Prepare for a new round
@@ -580,6 +676,61 @@ class GameRoom:
         
         return True
     
+    @timed("serialize")
+    def to_snapshot(self):
+        """
+        Convert game room to a compact dictionary for hibernation
+        
+        Returns:
+            dict: Complete room state, cards as card codes
+        """
+        return {
+            "room_id": self.room_id,
+            "room_name": self.room_name,
+            "max_players": self.max_players,
+            "game_state": self.game_state,
+            "current_player_index": self.current_player_index,
+            "player_order": self.player_order,
+            "message": self.message,
+            "players": [player.to_snapshot() for player in self.players.values()],
+            "dealer": self.dealer.to_snapshot(),
+            "deck": [card.code for card in self.deck],
+            "session_states": self.session_states,
+            "round_results": self.round_results,
+            "action_log": {"seats": self.action_log.seats, "data": self.action_log.encode()},
+            "last_activity": self.last_activity
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data):
+        """
+        Restore a game room from a snapshot
+        
+        Args:
+            data (dict): Dictionary returned by to_snapshot
+            
+        Returns:
+            GameRoom: Restored room
+        """
+        room = cls(data["room_id"], data["room_name"], data["max_players"])
+        room.game_state = data["game_state"]
+        room.current_player_index = data["current_player_index"]
+        room.player_order = list(data["player_order"])
+        room.message = data["message"]
+        room.players = {}
+        for player_data in data["players"]:
+            player = Player.from_snapshot(player_data)
+            room.players[player.player_id] = player
+        room.dealer = Player.from_snapshot(data["dealer"])
+        room.deck = [Card.from_code(code) for code in data["deck"]]
+        room.session_states = dict(data["session_states"])
+        room.round_results = dict(data["round_results"])
+        room.action_log.seats = list(data["action_log"]["seats"])
+        room.action_log.data = bytearray(base64.b64decode(data["action_log"]["data"]))
+        room.last_activity = data["last_activity"]
+        return room
+    
+    @timed("serialize")
     def to_dict(self, include_hidden=False):
         """
         Convert game room to dictionary for JSON serialization
@@ -602,7 +753,7 @@ class GameRoom:
                 dealer_dict["hand"][1] = {"suit": "?", "value": "?"}
                 dealer_dict["score"] = self.calculate_score([self.dealer.hand[0]])
         
-        return {
+        state = {
             "room_id": self.room_id,
             "room_name": self.room_name,
             "players": players_dict,
@@ -610,8 +761,73 @@ class GameRoom:
             "game_state": self.game_state,
             "message": self.message,
             "current_player_index": self.current_player_index,
-            "player_order": self.player_order
+            "player_order": list(self.player_order)
         }
+        if include_hidden:
+            return state
+        
+        # Number the states players see, a new version whenever the state differs from the last one
+        with self.state_lock:
+            if not self.state_history or self.state_history[-1][1] != state:
+                self.state_version += 1
+                self.state_history.append((self.state_version, state))
+            state = dict(self.state_history[-1][1], state_version=self.state_version)
+        return state
+    
+    def changes_since(self, version):
+        """
+        Get what changed since a state version a player has seen
+        
+        Args:
+            version (int): State version the player has seen
+        
+        Returns:
+            dict: Current state_version, the version diffed against (since), changed top-level
+                fields (changes), changed or added players (players) and IDs of removed players
+                (removed_players); None if the version is no longer in the history
+        """
+        current = self.to_dict()
+        with self.state_lock:
+            base = next((state for state_version, state in self.state_history if state_version == version), None)
+        if base is None:
+            return None
+        
+        return {
+            "state_version": current["state_version"],
+            "since": version,
+            "changes": {key: value for key, value in current.items()
+                        if key not in ("players", "state_version") and base.get(key) != value},
+            "players": {player_id: player for player_id, player in current["players"].items()
+                        if base["players"].get(player_id) != player},
+            "removed_players": [player_id for player_id in base["players"] if player_id not in current["players"]]
+        }
+    
+    def rebind_player(self, old_player_id, new_player_id):
+        """
+        Move a reconnecting player to their new socket ID
+        
+        Args:
+            old_player_id (str): Player ID of the previous connection
+            new_player_id (str): Socket ID of the new connection
+        
+        Returns:
+            Player: The player, None if not in the room
+        """
+        player = self.players.pop(old_player_id, None)
+        if player is None:
+            return None
+        player.player_id = new_player_id
+        player.is_disconnected = False
+        player.disconnected_at = None
+        self.players[new_player_id] = player
+        if old_player_id in self.player_order:
+            self.player_order[self.player_order.index(old_player_id)] = new_player_id
+        # The round's log and results stay with the player
+        if old_player_id in self.action_log.seats:
+            self.action_log.seats[self.action_log.seats.index(old_player_id)] = new_player_id
+        if old_player_id in self.round_results:
+            self.round_results[new_player_id] = self.round_results.pop(old_player_id)
+        return player
         
     def check_player_left(self, left_player_id):
         """
@@ -0,0 +1,149 @@
+"""
+Matchmaker: Quick join, find a seat for a player or open a new room
+
+Rooms are found through the joinable buckets of the room index, preferring
+rooms that are waiting for players. The chosen seat is reserved for
+QUICK_JOIN_RESERVATION_TTL seconds, until the player joins the room with the
+reservation token, so a burst of players is spread over rooms instead of all
+being sent to the same last seat. Reservations are counted in the room
+index, so reserved seats are not offered again. Expired reservations are
+dropped lazily, oldest first from a heap, whenever the matchmaker is used.
+Rooms are created when no room has a seat left, unless admission control
+refuses new players or rooms.
+"""
+import time
+import uuid
+import heapq
+import logging
+import threading
+
+from config import QUICK_JOIN_STATES, QUICK_JOIN_RESERVATION_TTL
+from utils.metrics import QUICK_JOINS
+from utils.admission import admission
+
+logger = logging.getLogger(__name__)
+
+
+class Matchmaker:
+    """Seat finder with short-lived seat reservations"""
+    
+    def __init__(self, game_rooms, room_index, states=QUICK_JOIN_STATES,
+                 reservation_ttl=QUICK_JOIN_RESERVATION_TTL):
+        """
+        Initialize matchmaker
+        
+        Args:
+            game_rooms (RoomRegistry): Live rooms, new rooms are added here
+            room_index (RoomIndex): Index with the joinable buckets
+            states (list, optional): Game states to seat players in, most preferred first
+            reservation_ttl (float, optional): Seconds a seat is held for the player
+        """
+        self.game_rooms = game_rooms
+        self.room_index = room_index
+        self.states = states
+        self.reservation_ttl = reservation_ttl
+        self.lock = threading.Lock()
+        self.reservations = {}  # room_id -> {token: expiry}
+        self.expiries = []  # Heap of (expiry, room_id, token), claimed tokens are skipped
+        self.rooms_created = 0
+    
+    def reserved_seats(self, room_id):
+        """
+        Count a room's unexpired seat reservations, with the lock held
+        
+        Args:
+            room_id (str): Room ID
+        
+        Returns:
+            int: Reserved seats
+        """
+        self.expire(time.time())
+        return len(self.reservations.get(room_id, ()))
+    
+    def expire(self, now):
+        """Drop the reservations that expired, with the lock held"""
+        while self.expiries and self.expiries[0][0] <= now:
+            _, room_id, token = heapq.heappop(self.expiries)
+            tokens = self.reservations.get(room_id)
+            if tokens is not None and tokens.pop(token, None) is not None:
+                self._reserved_changed(room_id, tokens)
+    
+    def _reserved_changed(self, room_id, tokens):
+        """Tell the room index how many seats of a room are reserved"""
+        if not tokens:
+            self.reservations.pop(room_id, None)
+        self.room_index.set_reserved(room_id, len(tokens))
+    
+    def quick_join(self):
+        """
+        Reserve a seat in a joinable room, creating a room if none has one
+        
+        Returns:
+            dict: success, then room ID, reservation token and whether the room was
+                created, or the message of the admission control refusal
+        """
+        from models.game_room import GameRoom
+        
+        message = admission.admit_player()
+        if message is not None:
+            QUICK_JOINS.inc(result="rejected")
+            return {"success": False, "message": message}
+        
+        with self.lock:
+            now = time.time()
+            self.expire(now)
+            room_id = self.room_index.find_joinable(self.states)
+            created = room_id is None
+            if created:
+                message = admission.admit_room(len(self.game_rooms))
+                if message is not None:
+                    QUICK_JOINS.inc(result="rejected")
+                    return {"success": False, "message": message}
+                self.rooms_created += 1
+                room_id = str(uuid.uuid4())
+                self.game_rooms[room_id] = GameRoom(room_id, f"Quick Join {self.rooms_created}")
+                logger.info("Created quick-join room %s", room_id)
+            token = uuid.uuid4().hex
+            expiry = now + self.reservation_ttl
+            tokens = self.reservations.setdefault(room_id, {})
+            tokens[token] = expiry
+            heapq.heappush(self.expiries, (expiry, room_id, token))
+            self._reserved_changed(room_id, tokens)
+        
+        QUICK_JOINS.inc(result="created" if created else "matched")
+        return {"success": True, "room_id": room_id, "reservation": token, "created": created}
+    
+    def claim(self, room_id, token):
+        """
+        Use up a reservation when its player joins
+        
+        Args:
+            room_id (str): Room ID
+            token (str): Reservation token, may be None
+        
+        Returns:
+            bool: Whether the token held an unexpired seat in the room
+        """
+        if not token:
+            return False
+        with self.lock:
+            tokens = self.reservations.get(room_id)
+            if not tokens or token not in tokens:
+                return False
+            expiry = tokens.pop(token)
+            self._reserved_changed(room_id, tokens)
+            return expiry > time.time()
+    
+    def has_free_seat(self, game_room):
+        """
+        Check whether a player without a reservation can take a seat
+        
+        Args:
+            game_room (GameRoom): Room to join
+        
+        Returns:
+            bool: Whether a seat is neither taken nor reserved
+        """
+        with self.lock:
+            free = game_room.max_players - len(game_room.players)
+            return free > self.reserved_seats(game_room.room_id)
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 Player Class: Defines the player in blackjack game
 """
+from models.card import Card
 
 class Player:
     """Player class, represents a player in the game"""
@@ -25,6 +26,8 @@ class Player:
         self.is_ai = is_ai  # Whether is AI player
         self.ai_difficulty = ai_difficulty  # AI difficulty
         self.is_disconnected = False  # Whether disconnected
+        self.disconnected_at = None  # Time of disconnection, for the reconnection grace period
+        self.session_id = None  # Session ID the player joined with
         # Player states: waiting, ready, betting, playing, stand, busted, blackjack, spectating
         self.state = "waiting"
     
@@ -57,4 +60,46 @@ class Player:
         if self.money <= 0:
             self.state = "spectating"
         else:
-            self.state = "waiting"
\ No newline at end of file
+            self.state = "waiting"
+    
+    def to_snapshot(self):
+        """
+        Convert player to a compact dictionary for room snapshots
+        
+        Returns:
+            dict: Player state, cards as card codes
+        """
+        return {
+            "player_id": self.player_id,
+            "name": self.name,
+            "hand": [card.code for card in self.hand],
+            "score": self.score,
+            "money": self.money,
+            "current_bet": self.current_bet,
+            "original_bet": self.original_bet,
+            "is_ai": self.is_ai,
+            "ai_difficulty": self.ai_difficulty,
+            "state": self.state,
+            "session_id": self.session_id
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data):
+        """
+        Create a player from a room snapshot
+        
+        Args:
+            data (dict): Dictionary returned by to_snapshot
+            
+        Returns:
+            Player: Player, connection state reset to connected
+        """
+        player = cls(data["player_id"], data["name"], data["is_ai"], data["ai_difficulty"])
+        player.hand = [Card.from_code(code) for code in data["hand"]]
+        player.score = data["score"]
+        player.money = data["money"]
+        player.current_bet = data["current_bet"]
+        player.original_bet = data["original_bet"]
+        player.state = data["state"]
+        player.session_id = data["session_id"]
+        return player
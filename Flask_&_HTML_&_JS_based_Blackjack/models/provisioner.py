@@ -0,0 +1,143 @@
+"""
+Provisioner: Create rooms and seat AI players in bulk
+
+One call creates any number of rooms and seats a list of AI players in each
+created room and in each listed existing room. Everything is checked before
+anything is created: the listed rooms must exist (hibernated rooms are
+revived) and have the seats free, quick-join reservations included, and
+admission control must accept all the rooms and AI seats at once, so a
+refused call creates nothing.
+
+AI players get ready in background tasks, one per room, so the call returns
+the new IDs at once instead of waiting for every AI's decision. Only rooms
+with a connected human are readied now; the AI players of other rooms get
+ready when the first human joins, as with the AI players of any room.
+"""
+import uuid
+import logging
+
+from app import socketio
+from utils.metrics import PROVISIONED
+from utils.admission import admission
+
+logger = logging.getLogger(__name__)
+
+
+class Provisioner:
+    """Bulk room creation and AI seating"""
+    
+    def __init__(self, game_rooms, matchmaker, ai_player_manager):
+        """
+        Initialize provisioner
+        
+        Args:
+            game_rooms (RoomRegistry): Live rooms, new rooms are added here
+            matchmaker (Matchmaker): Matchmaker, whose reserved seats are not taken
+            ai_player_manager (AIPlayer): AI player manager
+        """
+        self.game_rooms = game_rooms
+        self.matchmaker = matchmaker
+        self.ai_player_manager = ai_player_manager
+    
+    def provision(self, room_count, difficulties, room_ids=(), room_name="Room"):
+        """
+        Create rooms and seat AI players
+        
+        Args:
+            room_count (int): Rooms to create
+            difficulties (list): Difficulty of each AI player seated in every room
+            room_ids (list, optional): Existing rooms to seat the AI players in as well
+            room_name (str, optional): Name prefix of the created rooms
+        
+        Returns:
+            dict: success, then for each room its ID, whether it was created and the IDs of
+                its new AI players, or the error message and reason ("not_found", "full"
+                or "refused")
+        """
+        from models import get_room
+        from models.game_room import GameRoom
+        
+        room_ids = list(dict.fromkeys(room_ids))
+        ai_count = len(difficulties) * (room_count + len(room_ids))
+        
+        # Holding the matchmaker's lock keeps quick join from reserving the checked seats
+        with self.matchmaker.lock:
+            targets = []
+            for room_id in room_ids:
+                # Hibernated rooms are revived, they only keep a lobby stub in memory
+                game_room = get_room(room_id)
+                if game_room is None:
+                    return {"success": False, "message": f"Room {room_id} does not exist", "reason": "not_found"}
+                free = (game_room.max_players - len(game_room.players) -
+                        self.matchmaker.reserved_seats(room_id))
+                if free < len(difficulties):
+                    return {"success": False, "message": f"Not enough free seats in room {room_id}",
+                            "reason": "full"}
+                targets.append((game_room, False))
+            
+            message = None
+            if room_count:
+                message = admission.admit_room(len(self.game_rooms) + room_count - 1)
+            if message is None and ai_count:
+                message = admission.admit_ai_player(len(self.ai_player_manager.ai_players) + ai_count - 1)
+            if message is not None:
+                return {"success": False, "message": message, "reason": "refused"}
+            
+            for _ in range(room_count):
+                room_id = str(uuid.uuid4())
+                game_room = GameRoom(room_id, f"{room_name} {len(self.game_rooms) + 1}")
+                self.game_rooms[room_id] = game_room
+                targets.append((game_room, True))
+            
+            seated = []
+            for game_room, created in targets:
+                ai_ids = []
+                for difficulty in difficulties:
+                    ai_id = f"ai_{uuid.uuid4().hex[:8]}"
+                    ai_player = self.ai_player_manager.create_ai_player(ai_id, difficulty)
+                    if not game_room.add_player(ai_player):
+                        self.ai_player_manager.remove_ai_player(ai_id)
+                        break
+                    ai_ids.append(ai_id)
+                seated.append((game_room, created, ai_ids))
+        
+        PROVISIONED.inc(room_count, kind="room")
+        PROVISIONED.inc(sum(len(ai_ids) for _, _, ai_ids in seated), kind="ai_player")
+        logger.info("Provisioned %s new and %s existing rooms with %s AI players each",
+                    room_count, len(room_ids), len(difficulties))
+        
+        for game_room, created, ai_ids in seated:
+            if not created:
+                self.announce(game_room, ai_ids)
+        return {"success": True,
+                "rooms": [{"room_id": game_room.room_id, "created": created, "ai_player_ids": ai_ids}
+                          for game_room, created, ai_ids in seated]}
+    
+    def announce(self, game_room, ai_ids):
+        """
+        Tell an existing room's players about its new AI players and get them ready
+        
+        Args:
+            game_room (GameRoom): Room the AI players were seated in
+            ai_ids (list): IDs of the new AI players
+        """
+        room_id = game_room.room_id
+        for ai_id in ai_ids:
+            player = game_room.players.get(ai_id)
+            if player is not None:
+                socketio.emit('player_joined', {"player": player.to_dict()}, room=room_id)
+        socketio.emit('game_update', game_room.to_dict(), room=room_id)
+        
+        if ai_ids and game_room.has_connected_humans():
+            socketio.start_background_task(self.ready_ai_players, game_room)
+    
+    def ready_ai_players(self, game_room):
+        """
+        Let a room's AI players get ready, run as a background task
+        
+        Args:
+            game_room (GameRoom): Room with new AI players
+        """
+        # Delay a bit to let clients update UI
+        socketio.sleep(1)
+        self.ai_player_manager.handle_ai_turns(game_room)
\ No newline at end of file
@@ -0,0 +1,357 @@
+"""
+Record Analytics: Vectorized statistics over game records
+
+Records are loaded into NumPy columns (see models/record_columns.py) and every
+statistic is computed with array operations, so the cost is dominated by
+loading the columns rather than by per-round Python loops.
+
+Closed segments never change, so each is converted to the columnar format
+once, into a file next to it in the archive, and later loads map that file
+and only translate its string indexes. Only the active room files that
+changed since the last load are parsed from JSON again, which keeps repeated
+loads of millions of rounds to NumPy copies instead of a per-record rebuild.
+"""
+import os
+import json
+import argparse
+import threading
+
+from models.record_columns import (
+    RecordColumnBuilder, ColumnarRecordReader, COLUMNS,
+    STATE_CODES, DIFFICULTY_CODES, np
+)
+from models.game_record import GameRecord, SEGMENT_COLUMNS_SUFFIX
+
+# Columns of the records directory, built incrementally
+_columns_cache = {
+    "data_dir": None,
+    "strings": None,  # RecordColumnBuilder holding the string dictionary of all rows
+    "segments": [],  # Files of the closed segments in "archive", in order
+    "archive": None,  # Columns of the closed segments
+    "live": {},  # Active room file name -> ((size, mtime), columns)
+    "signature": None,
+    "columns": None,
+    "strings_copy": None
+}
+_columns_lock = threading.Lock()
+
+# Open reader of the columnar export, keyed by its path, size and mtime
+_reader_cache = {"signature": None, "reader": None, "columns": None}
+
+
+def _require_numpy():
+    """Raise a clear error when NumPy is missing"""
+    if np is None:
+        raise ImportError("NumPy is required for record analytics")
+
+
+def _empty_columns():
+    """Get columns without rows"""
+    return RecordColumnBuilder().to_numpy()
+
+
+def _concatenate(parts):
+    """Concatenate column dicts row-wise"""
+    return {name: np.concatenate([part[name] for part in parts]) for name, _, _, _ in COLUMNS}
+
+
+def _segment_columns(manager, segment, strings):
+    """
+    Load a closed segment's columns, converting the segment on first use
+    
+    Args:
+        manager (GameRecord): Record manager of the records directory
+        segment (dict): Segment index entry
+        strings (RecordColumnBuilder): Dictionary the room and player indexes are mapped into
+    
+    Returns:
+        dict: Column name -> NumPy array
+    """
+    path = os.path.join(manager.archive_dir, segment["file"] + SEGMENT_COLUMNS_SUFFIX)
+    if not os.path.exists(path + ".strings.json"):
+        builder = RecordColumnBuilder()
+        builder.add_records(manager.read_segment(segment))
+        builder.write(path)
+    
+    with ColumnarRecordReader(path) as reader:
+        rooms, players = strings.remap(reader.strings)
+        columns = {name: np.array(values) for name, values in reader.columns().items()}
+    if columns["room"].size:
+        columns["room"] = rooms[columns["room"]]
+        columns["player"] = players[columns["player"]]
+    return columns
+
+
+def _live_columns(manager, room_id, strings):
+    """Parse the active segment of a room into columns"""
+    builder = RecordColumnBuilder(strings)
+    builder.add_records(manager.read_room_records_file(room_id))
+    return {name: np.array(values) for name, values in builder.to_numpy().items()}
+
+
+def load_columns(data_dir="game_records", columns_path=None):
+    """
+    Load game records as NumPy columns
+    
+    Args:
+        data_dir (str, optional): Directory with JSON room records
+        columns_path (str, optional): Columnar export to map instead of parsing JSON
+    
+    Returns:
+        tuple: (columns dict, string dictionary)
+    """
+    _require_numpy()
+    
+    if columns_path:
+        stat = os.stat(columns_path)
+        signature = (columns_path, stat.st_size, stat.st_mtime)
+        if _reader_cache["signature"] != signature:
+            previous = _reader_cache["reader"]
+            reader = ColumnarRecordReader(columns_path)
+            _reader_cache.update(signature=signature, reader=reader, columns=reader.columns())
+            if previous is not None:
+                try:
+                    previous.close()
+                except BufferError:
+                    pass  # Columns of the old export are still in use, the mapping closes with them
+        return _reader_cache["columns"], _reader_cache["reader"].strings
+    
+    with _columns_lock:
+        cache = _columns_cache
+        manager = GameRecord(data_dir)
+        segments = sorted(manager.segments, key=lambda entry: entry.get("start", 0))
+        files = [segment["file"] for segment in segments]
+        
+        # Segments are only ever added, or deleted oldest first by retention, which starts over
+        if cache["data_dir"] != data_dir or files[:len(cache["segments"])] != cache["segments"]:
+            cache.update(data_dir=data_dir, strings=RecordColumnBuilder(), segments=[],
+                         archive=_empty_columns(), live={}, signature=None)
+        strings = cache["strings"]
+        new_segments = segments[len(cache["segments"]):]
+        if new_segments:
+            cache["archive"] = _concatenate([cache["archive"]] + [_segment_columns(manager, segment, strings)
+                                                                  for segment in new_segments])
+            cache["segments"] = files
+        
+        live = {}
+        for file_name in sorted(os.listdir(data_dir)):
+            if file_name.startswith("room_") and file_name.endswith(".json"):
+                stat = os.stat(os.path.join(data_dir, file_name))
+                version = (stat.st_size, stat.st_mtime)
+                cached = cache["live"].get(file_name)
+                if cached is None or cached[0] != version:
+                    cached = (version, _live_columns(manager, file_name[len("room_"):-len(".json")], strings))
+                live[file_name] = cached
+        cache["live"] = live
+        
+        signature = (tuple(files), tuple((file_name, version) for file_name, (version, _) in live.items()))
+        if cache["signature"] != signature:
+            cache["columns"] = _concatenate([cache["archive"]] + [columns for _, columns in live.values()])
+            # Copied, the dictionary keeps growing with later loads
+            cache["strings_copy"] = {key: list(values) for key, values in strings.get_strings().items()}
+            cache["signature"] = signature
+        return cache["columns"], cache["strings_copy"]
+
+
+def _betting_rows(columns):
+    """Mask of rows where the player actually placed a bet"""
+    return columns["bet"] > 0
+
+
+def house_edge_by_outcome(columns):
+    """
+    Compute the realized house edge overall and by rule outcome
+    
+    House edge is the house's win divided by the total amount bet.
+    
+    Args:
+        columns (dict): Record columns
+    
+    Returns:
+        dict: Outcome -> rounds, total bet, player profit and house edge
+    """
+    bet = columns["bet"].astype(np.int64)
+    win_loss = columns["win_loss"].astype(np.int64)
+    state = columns["state"]
+    betting = _betting_rows(columns)
+    
+    outcomes = {
+        "all": betting,
+        "blackjack": betting & (state == STATE_CODES.index("blackjack")),
+        "five_dragon": betting & (state == STATE_CODES.index("five_dragon")),
+        "dealer_bust": betting & (columns["dealer_score"] > 21) & (state != STATE_CODES.index("busted")),
+        "player_bust": betting & (state == STATE_CODES.index("busted")),
+    }
+    
+    result = {}
+    for outcome, mask in outcomes.items():
+        total_bet = int(bet[mask].sum())
+        profit = int(win_loss[mask].sum())
+        result[outcome] = {
+            "rounds": int(mask.sum()),
+            "total_bet": total_bet,
+            "player_profit": profit,
+            "house_edge": -profit / total_bet if total_bet else 0.0
+        }
+    return result
+
+
+def ev_by_difficulty(columns):
+    """
+    Compute expected value and standard deviation per AI difficulty
+    
+    Args:
+        columns (dict): Record columns
+    
+    Returns:
+        dict: Difficulty ("human" for players) -> rounds, EV, std and EV per unit bet
+    """
+    betting = _betting_rows(columns)
+    codes = columns["ai_difficulty"][betting].astype(np.intp)
+    win_loss = columns["win_loss"][betting].astype(np.float64)
+    bet = columns["bet"][betting].astype(np.float64)
+    
+    size = max(len(DIFFICULTY_CODES), int(codes.max()) + 1 if codes.size else 0)
+    counts = np.bincount(codes, minlength=size)
+    sums = np.bincount(codes, weights=win_loss, minlength=size)
+    squares = np.bincount(codes, weights=win_loss * win_loss, minlength=size)
+    bets = np.bincount(codes, weights=bet, minlength=size)
+    
+    result = {}
+    for code in np.flatnonzero(counts):
+        n = counts[code]
+        mean = sums[code] / n
+        variance = max(squares[code] / n - mean * mean, 0.0)
+        difficulty = DIFFICULTY_CODES[code] if code < len(DIFFICULTY_CODES) else "unknown"
+        result[difficulty or "human"] = {
+            "rounds": int(n),
+            "ev": float(mean),
+            "std": float(np.sqrt(variance)),
+            "ev_per_unit_bet": float(sums[code] / bets[code]) if bets[code] else 0.0
+        }
+    return result
+
+
+def bankroll_trajectories(columns, strings, max_points=50):
+    """
+    Compute each player's cumulative profit over time
+    
+    Args:
+        columns (dict): Record columns
+        strings (dict): String dictionary
+        max_points (int, optional): Points kept per trajectory
+    
+    Returns:
+        dict: Player name -> rounds, final/min/max profit and downsampled trajectory
+    """
+    player = columns["player"]
+    if player.size == 0:
+        return {}
+    
+    # Sort by player, then by time, and cumulate within each player's run
+    order = np.lexsort((columns["timestamp"], player))
+    sorted_player = player[order]
+    profit = np.cumsum(columns["win_loss"][order].astype(np.int64))
+    starts = np.flatnonzero(np.r_[True, sorted_player[1:] != sorted_player[:-1]])
+    ends = np.r_[starts[1:], sorted_player.size]
+    offsets = np.r_[0, profit[starts[1:] - 1]]
+    profit -= np.repeat(offsets, ends - starts)
+    
+    result = {}
+    names = strings.get("players", [])
+    for start, end in zip(starts, ends):
+        run = profit[start:end]
+        points = np.unique(np.linspace(0, run.size - 1, min(max_points, run.size)).astype(np.intp))
+        player_index = int(sorted_player[start])
+        name = names[player_index] if player_index < len(names) else str(player_index)
+        result[name] = {
+            "rounds": int(run.size),
+            "final": int(run[-1]),
+            "min": int(run.min()),
+            "max": int(run.max()),
+            "trajectory": run[points].tolist()
+        }
+    return result
+
+
+def bet_distribution(columns, bins=10):
+    """
+    Compute the bet size distribution
+    
+    Args:
+        columns (dict): Record columns
+        bins (int, optional): Number of histogram bins
+    
+    Returns:
+        dict: Summary statistics, percentiles and histogram of bet sizes
+    """
+    bet = columns["bet"][_betting_rows(columns)]
+    if bet.size == 0:
+        return {"rounds": 0}
+    
+    counts, edges = np.histogram(bet, bins=bins)
+    p50, p90, p99 = np.percentile(bet, [50, 90, 99])
+    return {
+        "rounds": int(bet.size),
+        "mean": float(bet.mean()),
+        "min": int(bet.min()),
+        "max": int(bet.max()),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()}
+    }
+
+
+def summarize(columns, strings, max_points=50):
+    """
+    Compute all analytics
+    
+    Args:
+        columns (dict): Record columns
+        strings (dict): String dictionary
+        max_points (int, optional): Points kept per bankroll trajectory
+    
+    Returns:
+        dict: All statistics
+    """
+    return {
+        "rows": int(columns["bet"].size),
+        "house_edge": house_edge_by_outcome(columns),
+        "ev_by_difficulty": ev_by_difficulty(columns),
+        "bankroll": bankroll_trajectories(columns, strings, max_points),
+        "bet_distribution": bet_distribution(columns)
+    }
+
+
+def filter_room(columns, strings, room_id):
+    """
+    Restrict columns to one room
+    
+    Args:
+        columns (dict): Record columns
+        strings (dict): String dictionary
+        room_id (str): Room ID
+    
+    Returns:
+        dict: Columns of the room's rows only
+    """
+    rooms = strings.get("rooms", [])
+    if room_id not in rooms:
+        return {name: values[:0] for name, values in columns.items()}
+    mask = columns["room"] == rooms.index(room_id)
+    return {name: values[mask] for name, values in columns.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze blackjack game records")
+    parser.add_argument("--data-dir", default="game_records", help="Directory with JSON room records")
+    parser.add_argument("--columns", help="Columnar export to analyze instead of the JSON records")
+    parser.add_argument("--room", help="Only analyze one room")
+    parser.add_argument("--points", type=int, default=50, help="Points kept per bankroll trajectory")
+    args = parser.parse_args()
+    
+    columns, strings = load_columns(args.data_dir, args.columns)
+    if args.room:
+        columns = filter_room(columns, strings, args.room)
+    print(json.dumps(summarize(columns, strings, args.points), ensure_ascii=False, indent=2))
\ No newline at end of file
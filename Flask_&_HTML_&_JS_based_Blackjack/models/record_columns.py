@@ -0,0 +1,331 @@
+"""
+Record Columns: Compact binary columnar format for game records
+
+Each row is one player's result in one round. The file holds a fixed header
+followed by one contiguous block per column, so a column can be mapped
+straight into a NumPy array without copying:
+
+    header  : magic b"BJRC", format version (u2), column count (u2), row count (u8)
+    columns : COLUMNS in order, each block padded to an 8 byte boundary
+
+All values are little endian. Room ids, room names and player names are
+stored once in a JSON string dictionary next to the data file
+("<path>.strings.json") and rows only hold their indexes.
+"""
+import sys
+import json
+import mmap
+import struct
+import argparse
+from array import array
+
+from models.card import Card
+from models.game_record import GameRecord
+
+try:
+    import numpy as np
+except ImportError:  # Exporting works without NumPy, only the reader needs it
+    np = None
+
+MAGIC = b"BJRC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+ALIGNMENT = 8
+
+# Dealer hands are stored as card codes, padded with NO_CARD
+MAX_DEALER_CARDS = 8
+NO_CARD = 255
+
+# Column name, array typecode, NumPy dtype, values per row
+COLUMNS = [
+    ("timestamp", "d", "<f8", 1),
+    ("room", "I", "<u4", 1),
+    ("player", "I", "<u4", 1),
+    ("bet", "i", "<i4", 1),
+    ("win_loss", "i", "<i4", 1),
+    ("state", "B", "u1", 1),
+    ("score", "B", "u1", 1),
+    ("dealer_score", "B", "u1", 1),
+    ("ai_difficulty", "B", "u1", 1),
+    ("dealer_cards", "B", "u1", MAX_DEALER_CARDS),
+]
+
+# Player state codes, unknown states are stored as UNKNOWN_CODE
+STATE_CODES = ["waiting", "ready", "betting", "playing", "stand",
+               "busted", "blackjack", "five_dragon", "spectating"]
+# AI difficulty codes, human players are stored as 0
+DIFFICULTY_CODES = [None, "easy", "medium", "hard", "expert"]
+UNKNOWN_CODE = 255
+
+
+def _padded(size):
+    """Round a byte size up to the column alignment"""
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _clamp_byte(value):
+    """Clamp an integer into the unsigned byte range"""
+    return max(0, min(int(value or 0), 254))
+
+
+class RecordColumnBuilder:
+    """Collect game records into column arrays and a string dictionary"""
+    
+    def __init__(self, strings=None):
+        """
+        Initialize empty columns
+        
+        Args:
+            strings (RecordColumnBuilder, optional): Builder whose string dictionary is shared,
+                so the rows of both use the same indexes
+        """
+        self.columns = {name: array(typecode) for name, typecode, _, _ in COLUMNS}
+        if strings is None:
+            self.rooms = []  # room index -> room ID
+            self.room_names = []  # room index -> room name
+            self.players = []  # player index -> player name
+            self._room_index = {}
+            self._player_index = {}
+        else:
+            self.rooms, self.room_names, self.players = strings.rooms, strings.room_names, strings.players
+            self._room_index, self._player_index = strings._room_index, strings._player_index
+        self.row_count = 0
+    
+    def _get_room_index(self, room_id, room_name):
+        """Get (or assign) the dictionary index of a room"""
+        if room_id not in self._room_index:
+            self._room_index[room_id] = len(self.rooms)
+            self.rooms.append(room_id)
+            self.room_names.append(room_name)
+        return self._room_index[room_id]
+    
+    def remap(self, strings):
+        """
+        Get index maps from another string dictionary into this one
+        
+        Args:
+            strings (dict): String dictionary as returned by get_strings
+        
+        Returns:
+            tuple: NumPy arrays mapping the other room and player indexes to this builder's
+        """
+        rooms = [self._get_room_index(room_id, room_name)
+                 for room_id, room_name in zip(strings["rooms"], strings["room_names"])]
+        players = [self._get_player_index(player_name) for player_name in strings["players"]]
+        return np.array(rooms, dtype="<u4"), np.array(players, dtype="<u4")
+    
+    def _get_player_index(self, player_name):
+        """Get (or assign) the dictionary index of a player name"""
+        if player_name not in self._player_index:
+            self._player_index[player_name] = len(self.players)
+            self.players.append(player_name)
+        return self._player_index[player_name]
+    
+    def add_record(self, record):
+        """
+        Add one JSON game record, producing a row per recorded player
+        
+        Args:
+            record (dict): Record as written by GameRecord.add_game_record
+        """
+        room = self._get_room_index(record.get("room_id", ""), record.get("room_name", ""))
+        timestamp = float(record.get("timestamp", 0))
+        dealer_score = _clamp_byte(record.get("dealer_score"))
+        
+        dealer_cards = [NO_CARD] * MAX_DEALER_CARDS
+        for i, card in enumerate(record.get("dealer_cards", [])[:MAX_DEALER_CARDS]):
+            dealer_cards[i] = Card(card.get("suit"), card.get("value")).code
+        
+        for player_info in record.get("players", {}).values():
+            state = player_info.get("state")
+            difficulty = player_info.get("ai_difficulty")
+            
+            columns = self.columns
+            columns["timestamp"].append(timestamp)
+            columns["room"].append(room)
+            columns["player"].append(self._get_player_index(player_info.get("name", "")))
+            columns["bet"].append(int(player_info.get("bet", 0)))
+            columns["win_loss"].append(int(player_info.get("win_loss", 0)))
+            columns["state"].append(STATE_CODES.index(state) if state in STATE_CODES else UNKNOWN_CODE)
+            columns["score"].append(_clamp_byte(player_info.get("score")))
+            columns["dealer_score"].append(dealer_score)
+            columns["ai_difficulty"].append(
+                DIFFICULTY_CODES.index(difficulty) if difficulty in DIFFICULTY_CODES else UNKNOWN_CODE)
+            columns["dealer_cards"].extend(dealer_cards)
+            self.row_count += 1
+    
+    def add_records(self, records):
+        """
+        Add several JSON game records
+        
+        Args:
+            records (iterable): Records as written by GameRecord.add_game_record
+        """
+        for record in records:
+            self.add_record(record)
+    
+    def get_strings(self):
+        """
+        Get the string dictionary
+        
+        Returns:
+            dict: Room ids, room names and player names by index
+        """
+        return {"rooms": self.rooms, "room_names": self.room_names, "players": self.players}
+    
+    def to_numpy(self):
+        """
+        Convert the collected columns to NumPy arrays
+        
+        Returns:
+            dict: Column name -> NumPy array
+        """
+        if np is None:
+            raise ImportError("NumPy is required to load record columns")
+        
+        result = {}
+        for name, _, dtype, width in COLUMNS:
+            values = np.frombuffer(self.columns[name], dtype=np.dtype(dtype).newbyteorder("="))
+            result[name] = values.reshape(-1, width) if width > 1 else values
+        return result
+    
+    def write(self, path):
+        """
+        Write the columns and the string dictionary to disk
+        
+        Args:
+            path (str): Data file path
+        """
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS), self.row_count))
+            f.write(b"\0" * (_padded(HEADER.size) - HEADER.size))
+            for name, _, _, _ in COLUMNS:
+                column = self.columns[name]
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                data = column.tobytes()
+                f.write(data)
+                f.write(b"\0" * (_padded(len(data)) - len(data)))
+        
+        with open(path + ".strings.json", "w", encoding="utf-8") as f:
+            json.dump(self.get_strings(), f, ensure_ascii=False)
+
+
+def iter_json_records(data_dir):
+    """
+    Iterate all JSON game records in a records directory, archived segments
+    included
+    
+    Args:
+        data_dir (str): Records directory
+    
+    Yields:
+        dict: Game record
+    """
+    return GameRecord(data_dir).iter_records()
+
+
+def export_json_records(data_dir, output_path):
+    """
+    Export the JSON game records of a directory to the columnar format
+    
+    Args:
+        data_dir (str): Directory with room_<id>.json files
+        output_path (str): Data file path to write
+    
+    Returns:
+        int: Number of rows written
+    """
+    builder = RecordColumnBuilder()
+    builder.add_records(iter_json_records(data_dir))
+    builder.write(output_path)
+    return builder.row_count
+
+
+class ColumnarRecordReader:
+    """Memory-mapped reader exposing record columns as NumPy arrays"""
+    
+    def __init__(self, path):
+        """
+        Open a columnar record file
+        
+        Args:
+            path (str): Data file path
+        """
+        if np is None:
+            raise ImportError("NumPy is required to read record columns")
+        
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, column_count, self.row_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or column_count != len(COLUMNS):
+            self.close()
+            raise ValueError(f"Unsupported record column file: {path}")
+        
+        # Column offsets follow from the row count alone
+        self._offsets = {}
+        offset = _padded(HEADER.size)
+        for name, _, dtype, width in COLUMNS:
+            self._offsets[name] = offset
+            offset += _padded(np.dtype(dtype).itemsize * width * self.row_count)
+        
+        with open(path + ".strings.json", "r", encoding="utf-8") as f:
+            self.strings = json.load(f)
+    
+    def column(self, name):
+        """
+        Get one column as a read-only NumPy view of the mapped file
+        
+        Args:
+            name (str): Column name
+        
+        Returns:
+            numpy.ndarray: Column values, 2-D for multi-value columns
+        """
+        for column_name, _, dtype, width in COLUMNS:
+            if column_name == name:
+                values = np.frombuffer(self._mmap, dtype=dtype, count=self.row_count * width,
+                                       offset=self._offsets[name])
+                return values.reshape(-1, width) if width > 1 else values
+        raise KeyError(name)
+    
+    def columns(self):
+        """
+        Get all columns
+        
+        Returns:
+            dict: Column name -> NumPy array
+        """
+        return {name: self.column(name) for name, _, _, _ in COLUMNS}
+    
+    def close(self):
+        """
+        Close the mapping
+        
+        Arrays returned by column() must be released before closing.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export JSON game records to the columnar format")
+    parser.add_argument("output", help="Data file to write")
+    parser.add_argument("--data-dir", default="game_records", help="Directory with JSON room records")
+    args = parser.parse_args()
+    
+    rows = export_json_records(args.data_dir, args.output)
+    print(f"Exported {rows} rows to {args.output}")
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Room Index: Lobby summaries of all rooms, indexed for /api/rooms queries
+
+The index is a room registry listener, so it is updated once per room change
+instead of on every request. Rooms are kept in room ID order for cursors and
+indexed by game state, free seats and lower-cased name for the filters.
+Live and hibernated rooms are indexed alike, except that only live rooms
+with a free seat are bucketed for quick join, by game state and free seats
+not reserved by quick join. Reserving or releasing a seat moves the room to
+another bucket, so a free seat is found without looking at full rooms.
+
+Every visible change increments the generation, which identifies the room
+list for ETags. Serialized responses are cached for the current generation.
+"""
+import uuid
+import heapq
+import bisect
+import threading
+
+# Serialized responses kept for the current generation
+RESPONSE_CACHE_SIZE = 128
+
+
+class RoomIndex:
+    """Maintained lobby summaries with state, free seat and name indexes"""
+    
+    def __init__(self, game_rooms, hibernated_rooms):
+        """
+        Initialize room index and register it with the room registry
+        
+        Args:
+            game_rooms (RoomRegistry): Live rooms
+            hibernated_rooms (dict): Lobby stubs of hibernated rooms
+        """
+        self.game_rooms = game_rooms
+        self.hibernated_rooms = hibernated_rooms
+        self.lock = threading.Lock()
+        self.summaries = {}  # room_id -> summary
+        self.room_ids = []  # Sorted room IDs
+        self.by_state = {}  # game_state -> room IDs
+        self.by_free_seats = {}  # free seats -> room IDs
+        self.names = []  # Sorted (lower-cased name, room_id)
+        self.live = set()  # IDs of indexed rooms that are not hibernated
+        self.reserved = {}  # room_id -> seats reserved by quick join
+        self.joinable = {}  # (game_state, unreserved free seats) -> IDs of live rooms with such a seat
+        self.joinable_keys = {}  # room_id -> joinable bucket the room is in
+        # A restarted server must not match ETags handed out by the previous one
+        self.epoch = uuid.uuid4().hex[:8]
+        self.generation = 0
+        self.responses = {}
+        game_rooms.add_listener(self.update)
+        for room_id in list(game_rooms) + list(hibernated_rooms):
+            self.update(room_id)
+    
+    def lookup(self, room_id):
+        """
+        Build a room's current lobby summary
+        
+        Args:
+            room_id (str): Room ID
+        
+        Returns:
+            dict: Room summary, None if the room is neither live nor hibernated
+        """
+        game_room = self.game_rooms.get(room_id)
+        if game_room is not None:
+            return game_room.summary()
+        stub = self.hibernated_rooms.get(room_id)
+        if stub is not None:
+            return {key: stub[key] for key in ("room_id", "room_name", "player_count", "max_players", "game_state")}
+        return None
+    
+    def get(self, room_id):
+        """Get a room's indexed summary, None if not indexed"""
+        return self.summaries.get(room_id)
+    
+    @staticmethod
+    def free_seats(summary):
+        """Get the number of free seats of a room summary"""
+        return max(0, summary["max_players"] - summary["player_count"])
+    
+    def update(self, room_id):
+        """
+        Re-index a room, registry listener
+        
+        Args:
+            room_id (str): ID of a room that was added, removed or changed
+        """
+        with self.lock:
+            summary = self.lookup(room_id)
+            live = room_id in self.game_rooms
+            previous = self.summaries.get(room_id)
+            if summary == previous and live == (room_id in self.live):
+                return
+            if previous is not None:
+                self._remove(previous)
+            if summary is not None:
+                self._add(summary, live)
+            else:
+                self.reserved.pop(room_id, None)
+            self.generation += 1
+            self.responses.clear()
+    
+    def _add(self, summary, live):
+        room_id = summary["room_id"]
+        free_seats = self.free_seats(summary)
+        self.summaries[room_id] = summary
+        bisect.insort(self.room_ids, room_id)
+        self.by_state.setdefault(summary["game_state"], set()).add(room_id)
+        self.by_free_seats.setdefault(free_seats, set()).add(room_id)
+        bisect.insort(self.names, (summary["room_name"].lower(), room_id))
+        if live:
+            self.live.add(room_id)
+            self._bucket(room_id)
+    
+    def _remove(self, summary):
+        room_id = summary["room_id"]
+        del self.summaries[room_id]
+        del self.room_ids[bisect.bisect_left(self.room_ids, room_id)]
+        for index, key in ((self.by_state, summary["game_state"]),
+                           (self.by_free_seats, self.free_seats(summary))):
+            index[key].discard(room_id)
+            if not index[key]:
+                del index[key]
+        del self.names[bisect.bisect_left(self.names, (summary["room_name"].lower(), room_id))]
+        self.live.discard(room_id)
+        self._unbucket(room_id)
+    
+    def _bucket(self, room_id):
+        """File a live room in the joinable bucket of its unreserved free seats"""
+        self._unbucket(room_id)
+        summary = self.summaries[room_id]
+        free_seats = self.free_seats(summary) - self.reserved.get(room_id, 0)
+        if free_seats > 0:
+            key = (summary["game_state"], free_seats)
+            self.joinable.setdefault(key, set()).add(room_id)
+            self.joinable_keys[room_id] = key
+    
+    def _unbucket(self, room_id):
+        """Take a room out of the joinable buckets"""
+        key = self.joinable_keys.pop(room_id, None)
+        if key is not None:
+            self.joinable[key].discard(room_id)
+            if not self.joinable[key]:
+                del self.joinable[key]
+    
+    def set_reserved(self, room_id, seats):
+        """
+        Record the seats quick join holds in a room
+        
+        Args:
+            room_id (str): Room ID
+            seats (int): Unexpired, unclaimed reservations
+        """
+        with self.lock:
+            if seats:
+                self.reserved[room_id] = seats
+            else:
+                self.reserved.pop(room_id, None)
+            if room_id in self.live:
+                self._bucket(room_id)
+    
+    def etag(self, generation):
+        """Get the ETag of a generation"""
+        return f"rooms-{self.epoch}-{generation}"
+    
+    def _matching(self, states, min_free_seats, name_prefix):
+        """Get the IDs of the rooms matching the filters, None if there are no filters"""
+        candidates = []
+        if states is not None:
+            candidates.append(set().union(*(self.by_state.get(state, ()) for state in states)))
+        if min_free_seats is not None:
+            candidates.append(set().union(*(room_ids for free, room_ids in self.by_free_seats.items()
+                                            if free >= min_free_seats)))
+        if name_prefix is not None:
+            prefix = name_prefix.lower()
+            start = bisect.bisect_left(self.names, (prefix,))
+            end = bisect.bisect_left(self.names, (prefix + "\U0010ffff",))
+            candidates.append({room_id for _, room_id in self.names[start:end]})
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
+    
+    def query(self, states=None, min_free_seats=None, name_prefix=None, cursor=None, limit=None):
+        """
+        Get one page of room summaries in room ID order
+        
+        Args:
+            states (list, optional): Game states to include
+            min_free_seats (int, optional): Fewest free seats a room must have
+            name_prefix (str, optional): Case-insensitive room name prefix
+            cursor (str, optional): Return rooms after this room ID
+            limit (int, optional): Page size, all matching rooms if not given
+        
+        Returns:
+            dict: Page with rooms, total matching rooms, whether more rooms exist,
+                the cursor of the next page and the generation it was read at
+        """
+        with self.lock:
+            matching = self._matching(states, min_free_seats, name_prefix)
+            if matching is None:
+                total = len(self.room_ids)
+                start = 0 if cursor is None else bisect.bisect_right(self.room_ids, cursor)
+                end = len(self.room_ids) if limit is None else start + limit + 1
+                page = self.room_ids[start:end]
+            else:
+                total = len(matching)
+                if cursor is not None:
+                    matching = [room_id for room_id in matching if room_id > cursor]
+                page = sorted(matching) if limit is None else heapq.nsmallest(limit + 1, matching)
+            has_more = limit is not None and len(page) > limit
+            if has_more:
+                page = page[:limit]
+            return {
+                "rooms": [self.summaries[room_id] for room_id in page],
+                "count": len(page),
+                "total": total,
+                "has_more": has_more,
+                # Pass as cursor= for the next page
+                "next_cursor": page[-1] if has_more else None,
+                "generation": self.generation
+            }
+    
+    def find_joinable(self, states):
+        """
+        Find a live room with a free seat that is not reserved
+        
+        Looks at the joinable buckets of each state in preference order,
+        fullest rooms first so tables fill up. Every room in a bucket has a
+        seat, so no room is looked at and skipped.
+        
+        Args:
+            states (list): Game states to consider, most preferred first
+        
+        Returns:
+            str: Room ID, None if no room has a seat
+        """
+        with self.lock:
+            max_free = max((free for _, free in self.joinable), default=0)
+            for state in states:
+                for free in range(1, max_free + 1):
+                    room_ids = self.joinable.get((state, free))
+                    if room_ids:
+                        return next(iter(room_ids))
+            return None
+    
+    def cached_response(self, key, build):
+        """
+        Get a serialized response, building it once per generation
+        
+        Args:
+            key (str): Normalized query
+            build (callable): Returns (generation, body) for the query
+        
+        Returns:
+            tuple: Generation the body was built at and response body
+        """
+        with self.lock:
+            cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        generation, body = build()
+        with self.lock:
+            # A body built while the rooms changed is not cached
+            if generation == self.generation:
+                if len(self.responses) >= RESPONSE_CACHE_SIZE:
+                    self.responses.clear()
+                self.responses[key] = (generation, body)
+        return generation, body
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Room Reaper: Hibernate or remove players and rooms nobody came back to
+
+Rooms whose human players all disconnected are hibernated to disk after
+ROOM_HIBERNATE_AFTER seconds, so the players keep their seats, chips and
+even an unfinished round; snapshots are deleted after ROOM_SNAPSHOT_TTL.
+With hibernation disabled, disconnected players keep their seat for
+ROOM_RECONNECT_GRACE seconds. After that they are removed from their room
+together with their session entries. Rooms without human players are
+deleted once they have been idle for ROOM_IDLE_TTL seconds, or right away
+when their last human was removed.
+"""
+import sys
+import time
+import types
+import logging
+from collections import deque
+
+from config import ROOM_RECONNECT_GRACE, ROOM_IDLE_TTL, ROOM_HIBERNATE_AFTER, ROOM_SNAPSHOT_TTL
+from utils.metrics import ROOMS_REAPED, REAPED_BYTES, PLAYERS_EVICTED
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(obj):
+    """
+    Estimate the memory held by an object and everything it references
+    
+    Follows dicts, sequences, sets and instance attributes, counting shared
+    objects once.
+    
+    Args:
+        obj (object): Root object
+    
+    Returns:
+        int: Size in bytes
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, (type, types.ModuleType)):
+            pending.append(current.__dict__)
+    return size
+
+
+class RoomReaper:
+    """Idle-room and stale-session garbage collector"""
+    
+    def __init__(self, reconnect_grace=ROOM_RECONNECT_GRACE, idle_ttl=ROOM_IDLE_TTL,
+                 hibernate_after=ROOM_HIBERNATE_AFTER, snapshot_ttl=ROOM_SNAPSHOT_TTL):
+        """
+        Initialize reaper
+        
+        Args:
+            reconnect_grace (float, optional): Seconds a disconnected player keeps their seat
+            idle_ttl (float, optional): Seconds a room without human players is kept after its last activity
+            hibernate_after (float, optional): Seconds of inactivity before a room whose humans all
+                disconnected is hibernated, None to disable hibernation
+            snapshot_ttl (float, optional): Seconds a hibernated room is kept
+        """
+        self.reconnect_grace = reconnect_grace
+        self.idle_ttl = idle_ttl
+        self.hibernate_after = hibernate_after
+        self.snapshot_ttl = snapshot_ttl
+    
+    def should_hibernate(self, game_room, now):
+        """
+        Check whether a room should be hibernated
+        
+        Only rooms whose human players are all disconnected qualify, so no
+        connected client loses its live room. The AI players of such rooms
+        are not driven, so the room state does not change until revival.
+        
+        Args:
+            game_room (GameRoom): Room to check
+            now (float): Current time
+            
+        Returns:
+            bool: Whether the room should be hibernated
+        """
+        if self.hibernate_after is None:
+            return False
+        humans = [p for p in game_room.players.values() if not p.is_ai]
+        if not humans or any(not p.is_disconnected for p in humans):
+            return False
+        last_seen = max([game_room.last_activity] + [p.disconnected_at or 0 for p in humans])
+        return now - last_seen >= self.hibernate_after
+    
+    def evict_player(self, game_room, player):
+        """
+        Remove a disconnected player and their session entries
+        
+        Args:
+            game_room (GameRoom): Player's room
+            player (Player): Player to remove
+        """
+        from models import player_sessions
+        from app import socketio
+        
+        # Stand first if the round is waiting for this player, as on disconnect
+        if (game_room.game_state == "playing" and game_room.player_order and
+                game_room.player_order[game_room.current_player_index] == player.player_id):
+            game_room.player_stand(player.player_id)
+        game_room.remove_player(player.player_id)
+        if player.session_id:
+            game_room.session_states.pop(player.session_id, None)
+            if player_sessions.get(player.session_id) == player.player_id:
+                player_sessions.pop(player.session_id, None)
+        PLAYERS_EVICTED.inc()
+        logger.info("Removed player %s from room %s after reconnection grace period",
+                    player.name, game_room.room_id)
+        
+        # The round may have been waiting for this player's bet only
+        if game_room.game_state == "betting":
+            active_players = [p for p in game_room.players.values()
+                              if (p.money > 0 or p.current_bet > 0) and p.state != "spectating"]
+            if active_players and not any(p.state == "betting" for p in active_players):
+                game_room.start_game()
+        
+        socketio.emit('player_left', {"player_id": player.player_id}, room=game_room.room_id)
+        socketio.emit('game_update', game_room.to_dict(), room=game_room.room_id)
+    
+    def reap(self, now=None):
+        """
+        Run one pass over all rooms
+        
+        Args:
+            now (float, optional): Current time, time.time() if not given
+        
+        Returns:
+            dict: Numbers of evicted players, reaped and hibernated rooms, and estimated bytes reclaimed
+        """
+        from models import game_rooms, hibernated_rooms, release_room, hibernate_room, room_store
+        
+        if now is None:
+            now = time.time()
+        result = {"evicted_players": 0, "reaped_rooms": 0, "reclaimed_bytes": 0, "hibernated_rooms": 0}
+        
+        for room_id, game_room in list(game_rooms.items()):
+            if self.should_hibernate(game_room, now):
+                size = estimate_size(game_room)
+                if hibernate_room(room_id):
+                    result["hibernated_rooms"] += 1
+                    result["reclaimed_bytes"] += size
+                    REAPED_BYTES.inc(size)
+                    continue
+            
+            expired = [p for p in list(game_room.players.values())
+                       if p.is_disconnected and not p.is_ai and p.disconnected_at is not None
+                       and now - p.disconnected_at >= self.reconnect_grace]
+            for player in expired:
+                self.evict_player(game_room, player)
+            result["evicted_players"] += len(expired)
+            
+            if any(not p.is_ai for p in game_room.players.values()):
+                continue
+            if expired:
+                reason = "abandoned"
+            elif now - game_room.last_activity >= self.idle_ttl:
+                reason = "idle"
+            else:
+                continue
+            
+            size = estimate_size(game_room)
+            release_room(room_id)
+            ROOMS_REAPED.inc(reason=reason)
+            REAPED_BYTES.inc(size)
+            result["reaped_rooms"] += 1
+            result["reclaimed_bytes"] += size
+            logger.info("Reaped %s room %s (about %s bytes)", reason, room_id, size)
+        
+        for room_id, stub in list(hibernated_rooms.items()):
+            if now - stub["hibernated_at"] >= self.snapshot_ttl:
+                hibernated_rooms.pop(room_id, None)
+                room_store.delete(room_id)
+                game_rooms.notify(room_id)
+                ROOMS_REAPED.inc(reason="snapshot_expired")
+                result["reaped_rooms"] += 1
+                logger.info("Deleted hibernated room %s", room_id)
+        
+        return result
+
+
+# Create global room reaper instance
+room_reaper = RoomReaper()
\ No newline at end of file
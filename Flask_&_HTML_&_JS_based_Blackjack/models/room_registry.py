@@ -0,0 +1,70 @@
+"""
+Room Registry: Dict of live game rooms that reports changed rooms
+
+Listeners are called with the ID of a room that was added, removed, or whose
+lobby summary (player count, game state) may have changed. They only get the
+ID and look up the current state themselves, so a burst of changes can be
+coalesced and the room's final state used.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RoomRegistry(dict):
+    """room_id -> GameRoom dict notifying listeners of changes"""
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize registry"""
+        super().__init__(*args, **kwargs)
+        self.listeners = []
+    
+    def add_listener(self, listener):
+        """
+        Register a change listener
+        
+        Args:
+            listener (callable): Called with the room ID of every change
+        """
+        self.listeners.append(listener)
+    
+    def notify(self, room_id):
+        """
+        Tell listeners that a room changed
+        
+        Also used for changes outside the registry, e.g. hibernated rooms.
+        
+        Args:
+            room_id (str): Room ID
+        """
+        for listener in self.listeners:
+            try:
+                listener(room_id)
+            except Exception as e:
+                logger.error("Room registry listener error: %s", e)
+    
+    def room_changed(self, game_room):
+        """
+        Tell listeners that a registered room's summary may have changed
+        
+        Args:
+            game_room (GameRoom): Changed room, ignored if not registered
+        """
+        if self.get(game_room.room_id) is game_room:
+            self.notify(game_room.room_id)
+    
+    def __setitem__(self, room_id, game_room):
+        super().__setitem__(room_id, game_room)
+        self.notify(room_id)
+    
+    def __delitem__(self, room_id):
+        super().__delitem__(room_id)
+        self.notify(room_id)
+    
+    def pop(self, room_id, *default):
+        """Remove a room, notifying listeners if it was registered"""
+        registered = room_id in self
+        game_room = super().pop(room_id, *default)
+        if registered:
+            self.notify(room_id)
+        return game_room
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Room Store: Gzip compressed snapshots of hibernated rooms
+
+A snapshot holds the complete room state written by GameRoom.to_snapshot
+(a few hundred bytes for a typical room). The lobby lists hibernated rooms
+from lightweight stubs kept in memory, the snapshot is only read when the
+room is revived.
+"""
+import os
+import json
+import gzip
+import logging
+
+from config import ROOM_SNAPSHOT_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def make_stub(snapshot, hibernated_at):
+    """
+    Build the lobby stub of a hibernated room
+    
+    Args:
+        snapshot (dict): Room snapshot
+        hibernated_at (float): Hibernation time
+    
+    Returns:
+        dict: Room fields shown in the lobby and the hibernation time
+    """
+    return {
+        "room_id": snapshot["room_id"],
+        "room_name": snapshot["room_name"],
+        "player_count": len(snapshot["players"]),
+        "max_players": snapshot["max_players"],
+        "game_state": snapshot["game_state"],
+        "hibernated_at": hibernated_at
+    }
+
+
+class RoomStore:
+    """Room snapshot storage"""
+    
+    def __init__(self, snapshot_dir=ROOM_SNAPSHOT_DIR):
+        """
+        Initialize room store
+        
+        Args:
+            snapshot_dir (str): Directory of the snapshot files
+        """
+        self.snapshot_dir = snapshot_dir
+    
+    def get_snapshot_file(self, room_id):
+        """Get room snapshot file path"""
+        return os.path.join(self.snapshot_dir, f"room_{room_id}.json.gz")
+    
+    def save(self, snapshot):
+        """
+        Write a room snapshot
+        
+        Args:
+            snapshot (dict): Room snapshot
+        
+        Returns:
+            bool: Whether the snapshot was written
+        """
+        try:
+            if not os.path.exists(self.snapshot_dir):
+                os.makedirs(self.snapshot_dir)
+            path = self.get_snapshot_file(snapshot["room_id"])
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+            return True
+        except Exception as e:
+            logger.error("Error saving room snapshot: %s", e)
+            return False
+    
+    def load(self, room_id):
+        """
+        Read a room snapshot
+        
+        Args:
+            room_id (str): Room ID
+        
+        Returns:
+            dict: Room snapshot, None if missing or unreadable
+        """
+        try:
+            with gzip.open(self.get_snapshot_file(room_id), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error("Error loading room snapshot: %s", e)
+            return None
+    
+    def delete(self, room_id):
+        """Delete a room snapshot"""
+        try:
+            os.remove(self.get_snapshot_file(room_id))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error("Error deleting room snapshot: %s", e)
+    
+    def load_stubs(self):
+        """
+        Build the stubs of the snapshots left by an earlier run
+        
+        Returns:
+            dict: Room ID -> stub
+        """
+        stubs = {}
+        if not os.path.exists(self.snapshot_dir):
+            return stubs
+        for filename in os.listdir(self.snapshot_dir):
+            if not (filename.startswith("room_") and filename.endswith(".json.gz")):
+                continue
+            room_id = filename[len("room_"):-len(".json.gz")]
+            snapshot = self.load(room_id)
+            if snapshot is not None:
+                hibernated_at = os.path.getmtime(self.get_snapshot_file(room_id))
+                stubs[room_id] = make_stub(snapshot, hibernated_at)
+        return stubs
+
+
+# Create global room store instance
+room_store = RoomStore()
\ No newline at end of file
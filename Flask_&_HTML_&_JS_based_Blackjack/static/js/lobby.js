@@ -3,6 +3,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const playerNameInput = document.getElementById('player-name');
     const roomNameInput = document.getElementById('room-name');
     const createRoomBtn = document.getElementById('create-room-btn');
+    const quickJoinBtn = document.getElementById('quick-join-btn');
     const refreshBtn = document.getElementById('refresh-btn');
     const roomsContainer = document.getElementById('rooms-container');
     
@@ -12,19 +13,101 @@ document.addEventListener('DOMContentLoaded', () => {
         playerNameInput.value = savedPlayerName;
     }
     
-    // Get room list
+    // Room list, room_id -> room, kept up to date by the lobby channel
+    let rooms = new Map();
+    // Version of the lobby list, null while not subscribed
+    let lobbyVersion = null;
+    let pollTimer = null;
+    let socket = null;
+    
+    // Get room list over HTTP
     async function fetchRooms() {
         try {
             const response = await fetch('/api/rooms');
-            const rooms = await response.json();
+            const roomList = await response.json();
             
-            displayRooms(rooms);
+            rooms = new Map(roomList.map(room => [room.room_id, room]));
+            displayRooms(roomList);
         } catch (error) {
             console.error('Failed to get room list:', error);
             roomsContainer.innerHTML = '<div class="error">Failed to get room list, please try again</div>';
         }
     }
     
+    // Poll the HTTP API while the lobby channel is unavailable
+    function startPolling() {
+        if (!pollTimer) {
+            fetchRooms();
+            pollTimer = setInterval(fetchRooms, 10000);
+        }
+    }
+    
+    function stopPolling() {
+        if (pollTimer) {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+    }
+    
+    // Apply one lobby_delta change to the room list
+    function applyChange(change) {
+        if (change.type === 'created') {
+            rooms.set(change.room.room_id, change.room);
+        } else if (change.type === 'removed') {
+            rooms.delete(change.room_id);
+        } else if (change.type === 'updated' && rooms.has(change.room_id)) {
+            const room = rooms.get(change.room_id);
+            room.player_count = change.player_count;
+            room.game_state = change.game_state;
+        }
+    }
+    
+    // Subscribe to the lobby channel: a snapshot, then batched deltas
+    function connectLobby() {
+        socket = io();
+        
+        socket.on('connect', () => {
+            socket.emit('subscribe_lobby');
+        });
+        
+        socket.on('disconnect', () => {
+            lobbyVersion = null;
+            startPolling();
+        });
+        
+        socket.on('quick_join_result', (data) => {
+            joinRoom(data.room_id, data.reservation);
+        });
+        
+        // Quick join refused, e.g. while the server is busy
+        socket.on('error', (data) => {
+            alert('Quick join failed: ' + data.message);
+        });
+        
+        socket.on('lobby_snapshot', (data) => {
+            stopPolling();
+            lobbyVersion = data.version;
+            rooms = new Map(data.rooms.map(room => [room.room_id, room]));
+            displayRooms(Array.from(rooms.values()));
+        });
+        
+        socket.on('lobby_delta', (data) => {
+            // Ignore deltas before the snapshot or already contained in it
+            if (lobbyVersion === null || data.version <= lobbyVersion) {
+                return;
+            }
+            // A delta was missed, get a new snapshot
+            if (data.version !== lobbyVersion + 1) {
+                lobbyVersion = null;
+                socket.emit('subscribe_lobby');
+                return;
+            }
+            data.changes.forEach(applyChange);
+            lobbyVersion = data.version;
+            displayRooms(Array.from(rooms.values()));
+        });
+    }
+    
     // Display room list
     function displayRooms(rooms) {
         if (rooms.length === 0) {
@@ -42,6 +125,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         <p>Status: ${getGameStateText(room.game_state)}</p>
                     </div>
                     <button class="btn primary-btn join-room-btn" data-room-id="${room.room_id}">Join</button>
+                    <a class="btn secondary-btn" href="/room/${room.room_id}?spectate=1">Watch</a>
                 </div>
             `;
         });
@@ -104,8 +188,36 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
-    // Join room
-    function joinRoom(roomId) {
+    // Quick join: the server reserves a seat, over the lobby channel if connected
+    async function quickJoin() {
+        const playerName = playerNameInput.value.trim();
+        if (!playerName) {
+            alert('Please enter your name');
+            return;
+        }
+        
+        if (socket && socket.connected) {
+            socket.emit('quick_join');
+            return;
+        }
+        
+        try {
+            const response = await fetch('/api/quick-join', { method: 'POST' });
+            const data = await response.json();
+            
+            if (data.success) {
+                joinRoom(data.room_id, data.reservation);
+            } else {
+                alert('Quick join failed: ' + (data.message || 'Unknown error'));
+            }
+        } catch (error) {
+            console.error('Error joining quickly:', error);
+            alert('Quick join failed, please try again');
+        }
+    }
+    
+    // Join room, with the seat reservation of a quick join
+    function joinRoom(roomId, reservation) {
         const playerName = playerNameInput.value.trim();
         if (!playerName) {
             alert('Please enter your name');
@@ -116,16 +228,28 @@ document.addEventListener('DOMContentLoaded', () => {
         localStorage.setItem('playerName', playerName);
         
         // Redirect to room page
-        window.location.href = `/room/${roomId}`;
+        const query = reservation ? `?reservation=${encodeURIComponent(reservation)}` : '';
+        window.location.href = `/room/${roomId}${query}`;
+    }
+    
+    // Refresh: a new snapshot when subscribed, otherwise the HTTP API
+    function refreshRooms() {
+        if (socket && socket.connected) {
+            lobbyVersion = null;
+            socket.emit('subscribe_lobby');
+        } else {
+            fetchRooms();
+        }
     }
     
     // Add event listeners
     createRoomBtn.addEventListener('click', createRoom);
-    refreshBtn.addEventListener('click', fetchRooms);
-    
-    // Initially load room list
-    fetchRooms();
+    quickJoinBtn.addEventListener('click', quickJoin);
+    refreshBtn.addEventListener('click', refreshRooms);
     
-    // Auto refresh room list (every 10 seconds)
-    setInterval(fetchRooms, 10000);
+    // Load room list over HTTP until the lobby channel delivers its snapshot
+    startPolling();
+    if (typeof io !== 'undefined') {
+        connectLobby();
+    }
 });
\ No newline at end of file
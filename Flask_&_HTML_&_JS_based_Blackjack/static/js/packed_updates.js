@@ -0,0 +1,134 @@
+// 打包的 game_update 格式，与 utils/packed_updates.py 保持一致
+const PACKED_VERSION = 2;
+const HIDDEN_CARD = 52;
+const CARD_SUITS = ['♥', '♦', '♣', '♠'];
+const CARD_VALUES = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K'];
+const GAME_STATES = ['waiting', 'betting', 'playing', 'dealer_turn', 'game_over'];
+const PLAYER_STATES = ['waiting', 'ready', 'betting', 'playing', 'stand', 'busted', 'blackjack',
+                       'five_dragon', 'spectating'];
+const AI_DIFFICULTIES = ['easy', 'medium', 'hard', 'expert'];
+
+// MessagePack 解码，支持打包更新用到的全部类型
+function decodeMsgpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    const textDecoder = new TextDecoder();
+    let offset = 0;
+    
+    function take(length) {
+        const start = offset;
+        offset += length;
+        return start;
+    }
+    function readString(length) {
+        const start = take(length);
+        return textDecoder.decode(bytes.subarray(start, start + length));
+    }
+    function readBinary(length) {
+        const start = take(length);
+        return bytes.slice(start, start + length);
+    }
+    function readArray(length) {
+        const result = [];
+        for (let i = 0; i < length; i++) {
+            result.push(read());
+        }
+        return result;
+    }
+    function readMap(length) {
+        const result = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            result[key] = read();
+        }
+        return result;
+    }
+    function read() {
+        const type = bytes[take(1)];
+        if (type <= 0x7f) return type;
+        if (type >= 0xe0) return type - 0x100;
+        if ((type & 0xe0) === 0xa0) return readString(type & 0x1f);
+        if ((type & 0xf0) === 0x90) return readArray(type & 0x0f);
+        if ((type & 0xf0) === 0x80) return readMap(type & 0x0f);
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return readBinary(view.getUint8(take(1)));
+            case 0xc5: return readBinary(view.getUint16(take(2)));
+            case 0xc6: return readBinary(view.getUint32(take(4)));
+            case 0xca: return view.getFloat32(take(4));
+            case 0xcb: return view.getFloat64(take(8));
+            case 0xcc: return view.getUint8(take(1));
+            case 0xcd: return view.getUint16(take(2));
+            case 0xce: return view.getUint32(take(4));
+            case 0xcf: return Number(view.getBigUint64(take(8)));
+            case 0xd0: return view.getInt8(take(1));
+            case 0xd1: return view.getInt16(take(2));
+            case 0xd2: return view.getInt32(take(4));
+            case 0xd3: return Number(view.getBigInt64(take(8)));
+            case 0xd9: return readString(view.getUint8(take(1)));
+            case 0xda: return readString(view.getUint16(take(2)));
+            case 0xdb: return readString(view.getUint32(take(4)));
+            case 0xdc: return readArray(view.getUint16(take(2)));
+            case 0xdd: return readArray(view.getUint32(take(4)));
+            case 0xde: return readMap(view.getUint16(take(2)));
+            case 0xdf: return readMap(view.getUint32(take(4)));
+        }
+        throw new Error(`不支持的 MessagePack 类型 0x${type.toString(16)}`);
+    }
+    return read();
+}
+
+// 枚举下标还原为字符串，不在列表中的值以字符串发送
+function enumValue(values, value) {
+    return typeof value === 'number' ? values[value] : value;
+}
+
+function unpackPlayer(values) {
+    const [playerId, name, hand, score, money, currentBet, state, isAi, aiDifficulty, isDisconnected] = values;
+    return {
+        player_id: playerId,
+        name: name,
+        hand: hand.map(code => code === HIDDEN_CARD
+            ? { suit: '?', value: '?' }
+            : { suit: CARD_SUITS[Math.floor(code / 13)], value: CARD_VALUES[code % 13] }),
+        score: score,
+        money: money,
+        current_bet: currentBet,
+        state: enumValue(PLAYER_STATES, state),
+        is_ai: isAi,
+        ai_difficulty: enumValue(AI_DIFFICULTIES, aiDifficulty),
+        is_disconnected: isDisconnected
+    };
+}
+
+// 打包的 game_update 还原为 JSON 格式
+function unpackGameUpdate(buffer) {
+    const [version, roomIdValue, roomName, gameStateValue, message, currentPlayerIndex,
+           playerOrder, dealer, players, traceId, stateVersion] = decodeMsgpack(buffer);
+    if (version !== PACKED_VERSION) {
+        throw new Error(`不支持的打包版本 ${version}`);
+    }
+    const data = {
+        room_id: roomIdValue,
+        room_name: roomName,
+        players: {},
+        dealer: unpackPlayer(dealer),
+        game_state: enumValue(GAME_STATES, gameStateValue),
+        message: message,
+        current_player_index: currentPlayerIndex,
+        player_order: playerOrder
+    };
+    players.forEach(values => {
+        const player = unpackPlayer(values);
+        data.players[player.player_id] = player;
+    });
+    if (traceId !== null) {
+        data.trace_id = traceId;
+    }
+    if (stateVersion !== null) {
+        data.state_version = stateVersion;
+    }
+    return data;
+}
@@ -1,5 +1,8 @@
+// 打包的 game_update 由 packed_updates.js 解码，需先于本文件加载
 // 获取房间ID
 const roomId = window.location.pathname.split('/').pop();
+// 快速加入预留的座位
+const reservation = new URLSearchParams(window.location.search).get('reservation');
 // 从localStorage获取玩家名称
 const playerName = localStorage.getItem('playerName') || `玩家${Math.floor(Math.random() * 1000)}`;
 
@@ -29,24 +32,20 @@ const doubleDownBtn = document.getElementById('double-down-btn');
 const endGameControlsEl = document.getElementById('end-game-controls');
 const nextRoundBtn = document.getElementById('next-round-btn');
 
+// 恢复令牌按标签页保存，重连时凭它直接恢复座位
+const resumeKey = `resume:${roomId}`;
+
 // 游戏状态
 let gameState = null;
+let stateVersion = null;
 let playerId = null;
 let currentPlayer = null;
 
 // 初始化
 function init() {
-    // 建立Socket连接
+    // 建立Socket连接，连接成功后加入房间
     connectSocket();
     
-    // 加入房间
-    setTimeout(() => {
-        socket.emit('join_room', {
-            room_id: roomId,
-            player_name: playerName
-        });
-    }, 1000);
-    
     // 监听Socket事件
     setupSocketListeners();
     
@@ -59,18 +58,26 @@ function connectSocket() {
     // 尝试从localStorage获取会话ID
     const storedSessionId = localStorage.getItem('session_id');
     
+    // 每次（重新）连接都带上恢复令牌和最后看到的状态版本
+    const auth = (cb) => {
+        const token = sessionStorage.getItem(resumeKey);
+        cb(token ? { resume: token, state_version: stateVersion } : {});
+    };
+    
     // 创建Socket连接，支持移动设备
     if (storedSessionId) {
         socket = io({
             query: {
                 session_id: storedSessionId
             },
+            auth: auth,
             transports: ['websocket', 'polling'],
             reconnection: true,
             reconnectionAttempts: 5
         });
     } else {
         socket = io({
+            auth: auth,
             transports: ['websocket', 'polling'],
             reconnection: true,
             reconnectionAttempts: 5
@@ -78,12 +85,51 @@ function connectSocket() {
     }
 }
 
+// 加入房间
+function joinRoom() {
+    socket.emit('join_room', {
+        room_id: roomId,
+        player_name: playerName,
+        reservation: reservation
+    });
+}
+
 // 设置Socket事件监听
 function setupSocketListeners() {
     // 连接成功
     socket.on('connect', () => {
         console.log('连接到服务器');
         playerId = socket.id;
+        // 协商 game_update 的传输格式，localStorage 中 wireFormat 设为 json 可关闭二进制格式
+        socket.emit('set_wire_format', {
+            format: localStorage.getItem('wireFormat') || 'msgpack'
+        });
+        // 有令牌时服务器已恢复座位（resumed）或发送 resume_failed
+        if (!sessionStorage.getItem(resumeKey)) {
+            joinRoom();
+        }
+    });
+    
+    // 座位已恢复，只收到最后看到的版本之后的变化
+    socket.on('resumed', (data) => {
+        applyChanges(data);
+    });
+    
+    // 令牌过期或座位已不在，照常加入房间
+    socket.on('resume_failed', () => {
+        sessionStorage.removeItem(resumeKey);
+        joinRoom();
+    });
+    
+    socket.on('resume_token', (data) => {
+        sessionStorage.setItem(resumeKey, data.token);
+    });
+    
+    // 服务器确认的传输格式，不认识的打包版本改回 JSON
+    socket.on('wire_format', (data) => {
+        if (data.format === 'msgpack' && data.version !== PACKED_VERSION) {
+            socket.emit('set_wire_format', { format: 'json' });
+        }
     });
     
     // 连接错误
@@ -109,12 +155,7 @@ function setupSocketListeners() {
         console.log('重新连接成功，尝试次数:', attemptNumber);
         gameMessageEl.textContent = '重新连接成功';
         gameMessageEl.className = 'game-message';
-        
-        // 重新加入房间
-        socket.emit('join_room', {
-            room_id: roomId,
-            player_name: playerName
-        });
+        // 座位在 connect 事件中恢复或重新加入
     });
     
     // 会话ID设置
@@ -131,8 +172,13 @@ function setupSocketListeners() {
     
     // 游戏状态更新
     socket.on('game_update', (data) => {
+        const receivedAt = performance.now();
+        if (data instanceof ArrayBuffer) {
+            data = unpackGameUpdate(data);
+        }
         console.log('游戏状态更新:', data);
         updateRoomData(data);
+        reportRender(data, receivedAt);
     });
     
     // 新玩家加入
@@ -242,6 +288,9 @@ function setupEventListeners() {
 // 更新房间数据
 function updateRoomData(data) {
     gameState = data;
+    if (data.state_version !== undefined) {
+        stateVersion = data.state_version;
+    }
     
     // 更新房间名称
     roomNameEl.textContent = data.room_name;
@@ -262,6 +311,17 @@ function updateRoomData(data) {
     updateGameControls();
 }
 
+// 把 resumed 事件的变化合并到房间数据
+function applyChanges(data) {
+    const players = Object.assign({}, gameState ? gameState.players : {});
+    data.removed_players.forEach(id => delete players[id]);
+    Object.assign(players, data.players);
+    updateRoomData(Object.assign({}, gameState, data.changes, {
+        players: players,
+        state_version: data.state_version
+    }));
+}
+
 // 更新庄家牌
 function updateDealerCards(dealer) {
     dealerCardsEl.innerHTML = '';
@@ -489,6 +549,18 @@ function updatePlayerStatus(playerId, state) {
     }
 }
 
+// 向服务器报告带 trace_id 的更新的渲染耗时
+function reportRender(data, receivedAt) {
+    if (!data.trace_id) return;
+    // 下一帧开始时 DOM 已绘制完成
+    requestAnimationFrame(() => {
+        socket.emit('client_render', {
+            trace_id: data.trace_id,
+            render_ms: performance.now() - receivedAt
+        });
+    });
+}
+
 // 创建卡牌元素
 function createCardElement(card) {
     const cardEl = document.createElement('div');
@@ -541,6 +613,7 @@ function showNotification(message) {
 
 // 离开房间
 function leaveRoom() {
+    sessionStorage.removeItem(resumeKey);
     socket.emit('leave_room', {
         room_id: roomId
     });
@@ -0,0 +1,189 @@
+"""
+Admission Control: Global limits and overload shedding for new work
+
+New rooms, Socket.IO connections and AI seats are refused beyond MAX_ROOMS,
+MAX_CONNECTIONS and MAX_AI_PLAYERS (None disables a limit).
+
+The server counts as overloaded while either load signal is over its
+threshold:
+
+- Timer lag: how late a timer firing every LOAD_PROBE_INTERVAL runs. With
+  threaded handlers this is the time runnable threads wait for the
+  interpreter, the threading-mode equivalent of event-loop lag. The value
+  jumps to each higher sample and halves at every probe otherwise.
+- Handlers in flight: Socket.IO handlers currently running, i.e. the
+  backlog of events being worked on. Handlers waiting in socketio.sleep
+  (delays for the clients, AI thinking time) do not count, they take no
+  CPU.
+
+While overloaded, new rooms, new players joining a room, spectators and AI
+seats are refused with an error, so the games already running keep the
+capacity. Players reconnecting to their seat and actions in running games
+are never refused.
+"""
+import threading
+from contextlib import contextmanager
+
+from config import (MAX_ROOMS, MAX_CONNECTIONS, MAX_AI_PLAYERS, OVERLOAD_MAX_LAG,
+                    OVERLOAD_MAX_IN_FLIGHT)
+from utils.metrics import metrics
+
+ADMISSIONS_REJECTED = metrics.counter(
+    "blackjack_admissions_rejected_total", "New rooms, connections, players and AI seats refused",
+    ("kind", "reason"))
+
+# Error messages by rejection reason
+MESSAGES = {
+    "limit": "The server is full, please try again later",
+    "overloaded": "The server is busy, please try again later"
+}
+
+
+class AdmissionController:
+    """Limits on new work and the load signals deciding whether to accept it"""
+    
+    def __init__(self, max_rooms=MAX_ROOMS, max_connections=MAX_CONNECTIONS, max_ai_players=MAX_AI_PLAYERS,
+                 max_lag=OVERLOAD_MAX_LAG, max_in_flight=OVERLOAD_MAX_IN_FLIGHT):
+        """
+        Initialize admission controller
+        
+        Args:
+            max_rooms (int, optional): Live rooms, None for no limit
+            max_connections (int, optional): Socket.IO connections, None for no limit
+            max_ai_players (int, optional): AI seats in all rooms, None for no limit
+            max_lag (float, optional): Timer lag in seconds above which the server is overloaded
+            max_in_flight (int, optional): Running handlers above which the server is overloaded
+        """
+        self.max_rooms = max_rooms
+        self.max_connections = max_connections
+        self.max_ai_players = max_ai_players
+        self.max_lag = max_lag
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.in_flight = 0
+        self.lag = 0.0
+        
+        metrics.gauge("blackjack_timer_lag_seconds", "How late the load probe timer last ran, decaying",
+                      callback=lambda: {(): self.lag})
+        metrics.gauge("blackjack_handlers_in_flight", "Socket.IO handlers currently running",
+                      callback=lambda: {(): self.in_flight})
+        metrics.gauge("blackjack_overloaded", "Whether new rooms, joins and AI seats are being refused",
+                      callback=lambda: {(): 1 if self.overloaded() else 0})
+    
+    def record_lag(self, lag):
+        """Record a load probe measurement"""
+        with self.lock:
+            self.lag = max(lag, self.lag / 2)
+    
+    def handler_started(self):
+        """Count a Socket.IO handler as running"""
+        with self.lock:
+            self.in_flight += 1
+    
+    def handler_finished(self):
+        """Count a Socket.IO handler as done"""
+        with self.lock:
+            self.in_flight -= 1
+    
+    @contextmanager
+    def handler_waiting(self):
+        """Stop counting a running handler while it waits"""
+        self.handler_finished()
+        try:
+            yield
+        finally:
+            self.handler_started()
+    
+    def overloaded(self):
+        """
+        Check the load signals
+        
+        Returns:
+            bool: Whether timer lag or handlers in flight are over their threshold
+        """
+        return ((self.max_lag is not None and self.lag > self.max_lag) or
+                (self.max_in_flight is not None and self.in_flight > self.max_in_flight))
+    
+    def _check(self, kind, count=None, limit=None, shed=True):
+        """
+        Decide on new work, counting a rejection
+        
+        Args:
+            kind (str): What is admitted, for the rejection metric
+            count (int, optional): Current amount, compared to limit
+            limit (int, optional): Limit, None for none
+            shed (bool, optional): Whether to refuse while overloaded
+        
+        Returns:
+            str: Error message, None if admitted
+        """
+        if limit is not None and count is not None and count >= limit:
+            reason = "limit"
+        elif shed and self.overloaded():
+            reason = "overloaded"
+        else:
+            return None
+        ADMISSIONS_REJECTED.inc(kind=kind, reason=reason)
+        return MESSAGES[reason]
+    
+    def admit_room(self, room_count):
+        """
+        Decide on creating a room
+        
+        Args:
+            room_count (int): Live rooms
+        
+        Returns:
+            str: Error message, None if admitted
+        """
+        return self._check("room", room_count, self.max_rooms)
+    
+    def admit_player(self, kind="player"):
+        """
+        Decide on seating a new player or spectator
+        
+        Args:
+            kind (str, optional): "player" or "spectator"
+        
+        Returns:
+            str: Error message, None if admitted
+        """
+        return self._check(kind)
+    
+    def admit_ai_player(self, ai_count):
+        """
+        Decide on adding an AI seat
+        
+        Args:
+            ai_count (int): AI players in all rooms
+        
+        Returns:
+            str: Error message, None if admitted
+        """
+        return self._check("ai_player", ai_count, self.max_ai_players)
+    
+    def connect(self):
+        """
+        Decide on a new Socket.IO connection, counting it if admitted
+        
+        Connections are only limited by number, not shed while overloaded,
+        so players can still reconnect to their seat.
+        
+        Returns:
+            str: Error message, None if admitted
+        """
+        with self.lock:
+            message = self._check("connection", self.connections, self.max_connections, shed=False)
+            if message is None:
+                self.connections += 1
+            return message
+    
+    def disconnect(self):
+        """Count an admitted connection as closed"""
+        with self.lock:
+            self.connections -= 1
+
+
+# Admission controller of the application
+admission = AdmissionController()
\ No newline at end of file
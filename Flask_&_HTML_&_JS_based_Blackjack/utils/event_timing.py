@@ -0,0 +1,259 @@
+"""
+Event Timing: Break the wall time of Socket.IO handlers down by activity
+
+While a handler runs, timed sections (state mutation, AI processing,
+serialization, emits, sleeps) add their exclusive time to the handler's
+timing, so nested sections are never counted twice. Handlers slower than
+SLOW_EVENT_THRESHOLD are written to the slow-event log.
+
+Every handler also carries a trace id, echoed in the game updates it emits,
+and the monotonic offset at which each stage last completed. Clients report
+their render time for a trace id back with the client_render event.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import functools
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask_socketio import SocketIO
+
+from config import SLOW_EVENT_THRESHOLD, SLOW_EVENT_LOG_FILE, TRACE_HISTORY_SIZE
+from utils.metrics import metrics, SOCKETIO_EVENT_DURATION
+from utils.admission import admission
+
+SECTIONS = ("mutate", "ai", "serialize", "emit", "sleep")
+
+# Outgoing events that carry the trace id of the handler emitting them
+TRACED_EVENTS = ("game_update", "room_data", "player_status_update")
+
+SOCKETIO_EVENT_SECTION_DURATION = metrics.histogram(
+    "blackjack_socketio_event_section_seconds",
+    "Socket.IO handler time by activity (other = not covered by a section)",
+    ("event", "section"))
+TRACE_STAGE_OFFSET = metrics.histogram(
+    "blackjack_trace_stage_offset_seconds",
+    "Time from receiving an event until a stage of its handler last completed",
+    ("event", "stage"))
+TRACE_END_TO_END = metrics.histogram(
+    "blackjack_trace_end_to_end_seconds",
+    "Time from receiving an event until a client reported rendering its update",
+    ("event",))
+CLIENT_RENDER_DURATION = metrics.histogram(
+    "blackjack_client_render_seconds", "Client render time of traced updates, as reported by clients")
+SLOW_EVENTS = metrics.counter(
+    "blackjack_socketio_slow_events_total", "Socket.IO handlers slower than the slow-event threshold", ("event",))
+
+# Timing of the handler running in the current thread
+_local = threading.local()
+
+# Traces whose updates reached clients: trace id -> (event, start time), oldest first
+_recent_traces = OrderedDict()
+_recent_traces_lock = threading.Lock()
+
+slow_event_logger = logging.getLogger("blackjack.slow_events")
+
+
+class EventTiming:
+    """Timing of one handler invocation"""
+    
+    def __init__(self, event, trace_id=None):
+        """
+        Initialize event timing
+        
+        Args:
+            event (str): Event name
+            trace_id (str, optional): Trace id, generated when not given
+        """
+        self.event = event
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.start_time = time.perf_counter()
+        self.wall_time = 0.0
+        self.sections = {section: 0.0 for section in SECTIONS}
+        self.stamps = {"receive": 0.0}  # stage -> offset from start when it last completed
+        self.registered = False  # Whether the trace is in the recent traces
+        self._child_times = []  # time spent in nested sections, per open section
+
+
+def current_timing():
+    """
+    Get the timing of the handler running in this thread
+    
+    Returns:
+        EventTiming: Current timing, None outside handlers
+    """
+    return getattr(_local, "timing", None)
+
+
+@contextmanager
+def timed_section(section):
+    """
+    Attribute the time spent inside the block to a section of the current handler
+    
+    Args:
+        section (str): Section name from SECTIONS
+    """
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+    
+    start_time = time.perf_counter()
+    timing._child_times.append(0.0)
+    try:
+        yield
+    finally:
+        end_time = time.perf_counter()
+        elapsed = end_time - start_time
+        timing.stamps[section] = end_time - timing.start_time
+        child_time = timing._child_times.pop()
+        timing.sections[section] += elapsed - child_time
+        if timing._child_times:
+            timing._child_times[-1] += elapsed
+
+
+def timed(section):
+    """
+    Decorator attributing a function's time to a section
+    
+    Args:
+        section (str): Section name from SECTIONS
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_section(section):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_event_timing(event, trace_id=None):
+    """
+    Start timing a handler in this thread
+    
+    Args:
+        event (str): Event name
+        trace_id (str, optional): Trace id supplied by the client
+    
+    Returns:
+        EventTiming: The new timing
+    """
+    timing = EventTiming(event, trace_id)
+    timing.previous = current_timing()
+    _local.timing = timing
+    return timing
+
+
+def finish_event_timing(timing, room_id=None, game_state=None, player_count=None):
+    """
+    Finish timing a handler, record its breakdown and log it if slow
+    
+    Args:
+        timing (EventTiming): Timing returned by start_event_timing
+        room_id (str, optional): Room the event was about
+        game_state (str, optional): Room game state after the handler
+        player_count (int, optional): Players in the room after the handler
+    """
+    _local.timing = timing.previous
+    timing.wall_time = time.perf_counter() - timing.start_time
+    
+    SOCKETIO_EVENT_DURATION.observe(timing.wall_time, event=timing.event)
+    for section, duration in timing.sections.items():
+        SOCKETIO_EVENT_SECTION_DURATION.observe(duration, event=timing.event, section=section)
+    other_time = max(timing.wall_time - sum(timing.sections.values()), 0.0)
+    SOCKETIO_EVENT_SECTION_DURATION.observe(other_time, event=timing.event, section="other")
+    for stage, offset in timing.stamps.items():
+        if stage != "receive":
+            TRACE_STAGE_OFFSET.observe(offset, event=timing.event, stage=stage)
+    
+    if timing.wall_time >= SLOW_EVENT_THRESHOLD:
+        SLOW_EVENTS.inc(event=timing.event)
+        _ensure_slow_event_log()
+        slow_event_logger.warning(json.dumps({
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "event": timing.event,
+            "trace_id": timing.trace_id,
+            "wall_ms": round(timing.wall_time * 1000, 1),
+            "sections_ms": {section: round(duration * 1000, 1) for section, duration in timing.sections.items()},
+            "other_ms": round(other_time * 1000, 1),
+            "stamps_ms": {stage: round(offset * 1000, 1) for stage, offset in timing.stamps.items()},
+            "room_id": room_id,
+            "game_state": game_state,
+            "player_count": player_count
+        }, ensure_ascii=False))
+
+
+def register_trace(timing):
+    """
+    Remember a trace when it first sends an update, so the render reports it
+    gets while its handler is still running find it
+    
+    Args:
+        timing (EventTiming): Timing of the handler emitting the update
+    """
+    if timing.registered:
+        return
+    timing.registered = True
+    with _recent_traces_lock:
+        # The first event of a trace is the one its end-to-end time is measured from
+        _recent_traces.setdefault(timing.trace_id, (timing.event, timing.start_time))
+        while len(_recent_traces) > TRACE_HISTORY_SIZE:
+            _recent_traces.popitem(last=False)
+
+
+def record_client_render(trace_id, render_time):
+    """
+    Record a client's render report for a traced update
+    
+    Args:
+        trace_id (str): Trace id echoed in the update
+        render_time (float): Seconds the client took to render the update
+    """
+    CLIENT_RENDER_DURATION.observe(render_time)
+    with _recent_traces_lock:
+        trace = _recent_traces.get(trace_id)
+    if trace is not None:
+        event, start_time = trace
+        TRACE_END_TO_END.observe(time.perf_counter() - start_time, event=event)
+
+
+def _ensure_slow_event_log():
+    """Attach the slow-event log file handler on first use"""
+    if slow_event_logger.handlers:
+        return
+    log_dir = os.path.dirname(SLOW_EVENT_LOG_FILE)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    handler = logging.FileHandler(SLOW_EVENT_LOG_FILE, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_event_logger.addHandler(handler)
+    slow_event_logger.setLevel(logging.WARNING)
+    slow_event_logger.propagate = False
+
+
+class InstrumentedSocketIO(SocketIO):
+    """
+    SocketIO that attributes emit and sleep time to the running handler and
+    adds its trace id to traced events
+    """
+    
+    def emit(self, event, *args, **kwargs):
+        """Emit an event"""
+        timing = current_timing()
+        if timing is not None and event in TRACED_EVENTS and args and isinstance(args[0], dict):
+            args = (dict(args[0], trace_id=timing.trace_id),) + args[1:]
+            register_trace(timing)
+        with timed_section("emit"):
+            return super().emit(event, *args, **kwargs)
+    
+    def sleep(self, seconds=0):
+        """Sleep for the requested amount of time, a sleeping handler does not count as in flight"""
+        if current_timing() is None:
+            with timed_section("sleep"):
+                return super().sleep(seconds)
+        with timed_section("sleep"), admission.handler_waiting():
+            return super().sleep(seconds)
\ No newline at end of file
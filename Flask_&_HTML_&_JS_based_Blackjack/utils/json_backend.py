@@ -0,0 +1,100 @@
+"""
+JSON Backend: Pluggable JSON implementation for Socket.IO packets and Flask
+responses
+
+JSON_BACKEND "auto" uses orjson when it is installed and the standard
+library otherwise; "orjson" or "json" pick one explicitly. orjson always
+writes compact UTF-8 output, so stdlib options other than indent, sort_keys
+and default are ignored; values it cannot encode (e.g. integers beyond 64
+bits) are encoded by the standard library instead.
+"""
+import json
+import logging
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # The standard library is used without orjson
+    orjson = None
+
+from config import JSON_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+class OrjsonBackend:
+    """json module stand-in encoding and decoding with orjson"""
+    
+    name = "orjson"
+    
+    def dumps(self, obj, *args, **kwargs):
+        """Encode an object to a JSON string"""
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get("sort_keys"):
+            option |= orjson.OPT_SORT_KEYS
+        default = kwargs.get("default")
+        if default is not None:
+            # Let the caller's default format dates, as the standard library would
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+        except TypeError:
+            return json.dumps(obj, *args, **kwargs)
+    
+    def loads(self, data, *args, **kwargs):
+        """Decode a JSON string or UTF-8 bytes"""
+        return orjson.loads(data)
+
+
+def load_backend(name=JSON_BACKEND):
+    """
+    Get a JSON backend
+    
+    Args:
+        name (str, optional): "auto", "orjson" or "json"
+    
+    Returns:
+        object: Object with dumps/loads like the json module
+    """
+    if name in ("auto", "orjson") and orjson is not None:
+        return OrjsonBackend()
+    if name == "orjson":
+        logger.warning("orjson is not installed, using the standard library JSON encoder")
+    return json
+
+
+def backend_name(backend):
+    """Get the name of a backend returned by load_backend"""
+    return getattr(backend, "name", "json")
+
+
+class BackendJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with the configured backend, used by jsonify"""
+    
+    def __init__(self, app, backend=None):
+        """
+        Initialize provider
+        
+        Args:
+            app (Flask): Flask application
+            backend (object, optional): JSON backend, json_backend if not given
+        """
+        super().__init__(app)
+        self.backend = backend or json_backend
+    
+    def dumps(self, obj, **kwargs):
+        """Encode an object with Flask's defaults"""
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return self.backend.dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        """Decode JSON text or UTF-8 bytes"""
+        return self.backend.loads(s, **kwargs)
+
+
+# JSON backend of the application
+json_backend = load_backend()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Logger: Leveled, asynchronous structured logging
+
+Modules log through logging.getLogger(__name__). Records are put on a queue
+by a QueueHandler and written by a QueueListener thread, so request handlers
+never block on stdout or file I/O. Per-action messages are logged at DEBUG
+and are discarded before formatting unless debug is enabled for the module.
+"""
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+from config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_FILE
+
+# Listener writing queued records, None until setup_logging runs
+_listener = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+    
+    def format(self, record):
+        """
+        Format a record
+        
+        Args:
+            record (logging.LogRecord): Record to format
+        
+        Returns:
+            str: JSON line
+        """
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(level=LOG_LEVEL, module_levels=LOG_LEVELS, log_format=LOG_FORMAT, log_file=LOG_FILE):
+    """
+    Route all logging through a queue to a single output handler
+    
+    Calling it again has no effect.
+    
+    Args:
+        level (str, optional): Root log level
+        module_levels (dict, optional): Logger name -> level overrides
+        log_format (str, optional): "json" or "text"
+        log_file (str, optional): File to write to, stderr when None
+    """
+    global _listener
+    if _listener is not None:
+        return
+    
+    output = logging.FileHandler(log_file, encoding="utf-8") if log_file else logging.StreamHandler()
+    if log_format == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Metrics: In-process counters, gauges and histograms rendered in the
+Prometheus text exposition format
+"""
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names, label_values, extra=None):
+    """Format a label set as {name="value",...}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base class of a labeled metric"""
+    
+    metric_type = "untyped"
+    
+    def __init__(self, name, help_text, label_names=()):
+        """
+        Initialize metric
+        
+        Args:
+            name (str): Metric name
+            help_text (str): Description shown in the exposition
+            label_names (tuple, optional): Label names
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}  # label values tuple -> value
+        self.lock = threading.Lock()
+    
+    def _key(self, labels):
+        """Get the label values tuple of a label dict"""
+        return tuple(labels.get(name, "") for name in self.label_names)
+    
+    def render(self):
+        """
+        Render the metric
+        
+        Returns:
+            list: Exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+    
+    metric_type = "counter"
+    
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter
+        
+        Args:
+            amount (float, optional): Increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally computed at scrape time"""
+    
+    metric_type = "gauge"
+    
+    def __init__(self, name, help_text, label_names=(), callback=None):
+        """
+        Initialize gauge
+        
+        Args:
+            name (str): Metric name
+            help_text (str): Description shown in the exposition
+            label_names (tuple, optional): Label names
+            callback (callable, optional): Returns {label values tuple: value} at scrape time
+        """
+        super().__init__(name, help_text, label_names)
+        self.callback = callback
+    
+    def set(self, value, **labels):
+        """Set the gauge"""
+        with self.lock:
+            self.values[self._key(labels)] = value
+    
+    def inc(self, amount=1, **labels):
+        """Increase the gauge"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def dec(self, amount=1, **labels):
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+    
+    def render(self):
+        """Render the gauge, refreshing it from the callback first"""
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                logger.error("Metrics collection error for %s: %s", self.name, e)
+                values = {}
+            with self.lock:
+                self.values = dict(values)
+        return super().render()
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    
+    metric_type = "histogram"
+    
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+        Initialize histogram
+        
+        Args:
+            name (str): Metric name
+            help_text (str): Description shown in the exposition
+            label_names (tuple, optional): Label names
+            buckets (tuple, optional): Bucket upper bounds
+        """
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value, **labels):
+        """
+        Record an observation
+        
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+    
+    def render(self):
+        """Render buckets, sum and count of every label set"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state["counts"]):
+                    cumulative += count
+                    labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {state['count']}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {state['sum']}")
+                lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of all metrics of the process"""
+    
+    def __init__(self):
+        """Initialize empty registry"""
+        self.metrics = {}
+        self.lock = threading.Lock()
+    
+    def _register(self, metric):
+        """Register a metric, returning the existing one if already registered"""
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name, help_text, label_names=()):
+        """Create or get a counter"""
+        return self._register(Counter(name, help_text, label_names))
+    
+    def gauge(self, name, help_text, label_names=(), callback=None):
+        """Create or get a gauge"""
+        return self._register(Gauge(name, help_text, label_names, callback))
+    
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Create or get a histogram"""
+        return self._register(Histogram(name, help_text, label_names, buckets))
+    
+    def render(self):
+        """
+        Render all metrics in the text exposition format
+        
+        Returns:
+            str: Exposition text
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MeteredJSON:
+    """
+    JSON module stand-in for SocketIO(json=...) that counts the packets and
+    bytes it encodes, labeled by event name
+    
+    python-socketio encodes a broadcast once for all recipients, so the
+    counts are per emit rather than per recipient.
+    """
+    
+    def __init__(self, backend=json):
+        """
+        Initialize metered JSON module
+        
+        Args:
+            backend (module, optional): JSON implementation doing the actual work
+        """
+        self.backend = backend
+    
+    def dumps(self, obj, *args, **kwargs):
+        """Encode an object, counting event packets"""
+        from utils.event_timing import timed_section
+        
+        with timed_section("serialize"):
+            data = self.backend.dumps(obj, *args, **kwargs)
+        # Event packets are encoded as [event name, *arguments]
+        if isinstance(obj, list) and obj and isinstance(obj[0], str):
+            SOCKETIO_EMITS.inc(event=obj[0])
+            SOCKETIO_EMIT_BYTES.inc(len(data), event=obj[0])
+        return data
+    
+    def loads(self, data, *args, **kwargs):
+        """Decode JSON"""
+        return self.backend.loads(data, *args, **kwargs)
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+SOCKETIO_EVENTS_RECEIVED = metrics.counter(
+    "blackjack_socketio_events_received_total", "Socket.IO events received", ("event",))
+SOCKETIO_EVENTS_REJECTED = metrics.counter(
+    "blackjack_socketio_events_rejected_total", "Socket.IO events dropped unhandled, by reason",
+    ("event", "reason"))
+SOCKETIO_EVENT_DURATION = metrics.histogram(
+    "blackjack_socketio_event_duration_seconds", "Socket.IO event handler latency", ("event",))
+SOCKETIO_EMITS = metrics.counter(
+    "blackjack_socketio_emits_total", "Socket.IO event packets encoded for sending", ("event",))
+SOCKETIO_EMIT_BYTES = metrics.counter(
+    "blackjack_socketio_emit_bytes_total", "Bytes of encoded Socket.IO event packets", ("event",))
+SOCKETIO_CONNECTIONS = metrics.gauge(
+    "blackjack_socketio_connections", "Currently connected Socket.IO clients")
+RECORD_WRITES = metrics.counter(
+    "blackjack_record_writes_total", "Game records written")
+SCAN_DURATION = metrics.histogram(
+    "blackjack_scan_duration_seconds", "Duration of periodic room scans", ("scanner",))
+ROOMS_REAPED = metrics.counter(
+    "blackjack_rooms_reaped_total", "Rooms deleted by the idle-room reaper", ("reason",))
+REAPED_BYTES = metrics.counter(
+    "blackjack_reaped_bytes_total", "Estimated memory of rooms deleted or hibernated by the room reaper")
+PLAYERS_EVICTED = metrics.counter(
+    "blackjack_players_evicted_total", "Disconnected players removed after the reconnection grace period")
+ROOMS_HIBERNATED = metrics.counter(
+    "blackjack_rooms_hibernated_total", "Rooms written to a snapshot and dropped from memory")
+ROOMS_REVIVED = metrics.counter(
+    "blackjack_rooms_revived_total", "Hibernated rooms restored from their snapshot")
+QUICK_JOINS = metrics.counter(
+    "blackjack_quick_joins_total", "Quick-join requests by whether a room was matched, created or refused",
+    ("result",))
+PROVISIONED = metrics.counter(
+    "blackjack_provisioned_total", "Rooms created and AI players seated by bulk provisioning", ("kind",))
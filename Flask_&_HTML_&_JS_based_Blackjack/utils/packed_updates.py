@@ -0,0 +1,222 @@
+"""
+Packed Updates: MessagePack encoding of game_update for clients that ask
+
+A game_update in JSON repeats every key for every player and spells out
+each card as {"suit": "♥", "value": "10"}. Packed updates are a MessagePack
+array with fixed positions instead of keys, cards as integer codes and
+states as enum indexes:
+
+    [version, room_id, room_name, game_state, message, current_player_index,
+     player_order, dealer, [player, ...], trace_id, state_version]
+    player: [player_id, name, [card code, ...], score, money, current_bet,
+             state, is_ai, ai_difficulty, is_disconnected]
+
+Card codes are Card.code (0-51), HIDDEN_CARD stands for the dealer's hidden
+card. States and AI difficulties are indexes into the lists below; values
+missing from the lists are sent as strings. static/js/room.js unpacks the
+array back into the JSON shape.
+
+Clients opt in per connection with the set_wire_format event. Updates for a
+room are packed once and sent to its packed clients, the other clients of
+the room still get JSON. MessagePack is optional: without it the server
+keeps answering "json".
+"""
+import threading
+import flask
+
+try:
+    import msgpack
+except ImportError:  # Packed updates are offered only when MessagePack is installed
+    msgpack = None
+
+from utils.event_timing import InstrumentedSocketIO, current_timing, timed_section, register_trace
+
+# Bump when positions or enums change, clients reject other versions
+PACKED_VERSION = 2
+
+# Events sent packed to clients that negotiated it
+PACKED_EVENTS = ("game_update",)
+
+HIDDEN_CARD = 52
+
+GAME_STATES = ["waiting", "betting", "playing", "dealer_turn", "game_over"]
+PLAYER_STATES = ["waiting", "ready", "betting", "playing", "stand", "busted", "blackjack",
+                 "five_dragon", "spectating"]
+AI_DIFFICULTIES = ["easy", "medium", "hard", "expert"]
+
+_GAME_STATE_CODES = {state: index for index, state in enumerate(GAME_STATES)}
+_PLAYER_STATE_CODES = {state: index for index, state in enumerate(PLAYER_STATES)}
+_AI_DIFFICULTY_CODES = {difficulty: index for index, difficulty in enumerate(AI_DIFFICULTIES)}
+
+
+def packing_available():
+    """Whether MessagePack is installed"""
+    return msgpack is not None
+
+
+def _pack_player(player, card_codes):
+    """Convert a player dict to its positional array"""
+    return [
+        player["player_id"],
+        player["name"],
+        [card_codes.get((card["suit"], card["value"]), HIDDEN_CARD) for card in player["hand"]],
+        player["score"],
+        player["money"],
+        player["current_bet"],
+        _PLAYER_STATE_CODES.get(player["state"], player["state"]),
+        player["is_ai"],
+        _AI_DIFFICULTY_CODES.get(player["ai_difficulty"], player["ai_difficulty"]),
+        player["is_disconnected"]
+    ]
+
+
+def pack_game_update(state):
+    """
+    Encode a game_update payload
+    
+    Args:
+        state (dict): Payload built by GameRoom.to_dict, optionally with trace_id
+    
+    Returns:
+        bytes: MessagePack encoded array
+    
+    Raises:
+        ImportError: If MessagePack is not installed
+    """
+    # Imported here, the models package imports the socketio instance built on this module
+    from models.card import CARD_CODES
+    
+    if msgpack is None:
+        raise ImportError("msgpack is required for packed updates")
+    return msgpack.packb([
+        PACKED_VERSION,
+        state["room_id"],
+        state["room_name"],
+        _GAME_STATE_CODES.get(state["game_state"], state["game_state"]),
+        state["message"],
+        state["current_player_index"],
+        state["player_order"],
+        _pack_player(state["dealer"], CARD_CODES),
+        [_pack_player(player, CARD_CODES) for player in state["players"].values()],
+        state.get("trace_id"),
+        state.get("state_version")
+    ], use_bin_type=True)
+
+
+def _unpack_player(values):
+    """Convert a positional player array back to a player dict"""
+    from models.card import Card
+    
+    (player_id, name, hand, score, money, current_bet, state, is_ai, ai_difficulty,
+     is_disconnected) = values
+    return {
+        "player_id": player_id,
+        "name": name,
+        "hand": [{"suit": "?", "value": "?"} if code == HIDDEN_CARD else Card.from_code(code).to_dict()
+                 for code in hand],
+        "score": score,
+        "money": money,
+        "current_bet": current_bet,
+        "state": PLAYER_STATES[state] if isinstance(state, int) else state,
+        "is_ai": is_ai,
+        "ai_difficulty": AI_DIFFICULTIES[ai_difficulty] if isinstance(ai_difficulty, int) else ai_difficulty,
+        "is_disconnected": is_disconnected
+    }
+
+
+def unpack_game_update(data):
+    """
+    Decode a packed game_update, the Python twin of the decoder in room.js
+    
+    Args:
+        data (bytes): MessagePack encoded array
+    
+    Returns:
+        dict: Payload in the JSON shape, trace_id and state_version only if they were set
+    
+    Raises:
+        ValueError: If the data has another packed version
+    """
+    values = msgpack.unpackb(data, raw=False)
+    if values[0] != PACKED_VERSION:
+        raise ValueError(f"Unsupported packed update version {values[0]}")
+    (_, room_id, room_name, game_state, message, current_player_index, player_order, dealer,
+     players, trace_id, state_version) = values
+    players = [_unpack_player(player) for player in players]
+    state = {
+        "room_id": room_id,
+        "room_name": room_name,
+        "players": {player["player_id"]: player for player in players},
+        "dealer": _unpack_player(dealer),
+        "game_state": GAME_STATES[game_state] if isinstance(game_state, int) else game_state,
+        "message": message,
+        "current_player_index": current_player_index,
+        "player_order": player_order
+    }
+    if trace_id is not None:
+        state["trace_id"] = trace_id
+    if state_version is not None:
+        state["state_version"] = state_version
+    return state
+
+
+class PackedUpdatesSocketIO(InstrumentedSocketIO):
+    """InstrumentedSocketIO that sends game updates packed to clients that negotiated it"""
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize SocketIO, no client is packed yet"""
+        super().__init__(*args, **kwargs)
+        self.packed_clients = set()
+        self.packed_clients_lock = threading.Lock()
+    
+    def set_packed(self, sid, packed):
+        """
+        Choose a client's wire format
+        
+        Args:
+            sid (str): Socket ID
+            packed (bool): Whether to send the client packed updates
+        
+        Returns:
+            bool: Whether the client gets packed updates, False if MessagePack is missing
+        """
+        packed = packed and packing_available()
+        with self.packed_clients_lock:
+            if packed:
+                self.packed_clients.add(sid)
+            else:
+                self.packed_clients.discard(sid)
+        return packed
+    
+    def emit(self, event, *args, **kwargs):
+        """Emit an event, packed for the packed clients among the recipients"""
+        room = kwargs.get('to') or kwargs.get('room')
+        if (event not in PACKED_EVENTS or not self.packed_clients or room is None or
+                not args or not isinstance(args[0], dict)):
+            return super().emit(event, *args, **kwargs)
+        
+        skip_sid = kwargs.get('skip_sid') or []
+        skip_sid = {skip_sid} if isinstance(skip_sid, str) else set(skip_sid)
+        if not kwargs.get('include_self', True):
+            skip_sid.add(flask.request.sid)
+        recipients = [sid for sid, _ in self.server.manager.get_participants(kwargs.get('namespace') or '/', room)
+                      if sid not in skip_sid]
+        packed_sids = [sid for sid in recipients if sid in self.packed_clients]
+        if not packed_sids:
+            return super().emit(event, *args, **kwargs)
+        json_sids = [sid for sid in recipients if sid not in self.packed_clients]
+        
+        state = args[0]
+        timing = current_timing()
+        if timing is not None:
+            state = dict(state, trace_id=timing.trace_id)
+            register_trace(timing)
+        with timed_section("serialize"):
+            data = pack_game_update(state)
+        
+        # One broadcast per wire format, each encoded once for all of its recipients
+        other_kwargs = {key: value for key, value in kwargs.items()
+                        if key not in ('to', 'room', 'skip_sid', 'include_self')}
+        if json_sids:
+            super().emit(event, state, *args[1:], to=room, skip_sid=list(skip_sid) + packed_sids, **other_kwargs)
+        super().emit(event, data, *args[1:], to=room, skip_sid=list(skip_sid) + json_sids, **other_kwargs)
@@ -0,0 +1,206 @@
+"""
+Profiler: On-demand sampling profiler for the running server
+
+A background thread periodically reads the stacks of all other threads with
+sys._current_frames() and counts the frames that belong to the project's
+models/ and app/ packages. Nothing is hooked into the profiled code, so the
+cost is paid by the sampler thread only and does not depend on how many
+calls the game makes (see the README for measured overhead).
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter
+
+from config import PROFILE_DEFAULT_INTERVAL, PROFILE_SIGNAL_SECONDS, PROFILE_OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILED_PACKAGES = ("models", "app")
+
+# Only one profile runs at a time
+_profile_lock = threading.Lock()
+
+
+class StackSampler:
+    """Thread-stack sampler aggregating project frames"""
+    
+    def __init__(self, interval=PROFILE_DEFAULT_INTERVAL, packages=PROFILED_PACKAGES, ignored_threads=()):
+        """
+        Initialize sampler
+        
+        Args:
+            interval (float, optional): Seconds between samples
+            packages (tuple, optional): Project packages whose frames are kept
+            ignored_threads (tuple, optional): Thread idents not sampled
+        """
+        self.interval = interval
+        self.ignored_threads = set(ignored_threads)
+        self.prefixes = tuple(os.path.join(PROJECT_ROOT, package) + os.sep for package in packages)
+        self.stacks = Counter()  # tuple of frame labels, outermost first -> samples
+        self.samples = 0  # sampling passes
+        self.thread_samples = 0  # thread stacks seen, project frames or not
+        self.duration = 0.0
+        self._labels = {}  # code object -> frame label, None if not a project frame
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _label(self, code):
+        """Get the label of a code object, None for frames outside the profiled packages"""
+        label = self._labels.get(code, False)
+        if label is False:
+            filename = os.path.abspath(code.co_filename)
+            if filename.startswith(self.prefixes):
+                relative = os.path.relpath(filename, PROJECT_ROOT).replace(os.sep, "/")
+                label = f"{relative}:{getattr(code, 'co_qualname', code.co_name)}"
+            else:
+                label = None
+            self._labels[code] = label
+        return label
+    
+    def sample(self):
+        """Take one sample of all other threads"""
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or thread_id in self.ignored_threads:
+                continue
+            self.thread_samples += 1
+            stack = []
+            while frame is not None:
+                label = self._label(frame.f_code)
+                if label is not None:
+                    stack.append(label)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+        self.samples += 1
+    
+    def _run(self):
+        """Sampling loop"""
+        start_time = time.perf_counter()
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+        self.duration = time.perf_counter() - start_time
+    
+    def start(self):
+        """Start sampling in a background thread"""
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling and wait for the sampler thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def flat_report(self, limit=50):
+        """
+        Aggregate samples by function
+        
+        Self samples count stacks where the function is the innermost project
+        frame, cumulative samples count stacks containing it at all.
+        
+        Args:
+            limit (int, optional): Number of functions returned
+        
+        Returns:
+            dict: Sampling summary and functions sorted by cumulative samples
+        """
+        self_counts = Counter()
+        cumulative_counts = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                cumulative_counts[label] += count
+        
+        project_samples = sum(self.stacks.values()) or 1
+        functions = []
+        for label, cumulative in cumulative_counts.most_common(limit):
+            functions.append({
+                "function": label,
+                "self": self_counts[label],
+                "cumulative": cumulative,
+                "self_percent": round(100.0 * self_counts[label] / project_samples, 2),
+                "cumulative_percent": round(100.0 * cumulative / project_samples, 2)
+            })
+        return {
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "thread_samples": self.thread_samples,
+            "project_samples": sum(self.stacks.values()),
+            "functions": functions
+        }
+    
+    def collapsed_report(self):
+        """
+        Render samples as collapsed stacks for flame graph tools
+        
+        Returns:
+            str: One "frame;frame;frame count" line per distinct stack
+        """
+        lines = [";".join(stack) + f" {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+def profile(seconds, interval=PROFILE_DEFAULT_INTERVAL):
+    """
+    Sample the running process for a number of seconds, ignoring the
+    calling thread while it waits
+    
+    Args:
+        seconds (float): Profiling duration
+        interval (float, optional): Seconds between samples
+    
+    Returns:
+        StackSampler: Finished sampler, None if another profile is running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        sampler = StackSampler(interval, ignored_threads=(threading.get_ident(),))
+        sampler.start()
+        time.sleep(seconds)
+        sampler.stop()
+        return sampler
+    finally:
+        _profile_lock.release()
+
+
+def _profile_to_file(seconds):
+    """Profile and write a collapsed-stack file to PROFILE_OUTPUT_DIR"""
+    sampler = profile(seconds)
+    if sampler is None:
+        logger.warning("Profile requested while another profile is running")
+        return
+    if not os.path.exists(PROFILE_OUTPUT_DIR):
+        os.makedirs(PROFILE_OUTPUT_DIR)
+    path = os.path.join(PROFILE_OUTPUT_DIR, time.strftime("profile_%Y%m%d_%H%M%S.collapsed"))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed_report())
+    logger.info("Profile written to %s (%s samples)", path, sampler.samples)
+
+
+def install_signal_handler():
+    """
+    Profile for PROFILE_SIGNAL_SECONDS when the process receives SIGUSR2
+    
+    Does nothing on platforms without SIGUSR2 or outside the main thread.
+    """
+    if not hasattr(signal, "SIGUSR2"):
+        return
+    
+    def handle_signal(signum, frame):
+        threading.Thread(target=_profile_to_file, args=(PROFILE_SIGNAL_SECONDS,),
+                         name="profile-writer", daemon=True).start()
+    
+    try:
+        signal.signal(signal.SIGUSR2, handle_signal)
+    except ValueError:  # Not the main thread
+        pass
\ No newline at end of file
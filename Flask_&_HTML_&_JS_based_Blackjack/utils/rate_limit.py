@@ -0,0 +1,116 @@
+"""
+Rate Limit: Token buckets and in-flight deduplication for Socket.IO events
+
+Every connection has one token bucket per event type, refilled at the
+event's rate up to its burst size (EVENT_RATE_LIMITS, "default" for events
+without their own limit). An event arriving at an empty bucket is dropped.
+
+An event identical to one of the same connection that is still being
+handled is dropped as a duplicate, so double clicks and retry storms run a
+handler once. Handlers may widen the key, e.g. to one run per room whichever
+connection asks.
+
+connect and disconnect are never limited.
+"""
+import json
+import time
+import threading
+
+from config import EVENT_RATE_LIMITS
+
+EXEMPT_EVENTS = ("connect", "disconnect")
+
+
+class EventRateLimiter:
+    """Per-connection, per-event token buckets"""
+    
+    def __init__(self, limits=EVENT_RATE_LIMITS):
+        """
+        Initialize rate limiter
+        
+        Args:
+            limits (dict, optional): Event name -> (tokens per second, burst), "default" for other events
+        """
+        self.limits = limits
+        self.lock = threading.Lock()
+        self.buckets = {}  # sid -> {event: [tokens, last refill time]}
+        self.in_flight = set()
+    
+    def allow(self, sid, event, now=None):
+        """
+        Take a token for an event
+        
+        Args:
+            sid (str): Socket ID
+            event (str): Event name
+            now (float, optional): Current time, time.monotonic() if not given
+        
+        Returns:
+            bool: Whether the event may be handled
+        """
+        if event in EXEMPT_EVENTS:
+            return True
+        limit = self.limits.get(event, self.limits.get("default"))
+        if limit is None:
+            return True
+        rate, burst = limit
+        if now is None:
+            now = time.monotonic()
+        
+        with self.lock:
+            bucket = self.buckets.setdefault(sid, {}).get(event)
+            if bucket is None:
+                bucket = self.buckets[sid][event] = [burst, now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+    
+    def begin(self, key):
+        """
+        Mark a request as in flight
+        
+        Args:
+            key (tuple): Request key, see request_key
+        
+        Returns:
+            bool: False if an identical request is already in flight
+        """
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            self.in_flight.add(key)
+            return True
+    
+    def end(self, key):
+        """Mark a request begun with begin as finished"""
+        with self.lock:
+            self.in_flight.discard(key)
+    
+    def forget(self, sid):
+        """Drop a disconnected client's buckets"""
+        with self.lock:
+            self.buckets.pop(sid, None)
+
+
+def request_key(sid, event, data):
+    """
+    Get the deduplication key of an event
+    
+    Args:
+        sid (str): Socket ID
+        event (str): Event name
+        data (dict): Event payload, trace_id is ignored
+    
+    Returns:
+        tuple: Key equal for identical requests of the same connection
+    """
+    payload = {key: value for key, value in data.items() if key != "trace_id"}
+    return (sid, event, json.dumps(payload, sort_keys=True, default=str))
+
+
+# Rate limiter of the Socket.IO events
+rate_limiter = EventRateLimiter()
\ No newline at end of file
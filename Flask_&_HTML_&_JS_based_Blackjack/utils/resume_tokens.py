@@ -0,0 +1,52 @@
+"""
+Resume Tokens: Signed proof of a seat, for reconnecting without join_room
+
+A player gets a token after joining a room and after every resume. It names
+the session, room and player (socket ID) and is signed with SECRET_KEY, so
+the server can seat a reconnecting client directly from the token instead of
+scanning rooms and matching names. Clients send it with the last
+state_version they saw in the Socket.IO connection's auth payload.
+"""
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+from config import SECRET_KEY, RESUME_TOKEN_TTL
+
+_serializer = URLSafeTimedSerializer(SECRET_KEY, salt="blackjack-resume")
+
+
+def issue_resume_token(session_id, room_id, player_id):
+    """
+    Sign a resume token
+
+    Args:
+        session_id (str): Player's session ID
+        room_id (str): Room the player is seated in
+        player_id (str): Player ID (socket ID) in the room
+
+    Returns:
+        str: URL-safe token
+    """
+    return _serializer.dumps({"session_id": session_id, "room_id": room_id, "player_id": player_id})
+
+
+def load_resume_token(token, max_age=RESUME_TOKEN_TTL):
+    """
+    Check a resume token
+
+    Args:
+        token (str): Token sent by the client
+        max_age (float, optional): Seconds a token stays valid
+
+    Returns:
+        dict: session_id, room_id and player_id, None if the token is invalid or expired
+    """
+    if not isinstance(token, str):
+        return None
+    try:
+        claims = _serializer.loads(token, max_age=max_age)
+    except BadSignature:  # Also raised for expired tokens
+        return None
+    if not isinstance(claims, dict) or not all(isinstance(claims.get(key), str)
+                                               for key in ("session_id", "room_id", "player_id")):
+        return None
+    return claims